@@ -1,7 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
+from .mailer import queue_bulk_email
 from .models import CustomUser, RoleUpgradeRequest
+from .utils import role_email_context
 
 @admin.register(CustomUser)
 class UserAdmin(BaseUserAdmin):
@@ -54,15 +56,31 @@ class RoleUpgradeRequestAdmin(admin.ModelAdmin):
         }),
     )
     
+    def _email_users(self, upgrade_requests, subject, template_base):
+        queue_bulk_email(subject, template_base, [
+            (req.user.email, role_email_context(req, req.admin_notes))
+            for req in upgrade_requests
+        ])
+
     def approve_requests(self, request, queryset):
-        count = 0
-        for upgrade_request in queryset.filter(status='pending'):
-            upgrade_request.approve(request.user)
-            count += 1
-        self.message_user(request, f'{count} upgrade requests approved.')
+        approved, skipped = [], 0
+        for upgrade_request in queryset.filter(status='pending').select_related('user'):
+            try:
+                upgrade_request.approve(request.user)
+            except ValueError:
+                skipped += 1  # KYC not verified yet
+                continue
+            approved.append(upgrade_request)
+        self._email_users(approved, 'Role Upgrade Approved — Tick Entertainment', 'role_approved')
+        message = f'{len(approved)} upgrade requests approved.'
+        if skipped:
+            message += f' {skipped} skipped because KYC is not verified.'
+        self.message_user(request, message)
     approve_requests.short_description = 'Approve selected requests'
     
     def reject_requests(self, request, queryset):
-        count = queryset.filter(status='pending').update(status='rejected')
+        pending = list(queryset.filter(status='pending').select_related('user'))
+        count = queryset.filter(pk__in=[req.pk for req in pending]).update(status='rejected', processed_by=request.user)
+        self._email_users(pending, 'Role Upgrade Rejected — Tick Entertainment', 'role_rejected')
         self.message_user(request, f'{count} upgrade requests rejected.')
     reject_requests.short_description = 'Reject selected requests'
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Bulk email: one SMTP connection per batch, templates compiled once.
+
+    queue_bulk_email('Event cancelled', 'event_cancelled',
+                     [(booking.customer_email, {'name': booking.customer_name}) for booking in bookings],
+                     context={'event': event})
+
+`queue_bulk_email` splits the recipients into EMAIL_BATCH_SIZE chunks and
+queues one `deliver_bulk_email` job per chunk, so batches go out in
+parallel (up to the email queue's concurrency) and a failed batch is
+retried on its own. Each job renders `templates/emails/<base>.txt/.html`
+from templates loaded once for the whole batch and sends every message
+over a single `get_connection()`.
+
+Recipients are email strings or (email, context) pairs; the per-recipient
+context is layered over the shared one. Keep per-recipient context to
+plain values: model instances in it are reloaded one query per recipient
+when the job runs.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import get_template
+
+from core.jobs import job
+
+logger = logging.getLogger(__name__)
+
+
+def email_templates(template_base):
+    """The compiled (text, html) templates for `emails/<template_base>`."""
+    return get_template(f'emails/{template_base}.txt'), get_template(f'emails/{template_base}.html')
+
+
+def default_from_email():
+    return getattr(settings, 'DEFAULT_FROM_EMAIL', None) or getattr(settings, 'EMAIL_HOST_USER', None) or 'no-reply@example.com'
+
+
+def build_message(subject, to_email, templates, context, from_email=None, connection=None):
+    """Render one HTML + plain-text message from `email_templates` output."""
+    text_template, html_template = templates
+    msg = EmailMultiAlternatives(
+        subject=subject,
+        body=text_template.render(context),
+        from_email=from_email or default_from_email(),
+        to=[to_email],
+        connection=connection,
+    )
+    msg.attach_alternative(html_template.render(context), 'text/html')
+    return msg
+
+
+def _recipient(entry):
+    if isinstance(entry, str):
+        return entry, {}
+    email, context = entry
+    return email, context or {}
+
+
+def send_bulk_email(subject, template_base, recipients, context=None, batch_size=None, connection=None):
+    """Send `template_base` to every recipient, `batch_size` messages per SMTP connection.
+
+    A message that fails is logged and skipped; the rest of the batch still
+    goes out. Returns stats: sent, failed (addresses), batches, seconds and
+    per_second.
+    """
+    batch_size = batch_size or getattr(settings, 'EMAIL_BATCH_SIZE', 500)
+    templates = email_templates(template_base)
+    from_email = default_from_email()
+    shared = context or {}
+    recipients = [_recipient(entry) for entry in recipients]
+
+    started = time.monotonic()
+    sent, failed, batches = 0, [], 0
+    for start in range(0, len(recipients), batch_size):
+        batch = recipients[start:start + batch_size]
+        batches += 1
+        conn = connection or get_connection()
+        # Opens the connection once; send_messages() below then reuses it
+        conn.open()
+        try:
+            for email, extra in batch:
+                msg = build_message(subject, email, templates, {**shared, **extra}, from_email, conn)
+                try:
+                    sent += conn.send_messages([msg]) or 0
+                except Exception as e:
+                    logger.warning('Bulk email %r to %s failed: %s', template_base, email, e)
+                    failed.append(email)
+        finally:
+            conn.close()
+
+    seconds = time.monotonic() - started
+    stats = {
+        'sent': sent,
+        'failed': failed,
+        'batches': batches,
+        'seconds': round(seconds, 3),
+        'per_second': round(sent / seconds, 1) if seconds else float(sent),
+    }
+    logger.info('Bulk email %r: %d sent, %d failed in %d batches (%.1f/s)',
+                template_base, sent, len(failed), batches, stats['per_second'])
+    return stats
+
+
+@job(queue='email')
+def deliver_bulk_email(subject, template_base, recipients, context=None):
+    """Send one batch from `queue_bulk_email`. Retried only if nothing in the batch went out."""
+    stats = send_bulk_email(subject, template_base, recipients, context=context)
+    if recipients and not stats['sent']:
+        raise RuntimeError(f'No messages delivered ({len(stats["failed"])} failed)')
+    return stats
+
+
+def queue_bulk_email(subject, template_base, recipients, context=None, batch_size=None):
+    """Queue `deliver_bulk_email` jobs for `recipients` in batches. Returns the queued Jobs."""
+    batch_size = batch_size or getattr(settings, 'EMAIL_BATCH_SIZE', 500)
+    recipients = [list(_recipient(entry)) for entry in recipients]
+    return [
+        deliver_bulk_email.delay(subject, template_base, recipients[start:start + batch_size], context=context)
+        for start in range(0, len(recipients), batch_size)
+    ]
@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from accounts.models import RoleUpgradeRequest, KycAuditLog
+from core.jobs import run_pending
+from django.core import mail
 from unittest.mock import patch
 
 User = get_user_model()
@@ -11,7 +13,8 @@ User = get_user_model()
 class KycFlowTests(TestCase):
     def setUp(self):
         self.client = Client()
-        self.user = User.objects.create_user(username='user1', email='user1@example.com', password='pass')
+        self.user = User.objects.create_user(username='user1', email='user1@example.com', password='pass',
+                                             first_name='Ada', last_name='Obi')
         self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='adminpass')
 
     def test_user_submits_kyc_and_admin_verifies_and_approves(self):
@@ -47,5 +50,12 @@ class KycFlowTests(TestCase):
         url = reverse('accounts:verify_kyc', args=[req.pk])
         with patch('django.conf.settings.KYC_WEBHOOK_URL', new='http://example.com/webhook'):
             resp = self.client.post(url, {'action': 'verify', 'notes': 'OK'})
-            # requests.post called
-            self.assertTrue(mock_requests.post.called)
\ No newline at end of file
+            # the webhook and email are queued, not sent inside the request
+            self.assertFalse(mock_requests.post.called)
+            self.assertEqual(len(mail.outbox), 0)
+            run_pending()
+            # requests.post called by the job worker
+            self.assertTrue(mock_requests.post.called)
+            self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Hi Ada Obi,', mail.outbox[0].body)
+        self.assertIn('(Upgrade to Host)', mail.outbox[0].body)
\ No newline at end of file
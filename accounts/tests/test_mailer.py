@@ -0,0 +1,42 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import get_connection
+from django.test import TestCase, override_settings
+
+from accounts.mailer import queue_bulk_email, send_bulk_email
+from core.jobs import run_pending
+
+User = get_user_model()
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class BulkMailerTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'fan{i}', email=f'fan{i}@example.com', password='pass', first_name=f'Fan{i}')
+            for i in range(5)
+        ]
+
+    def recipients(self):
+        return [(user.email, {'name': user.get_full_name(), 'notes': f'note {user.pk}'}) for user in self.users]
+
+    def test_one_connection_per_batch_and_per_recipient_context(self):
+        with patch('accounts.mailer.get_connection', wraps=get_connection) as connect:
+            stats = send_bulk_email('Rejected', 'role_rejected', self.recipients(), batch_size=2)
+
+        self.assertEqual(connect.call_count, 3)
+        self.assertEqual((stats['sent'], stats['failed'], stats['batches']), (5, [], 3))
+        self.assertEqual([msg.to for msg in mail.outbox], [[user.email] for user in self.users])
+        first = mail.outbox[0]
+        self.assertIn('Hi Fan0', first.body)
+        self.assertIn(f'note {self.users[0].pk}', first.alternatives[0][0])
+
+    def test_queued_in_batches_as_jobs(self):
+        jobs = queue_bulk_email('Rejected', 'role_rejected', self.recipients(), batch_size=2)
+        self.assertEqual(len(jobs), 3)
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(run_pending(), {'done': 3})
+        self.assertEqual(len(mail.outbox), 5)
@@ -24,6 +24,7 @@ urlpatterns = [
     # My bookings
     path('bookings/', views.my_bookings, name='my_bookings'),
     path('booking/<str:reference>/', views.booking_detail, name='booking_detail'),
+    path('booking/<str:reference>/cancel/', views.cancel_booking, name='cancel_booking'),
     
     # Favorites and following
     path('favorites/', views.my_favorites, name='my_favorites'),
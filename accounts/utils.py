@@ -1,5 +1,3 @@
-from django.template.loader import render_to_string
-from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 import json
 
@@ -8,41 +6,48 @@ try:
 except Exception:
     requests = None
 
+from core.jobs import job
+from .mailer import build_message, email_templates
 from .models import KycAuditLog
 
 
+@job(queue='email')
+def deliver_html_email(subject, to_email, template_base, context):
+    """Render and send an HTML + plain-text email (runs in the job worker; SMTP errors are retried)."""
+    build_message(subject, to_email, email_templates(template_base), context).send()
+
+
 def send_html_email(subject, to_email, template_base, context=None):
-    """Send HTML + plain-text email using EmailMultiAlternatives.
+    """Queue an HTML + plain-text email built from templates under templates/emails/.
 
-    template_base is the base name for templates under templates/emails/,
-    e.g. 'kyc_verified' -> 'emails/kyc_verified.html' and '.txt'.
+    template_base is the base name, e.g. 'kyc_verified' -> 'emails/kyc_verified.html' and '.txt'.
+    Model instances in the context are reloaded when the email is rendered.
+    For many recipients use accounts.mailer.queue_bulk_email instead.
     """
-    context = context or {}
-    text_body = render_to_string(f'emails/{template_base}.txt', context)
-    html_body = render_to_string(f'emails/{template_base}.html', context)
-
-    from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or getattr(settings, 'EMAIL_HOST_USER', 'no-reply@example.com')
-    msg = EmailMultiAlternatives(subject=subject, body=text_body, from_email=from_email, to=[to_email])
-    msg.attach_alternative(html_body, "text/html")
-    try:
-        msg.send(fail_silently=True)
-    except Exception:
-        # don't crash the caller on email failures
-        pass
-
-
-def post_webhook(url, payload):
-    if not url or not requests:
-        return None
-    try:
-        resp = requests.post(url, json=payload, timeout=5)
-        return resp
-    except Exception:
-        return None
+    return deliver_html_email.delay(subject, to_email, template_base, context or {})
+
+
+def role_email_context(upgrade_request, notes=''):
+    """Context for the role upgrade and KYC emails, as plain values that queue cleanly."""
+    return {
+        'name': upgrade_request.user.get_full_name(),
+        'role': str(upgrade_request.get_request_type_display()),
+        'notes': notes,
+    }
+
+
+@job(queue='webhooks', max_attempts=8)
+def deliver_webhook(url, payload):
+    """POST `payload` as JSON to `url`; non-2xx responses and network errors are retried."""
+    if requests is None:
+        raise RuntimeError('requests is not installed')
+    resp = requests.post(url, json=payload, timeout=5)
+    resp.raise_for_status()
+    return resp
 
 
 def audit_and_webhook(request_obj, action, admin_user=None, notes=''):
-    """Create an audit log and post to configured webhook if present.
+    """Create an audit log and queue a post to the configured webhook if present.
 
     action: e.g. 'kyc_verified', 'kyc_rejected', 'role_approved', 'role_rejected'
     """
@@ -54,7 +59,7 @@ def audit_and_webhook(request_obj, action, admin_user=None, notes=''):
         notes=notes,
     )
 
-    # Fire webhook if configured
+    # Queue webhook if configured
     webhook_url = getattr(settings, 'KYC_WEBHOOK_URL', None)
     if webhook_url:
         payload = {
@@ -64,6 +69,6 @@ def audit_and_webhook(request_obj, action, admin_user=None, notes=''):
             'notes': notes,
             'timestamp': str(log.created_at),
         }
-        post_webhook(webhook_url, payload)
+        deliver_webhook.delay(webhook_url, payload)
 
     return log
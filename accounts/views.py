@@ -12,9 +12,13 @@ from django.contrib.auth import get_user_model
 
 from .models import RoleUpgradeRequest
 from .forms import UserProfileForm, RoleUpgradeRequestForm, LoginForm, SignUpForm
-from .utils import send_html_email, audit_and_webhook
+from .utils import send_html_email, audit_and_webhook, role_email_context
 from events.models import Event, Booking, EventFavorite
+from events.inventory import release_hold
 from artists.models import ArtistProfile, Reel, Follow
+from artists.ingest import bucket_start
+from core.pagination import paginate_listing
+from core.stats import host_stats, platform_stats
 from payments.models import Transaction, Commission
 from django.utils import timezone
 
@@ -114,18 +118,20 @@ def user_dashboard(request):
         return redirect('accounts:artist_dashboard')
     else:
         # Regular user dashboard
-        recent_bookings = request.user.bookings.all().order_by('-booked_at')[:5]
-        favorite_events = request.user.favorite_events.all().order_by('-created_at')[:5]
+        recent_bookings = request.user.bookings.select_related('event').order_by('-booked_at')[:5]
+        favorite_events = Event.objects.filter(
+            favorites__user=request.user
+        ).select_related('category').order_by('-favorites__created_at')[:5]
         
         # Get popular reels
-        popular_reels = Reel.objects.filter(status='published').order_by('-view_count')[:6]
+        popular_reels = Reel.objects.filter(status='published').select_related('artist').order_by('-view_count')[:6]
         
         # Get featured artists
         featured_artists = ArtistProfile.objects.filter(is_featured=True).order_by('-follower_count')[:6]
         
-        # Get artists user is following
-        following_count = request.user.following_artists.count() if hasattr(request.user, 'following_artists') else 0
-        
+        # Get artists user is following (counted lazily, so a cached dashboard fragment skips the query)
+        following_count = request.user.following_artists.count if hasattr(request.user, 'following_artists') else 0
+
         context = {
             'recent_bookings': recent_bookings,
             'favorite_events': favorite_events,
@@ -138,19 +144,51 @@ def user_dashboard(request):
 @login_required
 def my_bookings(request):
     """View user's bookings"""
-    bookings = request.user.bookings.all().order_by('-booked_at')
+    bookings = request.user.bookings.select_related('event')
+    now = timezone.now()
+    stats = request.user.bookings.aggregate(
+        total_bookings=Count('id'),
+        upcoming_bookings=Count('id', filter=Q(event__start_date__gte=now)),
+        past_bookings=Count('id', filter=Q(event__start_date__lt=now)),
+    )
     
     # Filter by status
     status_filter = request.GET.get('status', '')
     if status_filter:
         bookings = bookings.filter(status=status_filter)
     
+    page_obj = paginate_listing(request, bookings, 10, ('-booked_at', '-id'), count=None)
+    
     context = {
-        'bookings': bookings,
+        'page_obj': page_obj,
+        'bookings': page_obj,
         'status_filter': status_filter,
+        **stats,
     }
     return render(request, 'accounts/my_bookings.html', context)
 
+@login_required
+def cancel_booking(request, reference):
+    """Cancel an unpaid booking and give its held seats back"""
+    if request.method != 'POST':
+        messages.error(request, 'Invalid request method.')
+        return redirect('accounts:my_bookings')
+
+    booking = get_object_or_404(Booking, booking_reference=reference, user=request.user)
+    if booking.status != 'pending':
+        messages.error(request, 'Only unpaid bookings can be canceled. Contact support about refunds.')
+        return redirect('accounts:my_bookings')
+    # A payment that is still being processed could confirm the booking after it is canceled
+    if Transaction.objects.filter(booking=booking).exclude(status='failed').exists():
+        messages.error(request, 'A payment for this booking is being processed and it can no longer be canceled.')
+        return redirect('accounts:my_bookings')
+
+    if release_hold(booking):
+        messages.success(request, 'Your booking has been canceled.')
+    else:
+        messages.error(request, 'This booking has already expired.')
+    return redirect('accounts:my_bookings')
+
 @login_required
 def booking_detail(request, reference):
     """View booking details"""
@@ -164,7 +202,7 @@ def booking_detail(request, reference):
 @login_required
 def my_favorites(request):
     """View user's favorite events"""
-    favorites = request.user.favorite_events.all().order_by('-created_at')
+    favorites = request.user.favorite_events.select_related('event').order_by('-created_at')
     
     context = {
         'favorites': favorites,
@@ -239,9 +277,17 @@ def artist_dashboard(request):
     published_reels = reels.filter(status='published').count()
 
     # Calculate statistics
-    total_views = sum(reel.view_count for reel in reels) if reels else 0
-    total_likes = sum(reel.like_count for reel in reels) if reels else 0
+    totals = reels.aggregate(views=Sum('view_count'), likes=Sum('like_count'))
+    total_views = totals['views'] or 0
+    total_likes = totals['likes'] or 0
     follower_count = artist_profile.follower_count if artist_profile else 0
+
+    # Recent views come from the daily rollups rather than the raw view log
+    week_ago = timezone.now() - timezone.timedelta(days=7)
+    views_last_7_days = artist_profile.view_rollups.filter(
+        period='day',
+        bucket__gte=bucket_start(week_ago, 'day')
+    ).aggregate(total=Sum('view_count'))['total'] or 0
     
     context = {
         'artist_profile': artist_profile,
@@ -251,6 +297,7 @@ def artist_dashboard(request):
         'total_views': total_views,
         'total_likes': total_likes,
         'follower_count': follower_count,
+        'views_last_7_days': views_last_7_days,
     }
     return render(request, 'accounts/artist_dashboard.html', context)
 
@@ -263,28 +310,16 @@ def host_dashboard(request):
     
     events = request.user.hosted_events.all().order_by('-created_at')
     
-    # Calculate statistics
-    total_events = events.count()
-    published_events = events.filter(status='published').count()
-    total_bookings = Booking.objects.filter(event__host=request.user).count()
-    confirmed_bookings = Booking.objects.filter(
-        event__host=request.user,
-        status='confirmed'
-    ).count()
-    
-    # Calculate revenue
-    total_revenue = Booking.objects.filter(
-        event__host=request.user,
-        status='confirmed'
-    ).aggregate(total=Sum('total_price'))['total'] or 0
+    # Counters are maintained as bookings change (see core/stats.py)
+    stats = host_stats(request.user)
     
     context = {
         'events': events[:5],
-        'total_events': total_events,
-        'published_events': published_events,
-        'total_bookings': total_bookings,
-        'confirmed_bookings': confirmed_bookings,
-        'total_revenue': total_revenue,
+        'total_events': stats.events,
+        'published_events': stats.published_events,
+        'total_bookings': stats.bookings,
+        'confirmed_bookings': stats.confirmed_bookings,
+        'total_revenue': stats.revenue,
     }
     return render(request, 'accounts/host_dashboard.html', context)
 
@@ -311,22 +346,21 @@ def my_events(request):
 @user_passes_test(lambda u: u.is_superuser)
 def admin_dashboard(request):
     """Admin dashboard"""
-    # Platform statistics
-    total_users = User.objects.count()
-    total_artists = User.objects.filter(is_artist=True).count()
-    total_hosts = User.objects.filter(is_host=True).count()
+    # Platform statistics (maintained incrementally, see core/stats.py)
+    stats = platform_stats()
+    total_users = stats.users
+    total_artists = stats.artists
+    total_hosts = stats.hosts
     regular_users = total_users - total_artists - total_hosts
-    total_events = Event.objects.count()
-    published_events = Event.objects.filter(status='published').count()
-    total_bookings = Booking.objects.count()
-    total_revenue = Booking.objects.filter(status='confirmed').aggregate(
-        total=Sum('total_price')
-    )['total'] or 0
+    total_events = stats.events
+    published_events = stats.published_events
+    total_bookings = stats.bookings
+    total_revenue = stats.revenue
     
     # Recent activity
     recent_users = User.objects.order_by('-date_joined')[:5]
-    recent_events = Event.objects.order_by('-created_at')[:5]
-    pending_requests = RoleUpgradeRequest.objects.filter(status='pending')
+    recent_events = Event.objects.select_related('host').order_by('-created_at')[:5]
+    pending_requests = RoleUpgradeRequest.objects.filter(status='pending').select_related('user')
     
     context = {
         'total_users': total_users,
@@ -398,7 +432,7 @@ def view_user_profile(request, user_id):
 @user_passes_test(lambda u: u.is_superuser)
 def manage_role_requests(request):
     """Manage role upgrade requests"""
-    requests = RoleUpgradeRequest.objects.all().order_by('-created_at')
+    requests = RoleUpgradeRequest.objects.select_related('user').order_by('-created_at')
     
     # Filter by status
     status_filter = request.GET.get('status', '')
@@ -525,14 +559,14 @@ def verify_kyc(request, pk):
             req.verify_kyc(request.user, verified=True, notes=notes)
             messages.success(request, 'KYC marked as verified.')
             # Send HTML email
-            ctx = {'user': req.user, 'request_obj': req}
+            ctx = role_email_context(req, notes)
             send_html_email('KYC Verified — Tick Entertainment', req.user.email, 'kyc_verified', ctx)
             # Audit + webhook
             audit_and_webhook(req, 'kyc_verified', admin_user=request.user, notes=notes)
         elif action == 'reject':
             req.verify_kyc(request.user, verified=False, notes=notes)
             messages.success(request, 'KYC marked as rejected.')
-            ctx = {'user': req.user, 'request_obj': req, 'notes': notes}
+            ctx = role_email_context(req, notes)
             send_html_email('KYC Rejected — Tick Entertainment', req.user.email, 'kyc_rejected', ctx)
             audit_and_webhook(req, 'kyc_rejected', admin_user=request.user, notes=notes)
         return redirect('accounts:manage_role_requests')
@@ -555,7 +589,7 @@ def process_role_request(request, pk):
                 req.approve(request.user)
                 req.admin_notes = notes or req.admin_notes
                 messages.success(request, 'Role upgrade request approved.')
-                ctx = {'user': req.user, 'request_obj': req}
+                ctx = role_email_context(req)
                 send_html_email('Role Upgrade Approved — Tick Entertainment', req.user.email, 'role_approved', ctx)
                 audit_and_webhook(req, 'role_approved', admin_user=request.user, notes=notes)
             except ValueError as e:
@@ -563,7 +597,7 @@ def process_role_request(request, pk):
         elif action == 'reject':
             req.reject(request.user, notes=notes)
             messages.success(request, 'Role upgrade request rejected.')
-            ctx = {'user': req.user, 'request_obj': req, 'notes': notes}
+            ctx = role_email_context(req, notes)
             send_html_email('Role Upgrade Rejected — Tick Entertainment', req.user.email, 'role_rejected', ctx)
             audit_and_webhook(req, 'role_rejected', admin_user=request.user, notes=notes)
         return redirect('accounts:manage_role_requests')
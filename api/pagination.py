@@ -0,0 +1,81 @@
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from core.pagination import KeysetPaginator
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on a (sort key, id) position, see core/pagination.py.
+
+    Views set `cursor_ordering`; clients follow the `next`/`previous` links.
+    Pass `count=1` to include an approximate total.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('-id',)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = getattr(view, 'cursor_ordering', self.ordering)
+        count = 'approximate' if request.query_params.get('count') in ('1', 'true') else None
+        paginator = KeysetPaginator(queryset, self.get_page_size(request), ordering, count=count)
+        self.page = paginator.page(request.query_params.get(self.cursor_query_param))
+        return list(self.page)
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        body = {
+            'next': self._link(self.page.next_cursor),
+            'previous': self._link(self.page.previous_cursor),
+        }
+        if self.page.count is not None:
+            body['count'] = self.page.count
+            body['count_is_estimate'] = self.page.count_is_estimate
+        body['results'] = data
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer', 'description': 'Only with count=1'},
+                'count_is_estimate': {'type': 'boolean', 'description': 'Only with count=1'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param, 'required': False, 'in': 'query',
+                'description': 'Pagination cursor from a previous response.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param, 'required': False, 'in': 'query',
+                'description': f'Results per page (max {self.max_page_size}).',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': 'count', 'required': False, 'in': 'query',
+                'description': 'Set to 1 to include an approximate total.',
+                'schema': {'type': 'integer', 'enum': [0, 1]},
+            },
+        ]
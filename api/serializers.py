@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from events.models import Event, Booking
+from events.inventory import create_held_booking, SoldOut
 from accounts.models import RoleUpgradeRequest
 
 User = get_user_model()
@@ -52,18 +53,18 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         user = self.context['request'].user
         quantity = validated_data.get('quantity', 1)
 
-        booking = Booking(
-            event=event,
-            user=user,
-            quantity=quantity,
-            unit_price=event.ticket_price,
-            customer_name=validated_data.get('customer_name', user.get_full_name() or user.email),
-            customer_email=validated_data.get('customer_email', user.email),
-            customer_phone=validated_data.get('customer_phone', ''),
-            notes=validated_data.get('notes', ''),
-        )
-        booking.save()
-        return booking
+        try:
+            return create_held_booking(
+                event,
+                user,
+                quantity,
+                customer_name=validated_data.get('customer_name', user.get_full_name() or user.email),
+                customer_email=validated_data.get('customer_email', user.email),
+                customer_phone=validated_data.get('customer_phone', ''),
+                notes=validated_data.get('notes', ''),
+            )
+        except SoldOut as e:
+            raise serializers.ValidationError({'quantity': str(e)})
 
 class RoleUpgradeRequestSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
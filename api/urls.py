@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PublicEventViewSet, UserViewSet, BookingViewSet, RoleUpgradeRequestViewSet
+from .views import PublicEventViewSet, UserViewSet, BookingViewSet, RoleUpgradeRequestViewSet, autocomplete
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
@@ -15,6 +15,7 @@ router.register(r'role-requests', RoleUpgradeRequestViewSet, basename='role-requ
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('autocomplete/', autocomplete, name='autocomplete'),
 
     # Schema and docs
     path('schema/', SpectacularAPIView.as_view(), name='schema'),
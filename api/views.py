@@ -1,10 +1,13 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
 from drf_spectacular.utils import extend_schema, OpenApiExample
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from core.typeahead import typeahead_index
 from events.models import Event, Booking
 from accounts.models import RoleUpgradeRequest
+from .pagination import KeysetPagination
 from .serializers import (
     UserSerializer,
     EventSerializer,
@@ -17,19 +20,25 @@ from .serializers import (
 User = get_user_model()
 
 class PublicEventViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Event.objects.filter(status='published')
+    queryset = Event.objects.filter(status='published').select_related('host')
     serializer_class = EventSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('start_date', 'id')
 
 class UserViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-date_joined', '-id')
 
 class BookingViewSet(viewsets.ModelViewSet):
     """Bookings: users can create bookings, view their own bookings; admins can view all."""
-    queryset = Booking.objects.all().select_related('event', 'user')
+    queryset = Booking.objects.all().select_related('event__host', 'user')
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-booked_at', '-id')
 
     def get_serializer_class(self):
         if self.action in ['create']:
@@ -39,8 +48,8 @@ class BookingViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         if user.is_staff or user.is_superuser:
-            return Booking.objects.all().select_related('event', 'user')
-        return Booking.objects.filter(user=user).select_related('event', 'user')
+            return Booking.objects.all().select_related('event__host', 'user')
+        return Booking.objects.filter(user=user).select_related('event__host', 'user')
 
     def perform_create(self, serializer):
         # serializer.create handles event lookup and user assignment
@@ -73,6 +82,8 @@ class BookingViewSet(viewsets.ModelViewSet):
 class RoleUpgradeRequestViewSet(viewsets.ModelViewSet):
     """Role upgrade requests: users can create, admins can list/manage."""
     queryset = RoleUpgradeRequest.objects.all().select_related('user')
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-created_at', '-id')
 
     def get_serializer_class(self):
         if self.action in ['create']:
@@ -108,3 +119,18 @@ class RoleUpgradeRequestViewSet(viewsets.ModelViewSet):
     )
     def create(self, request, *args, **kwargs):
         return super().create(request, *args, **kwargs)
+
+
+@extend_schema(description="Search-as-you-type suggestions (events, artists, genres and cities) for `q`.")
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def autocomplete(request):
+    """Top suggestions for the prefix in `q`, served from the in-memory prefix index."""
+    query = request.query_params.get('q', '')
+    max_results = getattr(settings, 'TYPEAHEAD_MAX_RESULTS', 10)
+    try:
+        limit = min(max(int(request.query_params.get('limit', max_results)), 1), max_results)
+    except ValueError:
+        limit = max_results
+    return Response({'query': query, 'results': typeahead_index.suggest(query, limit)})
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import ArtistProfile, Reel, ReelView, ReelLike, Follow
+from .models import ArtistProfile, Reel, ReelUpload, ReelView, ReelViewRollup, ReelLike, Follow
 
 @admin.register(ArtistProfile)
 class ArtistProfileAdmin(admin.ModelAdmin):
@@ -84,6 +84,13 @@ class ReelViewAdmin(admin.ModelAdmin):
     search_fields = ['reel__title', 'user__email']
     readonly_fields = ['reel', 'user', 'ip_address', 'user_agent', 'viewed_at']
 
+@admin.register(ReelViewRollup)
+class ReelViewRollupAdmin(admin.ModelAdmin):
+    list_display = ['reel', 'artist', 'period', 'bucket', 'view_count']
+    list_filter = ['period', 'bucket']
+    search_fields = ['reel__title', 'artist__stage_name']
+    readonly_fields = ['reel', 'artist', 'period', 'bucket', 'view_count']
+
 @admin.register(ReelLike)
 class ReelLikeAdmin(admin.ModelAdmin):
     list_display = ['reel', 'user', 'created_at']
@@ -96,4 +103,11 @@ class FollowAdmin(admin.ModelAdmin):
     list_display = ['artist', 'follower', 'created_at']
     list_filter = ['created_at']
     search_fields = ['artist__stage_name', 'follower__email']
-    readonly_fields = ['created_at']
\ No newline at end of file
+    readonly_fields = ['created_at']
+
+@admin.register(ReelUpload)
+class ReelUploadAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'artist', 'status', 'received', 'size', 'updated_at']
+    list_filter = ['status', 'updated_at']
+    search_fields = ['filename', 'artist__stage_name']
+    readonly_fields = ['id', 'artist', 'filename', 'size', 'received', 'mime_type', 'checksum', 'created_at', 'updated_at']
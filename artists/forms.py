@@ -1,5 +1,6 @@
 from django import forms
-from .models import ArtistProfile, Reel
+from django.conf import settings
+from .models import ArtistProfile, Reel, ReelUpload
 
 class ArtistProfileForm(forms.ModelForm):
     class Meta:
@@ -56,6 +57,9 @@ class ArtistProfileForm(forms.ModelForm):
         return handle
 
 class ReelForm(forms.ModelForm):
+    # A completed chunked upload (artists/uploads.py) to use instead of posting video_file
+    upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
+
     class Meta:
         model = Reel
         fields = [
@@ -73,10 +77,23 @@ class ReelForm(forms.ModelForm):
             'allow_downloads': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
 
+    def __init__(self, *args, artist=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.artist = artist
+
+    def clean_upload(self):
+        upload_id = self.cleaned_data.get('upload')
+        if not upload_id:
+            return None
+        upload = ReelUpload.objects.filter(pk=upload_id, artist=self.artist, status='complete').first()
+        if upload is None:
+            raise forms.ValidationError("The uploaded video was not found or is incomplete!")
+        return upload
+
     def clean(self):
         cleaned_data = super().clean()
         content_type = cleaned_data.get('content_type')
-        video_file = cleaned_data.get('video_file')
+        video_file = cleaned_data.get('video_file') or cleaned_data.get('upload')
         image_file = cleaned_data.get('image_file')
         
         if content_type == 'video' and not video_file:
@@ -90,9 +107,9 @@ class ReelForm(forms.ModelForm):
     def clean_video_file(self):
         video_file = self.cleaned_data.get('video_file')
         if video_file:
-            # Check file size (max 50MB for videos)
-            if video_file.size > 50 * 1024 * 1024:
-                raise forms.ValidationError("Video file size cannot exceed 50MB!")
+            # Check file size (REEL_VIDEO_MAX_SIZE, 50MB by default)
+            if video_file.size > settings.REEL_VIDEO_MAX_SIZE:
+                raise forms.ValidationError(f"Video file size cannot exceed {settings.REEL_VIDEO_MAX_SIZE // (1024 * 1024)}MB!")
             
             # Check file extension
             valid_extensions = ['.mp4', '.mov', '.avi', '.mkv']
@@ -0,0 +1,252 @@
+"""
+Batched, append-only ingestion of reel views.
+
+Views are queued in memory and written with `bulk_create` once the queue
+reaches REEL_VIEW_BATCH_SIZE or REEL_VIEW_FLUSH_INTERVAL seconds have
+passed. A daemon thread, started by a view when none is running, flushes
+once the interval has passed without a flush, so queued views don't wait
+for more traffic; it exits when the queue is empty. Each flush also folds
+the batch into hourly and daily ReelViewRollup rows so analytics never
+have to scan the raw ReelView table.
+
+Until its batch is inserted a view is only visible to the process that
+queued it, so `is_queued` lets callers that deduplicate views against the
+table also check this process's queue.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import ReelView, ReelViewRollup
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT_MAX_LENGTH = 256
+ROLLUP_PERIODS = {
+    'hour': TruncHour,
+    'day': TruncDay,
+}
+
+
+def bucket_start(moment, period):
+    """Truncate `moment` to the start of its hour or day (UTC)."""
+    moment = moment.astimezone(dt_timezone.utc)
+    if period == 'day':
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+class ReelViewQueue:
+    """In-process queue of ReelView rows waiting to be bulk inserted."""
+
+    def __init__(self, batch_size=None, flush_interval=None):
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue = []
+        # (reel_id, user_id) of views queued or being flushed, for is_queued()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    @property
+    def batch_size(self):
+        if self._batch_size is not None:
+            return self._batch_size
+        return getattr(settings, 'REEL_VIEW_BATCH_SIZE', 200)
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return getattr(settings, 'REEL_VIEW_FLUSH_INTERVAL', 10)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._queue)
+
+    def is_queued(self, reel, user=None):
+        """Whether this process has a view of `reel` by `user` (None: anonymous) not yet in the table."""
+        with self._lock:
+            return (reel.pk, _user_id(user)) in self._pending
+
+    def record(self, reel, user=None, ip_address=None, user_agent=''):
+        """Queue a view of `reel`; flush if the batch is full or due."""
+        view = ReelView(
+            reel_id=reel.pk,
+            user_id=_user_id(user),
+            ip_address=ip_address or '0.0.0.0',
+            user_agent=(user_agent or '')[:USER_AGENT_MAX_LENGTH],
+            viewed_at=timezone.now(),
+        )
+        view._artist_id = reel.artist_id
+        with self._lock:
+            self._queue.append(view)
+            self._pending.add((view.reel_id, view.user_id))
+            self._start_timer()
+            due = (
+                len(self._queue) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def _start_timer(self):
+        # Called with self._lock held. A thread isn't alive after a fork, so each worker starts its own
+        if self.flush_interval > 0 and (self._timer is None or not self._timer.is_alive()):
+            self._timer = threading.Thread(target=self._flush_periodically, name='reel-view-flush', daemon=True)
+            self._timer.start()
+
+    def _flush_periodically(self):
+        """Flush whenever the interval passes without a flush; exit once the queue is empty."""
+        # Sleep first: a record() that finds a flush overdue does that flush itself
+        wait = self.flush_interval
+        while True:
+            time.sleep(wait)
+            wait = self._last_flush + self.flush_interval - time.monotonic()
+            if wait > 0:
+                continue
+            wait = self.flush_interval
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Periodic reel view flush failed')
+            finally:
+                close_old_connections()
+            with self._lock:
+                if not self._queue:
+                    # The next record() starts a new timer
+                    self._timer = None
+                    return
+
+    def flush(self):
+        """Insert all queued views and update their rollups. Returns rows written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._queue = self._queue, []
+                self._last_flush = time.monotonic()
+
+            if not batch:
+                return 0
+
+            try:
+                with transaction.atomic():
+                    ReelView.objects.bulk_create(batch, batch_size=self.batch_size)
+                    totals = Counter()
+                    for view in batch:
+                        for period in ROLLUP_PERIODS:
+                            key = (view.reel_id, view._artist_id, period, bucket_start(view.viewed_at, period))
+                            totals[key] += 1
+                    for key, views in totals.items():
+                        _add_to_rollup(*key, views)
+            except Exception:
+                logger.exception('Failed to flush %d queued reel views', len(batch))
+                with self._lock:
+                    # Retry on the next flush unless the backlog is already runaway
+                    if len(self._queue) < self.batch_size * 10:
+                        self._queue[:0] = batch
+                    else:
+                        self._forget(batch)
+                return 0
+            with self._lock:
+                self._forget(batch)
+            return len(batch)
+
+    def _forget(self, batch):
+        self._pending.difference_update((view.reel_id, view.user_id) for view in batch)
+
+
+def _user_id(user):
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def _add_to_rollup(reel_id, artist_id, period, bucket, views):
+    lookup = {'reel_id': reel_id, 'period': period, 'bucket': bucket}
+    if ReelViewRollup.objects.filter(**lookup).update(view_count=F('view_count') + views):
+        return
+    try:
+        with transaction.atomic():
+            ReelViewRollup.objects.create(artist_id=artist_id, view_count=views, **lookup)
+    except IntegrityError:
+        # Another process created the bucket first
+        ReelViewRollup.objects.filter(**lookup).update(view_count=F('view_count') + views)
+
+
+def rebuild_rollups(since=None):
+    """Recompute rollups from raw ReelView rows viewed at or after `since`.
+
+    Buckets older than `since` are left alone, so rollups for periods whose
+    raw rows have already been pruned survive a rebuild.
+    """
+    views = ReelView.objects.all()
+    rollups = ReelViewRollup.objects.all()
+    if since is not None:
+        since = bucket_start(since, 'day')
+        views = views.filter(viewed_at__gte=since)
+        rollups = rollups.filter(bucket__gte=since)
+
+    with transaction.atomic():
+        rollups.delete()
+        created = 0
+        for period, trunc in ROLLUP_PERIODS.items():
+            rows = (
+                views.annotate(bucket=trunc('viewed_at', tzinfo=dt_timezone.utc))
+                .values('reel_id', 'reel__artist_id', 'bucket')
+                .annotate(total=Count('pk'))
+                .order_by()
+            )
+            created += len(ReelViewRollup.objects.bulk_create(
+                [
+                    ReelViewRollup(
+                        reel_id=row['reel_id'],
+                        artist_id=row['reel__artist_id'],
+                        period=period,
+                        bucket=row['bucket'],
+                        view_count=row['total'],
+                    )
+                    for row in rows.iterator()
+                ],
+                batch_size=500,
+            ))
+    return created
+
+
+def prune_raw_views(days=None, chunk_size=5000):
+    """Delete raw ReelView rows older than `days` (REEL_VIEW_RETENTION_DAYS). Returns rows deleted."""
+    if days is None:
+        days = getattr(settings, 'REEL_VIEW_RETENTION_DAYS', 90)
+    cutoff = timezone.now() - timezone.timedelta(days=days)
+    deleted = 0
+    while True:
+        pks = list(
+            ReelView.objects.filter(viewed_at__lt=cutoff)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:chunk_size]
+        )
+        if not pks:
+            return deleted
+        deleted += ReelView.objects.filter(pk__in=pks).delete()[0]
+
+
+reel_view_queue = ReelViewQueue()
+
+
+def _drain_on_exit():
+    try:
+        reel_view_queue.flush()
+        close_old_connections()
+    except Exception:
+        logger.exception('Failed to drain reel view queue on shutdown')
+
+
+atexit.register(_drain_on_exit)
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from artists.uploads import prune_uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete resumable reel uploads (and their partial files) that were abandoned'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=None,
+                            help='Idle time in hours (default: REEL_UPLOAD_EXPIRY_HOURS)')
+
+    def handle(self, *args, **options):
+        hours = options['hours'] if options['hours'] is not None else settings.REEL_UPLOAD_EXPIRY_HOURS
+        pruned = prune_uploads(hours=hours)
+        self.stdout.write(self.style.SUCCESS(f'Deleted {pruned} uploads idle for more than {hours} hours'))
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from artists.ingest import prune_raw_views
+
+
+class Command(BaseCommand):
+    help = 'Delete raw ReelView rows older than the retention window (rollups are kept)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Retention in days (default: REEL_VIEW_RETENTION_DAYS)')
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else settings.REEL_VIEW_RETENTION_DAYS
+        deleted = prune_raw_views(days=days)
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} reel views older than {days} days'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from artists.social import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute follower, reel, view and like counters on artists and reels and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        report = reconcile_counters(fix=not options['dry_run'])
+        for field, rows in report.items():
+            self.stdout.write(f'{field}: {rows} drifted')
+        total = sum(report.values())
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {total} drifted counters'))
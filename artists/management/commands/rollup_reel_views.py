@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from artists.ingest import reel_view_queue, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Flush queued reel views and optionally rebuild hourly/daily rollups from raw views'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recompute rollups from raw ReelView rows')
+        parser.add_argument('--days', type=int, default=None,
+                            help='Only rebuild buckets from the last N days (default: all raw rows)')
+
+    def handle(self, *args, **options):
+        flushed = reel_view_queue.flush()
+        self.stdout.write(f'Flushed {flushed} queued reel views')
+
+        if options['rebuild']:
+            since = None
+            if options['days'] is not None:
+                since = timezone.now() - timezone.timedelta(days=options['days'])
+            created = rebuild_rollups(since=since)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {created} rollup rows'))
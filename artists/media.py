@@ -0,0 +1,177 @@
+"""
+Reel video delivery with HTTP range requests.
+
+    <video src="{% url 'artists:reel_video' reel.slug %}">
+
+Browsers and mobile players fetch video in byte ranges: a little from the
+start for the metadata, then whatever range they seek to. `reel_video`
+answers `Range: bytes=...` with 206 Partial Content, and If-Range,
+If-None-Match and If-Modified-Since with the usual 200/304 answers, using
+an ETag built from the file's size and mtime.
+
+The body is a FileResponse over the open file. Under gunicorn the worker
+hands the file descriptor to sendfile(), so the kernel copies the bytes
+and they never pass through Python. `RangeFile` limits reads to the
+requested range for servers without sendfile.
+
+With REEL_VIDEO_SENDFILE_HEADER set to X-Accel-Redirect (nginx) or
+X-Sendfile (Apache, Caddy), Django only checks the request and names the
+file, and the front server streams it and handles ranges itself. Files on
+non-local storage (S3 and the like) are redirected to, since those
+services already serve ranges.
+
+Slug-to-file lookups are cached under the 'reels' listing namespace
+(core/cache.py), so a player's stream of range requests costs no queries.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from core.cache import namespace_versions
+from .models import Reel
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+VIDEO_KEY = 'reel-video:{}:{}'
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class RangeFile:
+    """A file positioned at `start` whose reads stop after byte `end`."""
+
+    def __init__(self, file, start, end):
+        self.file = file
+        self.name = file.name
+        self.end = end
+        file.seek(start)
+
+    def read(self, size=-1):
+        remaining = self.end + 1 - self.file.tell()
+        if remaining <= 0:
+            return b''
+        return self.file.read(remaining if size is None or size < 0 else min(size, remaining))
+
+    # gunicorn's sendfile() starts at the descriptor's position and sends Content-Length bytes
+    def fileno(self):
+        return self.file.fileno()
+
+    def seek(self, *args):
+        return self.file.seek(*args)
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """The inclusive (start, end) of a single `Range: bytes=` header, or None to send everything.
+
+    Multiple ranges aren't supported; like a missing or malformed header they
+    get the whole file, which HTTP allows. Raises RangeNotSatisfiable for
+    ranges that start past the end of the file.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable
+    if end < start:
+        return None
+    return start, end
+
+
+def video_name(slug):
+    """Storage name of a published reel's video ('' if it has none), cached until reels change."""
+    key = VIDEO_KEY.format(slug, namespace_versions(['reels'])[0])
+    name = cache.get(key)
+    if name is None:
+        name = Reel.objects.filter(slug=slug, status='published').values_list('video_file', flat=True).first()
+        if name is None:
+            raise Http404('No such reel')
+        name = name or ''
+        cache.set(key, name, getattr(settings, 'REEL_VIDEO_CACHE_SECONDS', 3600))
+    return name
+
+
+def _range_still_valid(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(last_modified)
+
+
+def serve_video(request, name):
+    """A 200, 206, 304 or 416 response for the video stored as `name`."""
+    try:
+        path = default_storage.path(name)
+    except NotImplementedError:
+        return HttpResponseRedirect(default_storage.url(name))
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404('Video file is missing')
+
+    size = stat.st_size
+    etag = quote_etag(f'{size:x}-{int(stat.st_mtime):x}')
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': f"public, max-age={getattr(settings, 'REEL_VIDEO_CACHE_SECONDS', 3600)}",
+    }
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified[header] = value
+        return not_modified
+
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range and not _range_still_valid(request, etag, stat.st_mtime):
+        byte_range = None
+
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    sendfile_header = getattr(settings, 'REEL_VIDEO_SENDFILE_HEADER', '')
+    if sendfile_header:
+        response = HttpResponse(content_type=content_type)
+        if sendfile_header == 'X-Accel-Redirect':
+            response[sendfile_header] = settings.REEL_VIDEO_ACCEL_PREFIX.rstrip('/') + '/' + name
+        else:
+            response[sendfile_header] = path
+        headers.pop('Accept-Ranges')  # the front server adds its own
+    elif byte_range is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(open(path, 'rb'), start, end), content_type=content_type, status=206)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    for header, value in headers.items():
+        response[header] = value
+    return response
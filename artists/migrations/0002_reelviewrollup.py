@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='reel',
+            options={'ordering': ['-created_at', 'view_count']},
+        ),
+        migrations.CreateModel(
+            name='ReelViewRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=4)),
+                ('bucket', models.DateTimeField(help_text='Start of the hour or day this row covers')),
+                ('view_count', models.PositiveIntegerField(default=0)),
+                ('artist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_rollups', to='artists.artistprofile')),
+                ('reel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_rollups', to='artists.reel')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['artist', 'period', 'bucket'], name='artists_ree_artist__efec5d_idx'), models.Index(fields=['period', 'bucket'], name='artists_ree_period_34348c_idx')],
+                'unique_together': {('reel', 'period', 'bucket')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0002_reelviewrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='artistprofile',
+            index=models.Index(fields=['is_featured', 'follower_count'], name='artists_art_is_feat_1c1302_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='artistprofile',
+            index=models.Index(fields=['follower_count'], name='artists_art_followe_971278_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reel',
+            index=models.Index(fields=['artist', 'status', 'created_at'], name='artists_ree_artist__ae792c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reel',
+            index=models.Index(fields=['status', 'view_count'], name='artists_ree_status_f85b6c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reel',
+            index=models.Index(fields=['status', 'created_at'], name='artists_ree_status_6fc381_idx'),
+        ),
+    ]
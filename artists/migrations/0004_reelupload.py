@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:17
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0003_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReelUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField(help_text='Declared size in bytes')),
+                ('received', models.PositiveBigIntegerField(default=0, help_text='Bytes written so far')),
+                ('mime_type', models.CharField(blank=True, help_text='Detected from the first chunk', max_length=100)),
+                ('checksum', models.CharField(blank=True, help_text='SHA-256 of the complete file', max_length=64)),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('complete', 'Complete')], default='uploading', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('artist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='artists.artistprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['updated_at'], name='artists_ree_updated_bfae74_idx')],
+            },
+        ),
+    ]
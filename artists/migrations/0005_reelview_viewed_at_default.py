@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0004_reelupload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reelview',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:14
+
+from datetime import timezone as dt_timezone
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import TruncDay, TruncHour
+
+ROLLUP_PERIODS = {
+    'hour': TruncHour,
+    'day': TruncDay,
+}
+
+
+def backfill_rollups(apps, schema_editor):
+    """Roll up existing ReelView rows, as `rollup_reel_views --rebuild` does.
+
+    Flushes only add the views they write, so without this analytics miss
+    every view recorded before the upgrade.
+    """
+    ReelView = apps.get_model('artists', 'ReelView')
+    ReelViewRollup = apps.get_model('artists', 'ReelViewRollup')
+    ReelViewRollup.objects.all().delete()
+    for period, trunc in ROLLUP_PERIODS.items():
+        rows = (
+            ReelView.objects.annotate(bucket=trunc('viewed_at', tzinfo=dt_timezone.utc))
+            .values('reel_id', 'reel__artist_id', 'bucket')
+            .annotate(total=Count('pk'))
+            .order_by()
+        )
+        ReelViewRollup.objects.bulk_create(
+            [
+                ReelViewRollup(
+                    reel_id=row['reel_id'],
+                    artist_id=row['reel__artist_id'],
+                    period=period,
+                    bucket=row['bucket'],
+                    view_count=row['total'],
+                )
+                for row in rows.iterator()
+            ],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0005_reelview_viewed_at_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
 
 User = get_user_model()
@@ -40,6 +43,12 @@ class ArtistProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_featured', 'follower_count']),
+            models.Index(fields=['follower_count']),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.stage_name)
@@ -95,6 +104,11 @@ class Reel(models.Model):
 
     class Meta:
         ordering = ['-created_at', 'view_count']
+        indexes = [
+            models.Index(fields=['artist', 'status', 'created_at']),
+            models.Index(fields=['status', 'view_count']),
+            models.Index(fields=['status', 'created_at']),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -114,7 +128,8 @@ class ReelView(models.Model):
     ip_address = models.GenericIPAddressField()
     user_agent = models.TextField(blank=True)
     
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    # Set when the view is recorded, not when its batch is inserted (see ingest.py)
+    viewed_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         indexes = [
@@ -148,4 +163,53 @@ class Follow(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.follower.username} follows {self.artist.stage_name}"
\ No newline at end of file
+        return f"{self.follower.username} follows {self.artist.stage_name}"
+
+class ReelViewRollup(models.Model):
+    """Hourly and daily view totals per reel, denormalized by artist for per-artist reads."""
+    PERIOD_CHOICES = [
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+    ]
+
+    reel = models.ForeignKey(Reel, on_delete=models.CASCADE, related_name='view_rollups')
+    artist = models.ForeignKey(ArtistProfile, on_delete=models.CASCADE, related_name='view_rollups')
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket = models.DateTimeField(help_text="Start of the hour or day this row covers")
+    view_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['reel', 'period', 'bucket']
+        indexes = [
+            models.Index(fields=['artist', 'period', 'bucket']),
+            models.Index(fields=['period', 'bucket']),
+        ]
+
+    def __str__(self):
+        return f"{self.reel.title} - {self.period} {self.bucket:%Y-%m-%d %H:%M} ({self.view_count})"
+
+class ReelUpload(models.Model):
+    """A resumable reel video upload, written to disk chunk by chunk (see artists/uploads.py)."""
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    artist = models.ForeignKey(ArtistProfile, on_delete=models.CASCADE, related_name='uploads')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text="Declared size in bytes")
+    received = models.PositiveBigIntegerField(default=0, help_text="Bytes written so far")
+    mime_type = models.CharField(max_length=100, blank=True, help_text="Detected from the first chunk")
+    checksum = models.CharField(max_length=64, blank=True, help_text="SHA-256 of the complete file")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size} bytes, {self.status})"
@@ -0,0 +1,127 @@
+"""
+Follows, likes and the denormalized counters on ArtistProfile and Reel.
+
+Toggling a follow or like changes the membership row and its counters in
+one transaction, with F() updates so concurrent clicks can't lose
+increments. The unique constraints on Follow and ReelLike decide races:
+a duplicate follow fails to insert and leaves the counter alone.
+
+`reconcile_counters` (the `reconcile_artist_counters` command) recomputes
+every counter from the underlying rows in a few set-based UPDATEs and
+reports how many rows had drifted.
+"""
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from core.live import publish
+from .models import ArtistProfile, Follow, Reel, ReelLike
+
+logger = logging.getLogger(__name__)
+
+
+def _change(model, pk, **deltas):
+    """Add `deltas` to counters on one row, never going below zero."""
+    model.objects.filter(pk=pk).update(**{
+        field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items()
+    })
+
+
+def _toggle(membership, create, on_change):
+    """Delete `membership` if it exists, otherwise create it. Returns True if it exists afterwards."""
+    with transaction.atomic():
+        deleted, _ = membership.delete()
+        if deleted:
+            on_change(-1)
+            return False
+        try:
+            with transaction.atomic():
+                create()
+        except IntegrityError:
+            # A concurrent request created it first and already counted it
+            return True
+        on_change(1)
+        return True
+
+
+def toggle_follow(artist, user):
+    """Follow or unfollow `artist`. Returns (is_following, follower_count)."""
+    is_following = _toggle(
+        Follow.objects.filter(artist=artist, follower=user),
+        lambda: Follow.objects.create(artist=artist, follower=user),
+        lambda delta: _change(ArtistProfile, artist.pk, follower_count=delta),
+    )
+    artist.refresh_from_db(fields=['follower_count'])
+    return is_following, artist.follower_count
+
+
+def toggle_like(reel, user):
+    """Like or unlike `reel`, keeping the artist's total_likes in step. Returns (is_liked, like_count)."""
+    def on_change(delta):
+        _change(Reel, reel.pk, like_count=delta)
+        _change(ArtistProfile, reel.artist_id, total_likes=delta)
+
+    is_liked = _toggle(
+        ReelLike.objects.filter(reel=reel, user=user),
+        lambda: ReelLike.objects.create(reel=reel, user=user),
+        on_change,
+    )
+    publish('reel', reel.pk)
+    reel.refresh_from_db(fields=['like_count'])
+    return is_liked, reel.like_count
+
+
+def refresh_reel_count(artist_id):
+    """Recount an artist's published reels (after a reel is saved or deleted)."""
+    ArtistProfile.objects.filter(pk=artist_id).update(
+        reel_count=Reel.objects.filter(artist_id=artist_id, status='published').count()
+    )
+
+
+def _count(queryset, group_field, aggregate):
+    """Correlated subquery: `aggregate` over `queryset` rows whose `group_field` is the outer row."""
+    return Coalesce(Subquery(
+        queryset.filter(**{group_field: OuterRef('pk')})
+        .order_by()
+        .values(group_field)
+        .annotate(total=aggregate)
+        .values('total')
+    ), Value(0))
+
+
+def _reconcile(model, expected, fix):
+    """Compare counter fields with `expected` expressions; fix drifted rows. Returns {field: rows}."""
+    annotated = model.objects.annotate(**{f'expected_{field}': expr for field, expr in expected.items()})
+    drift = annotated.aggregate(**{
+        field: Count('pk', filter=~Q(**{field: F(f'expected_{field}')})) for field in expected
+    })
+    if fix and any(drift.values()):
+        drifted = annotated.filter(
+            Q(*[~Q(**{field: F(f'expected_{field}')}) for field in expected], _connector=Q.OR)
+        ).values('pk')
+        model.objects.filter(pk__in=Subquery(drifted)).update(**expected)
+    return drift
+
+
+def reconcile_counters(fix=True):
+    """Recompute like, follower, reel, view and like totals. Returns {'Model.field': rows that had drifted}."""
+    report = {}
+    reel_drift = _reconcile(Reel, {
+        'like_count': _count(ReelLike.objects.all(), 'reel', Count('pk')),
+    }, fix)
+    report.update({f'Reel.{field}': rows for field, rows in reel_drift.items()})
+
+    artist_drift = _reconcile(ArtistProfile, {
+        'follower_count': _count(Follow.objects.all(), 'artist', Count('pk')),
+        'reel_count': _count(Reel.objects.filter(status='published'), 'artist', Count('pk')),
+        'total_views': _count(Reel.objects.all(), 'artist', Sum('view_count')),
+        'total_likes': _count(Reel.objects.all(), 'artist', Sum('like_count')),
+    }, fix)
+    report.update({f'ArtistProfile.{field}': rows for field, rows in artist_drift.items()})
+
+    drifted = {field: rows for field, rows in report.items() if rows}
+    if drifted:
+        logger.warning('Artist counter drift%s: %s', '' if fix else ' (not fixed)', drifted)
+    return report
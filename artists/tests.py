@@ -1,3 +1,319 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from core.counters import view_counter
+from .models import ArtistProfile, Reel, ReelUpload, ReelView, ReelViewRollup, Follow
+from .ingest import ReelViewQueue, prune_raw_views, rebuild_rollups, reel_view_queue
+from .social import reconcile_counters, toggle_follow
+from .trending import trending_artists
+from .uploads import attach_upload
+
+User = get_user_model()
+
+
+def make_artist(name):
+    user = User.objects.create_user(username=name, email=f'{name}@example.com', password='pass')
+    return ArtistProfile.objects.create(user=user, stage_name=name.title(), bio='bio', genre='Afrobeats')
+
+
+class TrendingArtistsTests(TestCase):
+    def setUp(self):
+        self.quiet = make_artist('quiet')
+        self.viewed = make_artist('viewed')
+        self.followed = make_artist('followed')
+        reel = Reel.objects.create(artist=self.viewed, title='Hit', status='published')
+        queue = ReelViewQueue(batch_size=100, flush_interval=3600)
+        for _ in range(5):
+            queue.record(reel, ip_address='127.0.0.1')
+        queue.flush()
+        fan = User.objects.create_user(username='fan', email='fan@example.com', password='pass')
+        Follow.objects.create(artist=self.followed, follower=fan)
+
+    def test_scores_are_ordered_in_the_database(self):
+        ranked = list(trending_artists())
+        self.assertEqual([a.pk for a in ranked], [self.followed.pk, self.viewed.pk, self.quiet.pk])
+        self.assertEqual(ranked[0].trending_score, 10)
+        self.assertEqual(ranked[1].trending_score, 5)
+
+    def test_page_query_count_is_independent_of_catalog_size(self):
+        url = reverse('artists:trending_artists')
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        for i in range(10):
+            make_artist(f'extra{i}')
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+
+class ReelViewIngestionTests(TestCase):
+    def setUp(self):
+        self.artist = make_artist('singer')
+        self.reel = Reel.objects.create(artist=self.artist, title='Song', status='published')
+
+    def test_queued_views_are_bulk_inserted_with_rollups(self):
+        queue = ReelViewQueue(batch_size=100, flush_interval=3600)
+        for _ in range(3):
+            queue.record(self.reel, ip_address='10.0.0.1', user_agent='x' * 1000)
+        self.assertEqual(ReelView.objects.count(), 0)
+
+        self.assertEqual(queue.flush(), 3)
+        self.assertEqual(ReelView.objects.count(), 3)
+        self.assertEqual(len(ReelView.objects.first().user_agent), 256)
+        for period in ('hour', 'day'):
+            rollup = ReelViewRollup.objects.get(reel=self.reel, period=period)
+            self.assertEqual(rollup.view_count, 3)
+            self.assertEqual(rollup.artist, self.artist)
+
+        queue.record(self.reel, ip_address='10.0.0.1')
+        queue.flush()
+        self.assertEqual(ReelViewRollup.objects.get(reel=self.reel, period='day').view_count, 4)
+
+    def test_views_keep_the_time_they_were_recorded(self):
+        queue = ReelViewQueue(batch_size=100, flush_interval=3600)
+        recorded = timezone.now() - timezone.timedelta(hours=2)
+        with mock.patch('artists.ingest.timezone.now', return_value=recorded):
+            queue.record(self.reel, ip_address='10.0.0.1')
+        queue.flush()
+        self.assertEqual(ReelView.objects.get().viewed_at, recorded)
+        hour = ReelViewRollup.objects.get(period='hour').bucket
+        self.assertEqual(hour, recorded.replace(minute=0, second=0, microsecond=0))
+
+    def test_timer_flushes_without_more_traffic(self):
+        queue = ReelViewQueue(batch_size=100, flush_interval=0.05)
+        flushed = threading.Event()
+        with mock.patch.object(queue, 'flush', side_effect=lambda: flushed.set()):
+            queue.record(self.reel, ip_address='10.0.0.1')
+            self.assertTrue(flushed.wait(2))
+        # Write the view here, so the timer finds the queue empty and stops
+        timer = queue._timer
+        queue.flush()
+        timer.join(2)
+        self.assertFalse(timer.is_alive())
+        self.assertEqual(ReelView.objects.count(), 1)
+
+    def test_queued_view_is_not_counted_twice(self):
+        viewer = User.objects.create_user(username='fan', email='fan@example.com', password='pass12345')
+        self.client.force_login(viewer)
+        url = reverse('artists:reel_detail', args=[self.reel.slug])
+        # Write the buffered view count before the test's transaction is rolled back
+        self.addCleanup(view_counter.flush)
+        with override_settings(REEL_VIEW_BATCH_SIZE=100, REEL_VIEW_FLUSH_INTERVAL=3600):
+            reel_view_queue.flush()
+            self.client.get(url)
+            self.client.get(url)
+            self.assertTrue(reel_view_queue.is_queued(self.reel, viewer))
+            self.assertEqual(len(reel_view_queue), 1)
+            reel_view_queue.flush()
+        self.assertFalse(reel_view_queue.is_queued(self.reel, viewer))
+        self.assertEqual(ReelView.objects.filter(user=viewer).count(), 1)
+
+    def test_rebuild_matches_incremental_rollups(self):
+        queue = ReelViewQueue(batch_size=100, flush_interval=3600)
+        for _ in range(2):
+            queue.record(self.reel, ip_address='10.0.0.1')
+        queue.flush()
+        before = sorted(ReelViewRollup.objects.values_list('period', 'bucket', 'view_count'))
+        rebuild_rollups()
+        after = sorted(ReelViewRollup.objects.values_list('period', 'bucket', 'view_count'))
+        self.assertEqual(before, after)
+
+    def test_prune_keeps_recent_raw_views(self):
+        old = ReelView.objects.create(reel=self.reel, ip_address='10.0.0.1')
+        ReelView.objects.filter(pk=old.pk).update(viewed_at=timezone.now() - timezone.timedelta(days=100))
+        ReelView.objects.create(reel=self.reel, ip_address='10.0.0.1')
+        self.assertEqual(prune_raw_views(days=90), 1)
+        self.assertEqual(ReelView.objects.count(), 1)
+
+
+class SocialCounterTests(TestCase):
+    def setUp(self):
+        self.artist = make_artist('singer')
+        self.reel = Reel.objects.create(artist=self.artist, title='Hit', status='published')
+        self.fan = User.objects.create_user(username='fan', email='fan@example.com', password='pass')
+        self.client.force_login(self.fan)
+
+    def test_toggles_update_counters(self):
+        follow_url = reverse('artists:follow_artist', args=[self.artist.slug])
+        like_url = reverse('artists:like_reel', args=[self.reel.slug])
+        ajax = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+        self.assertEqual(self.client.post(follow_url, **ajax).json()['follower_count'], 1)
+        self.assertEqual(self.client.post(like_url, **ajax).json()['like_count'], 1)
+        self.artist.refresh_from_db()
+        self.assertEqual((self.artist.follower_count, self.artist.total_likes, self.artist.reel_count), (1, 1, 1))
+
+        self.assertEqual(self.client.post(follow_url, **ajax).json(), {'success': True, 'is_following': False, 'follower_count': 0})
+        self.assertEqual(self.client.post(like_url, **ajax).json()['like_count'], 0)
+
+    def test_artist_page_shows_follow_state(self):
+        url = reverse('artists:artist_detail', args=[self.artist.slug])
+        self.assertFalse(self.client.get(url).context['is_following'])
+        toggle_follow(self.artist, self.fan)
+        response = self.client.get(url)
+        self.assertTrue(response.context['is_following'])
+        self.assertEqual((response.context['total_reels'], list(response.context['reels'])), (1, [self.reel]))
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        Follow.objects.create(artist=self.artist, follower=self.fan)
+        Reel.objects.filter(pk=self.reel.pk).update(view_count=7)
+        ArtistProfile.objects.filter(pk=self.artist.pk).update(reel_count=5)
+
+        report = reconcile_counters(fix=False)
+        self.assertEqual(report['ArtistProfile.follower_count'], 1)
+        self.assertEqual(report['ArtistProfile.reel_count'], 1)
+        self.assertEqual(report['ArtistProfile.total_views'], 1)
+        self.assertEqual(report['ArtistProfile.total_likes'], 0)
+
+        reconcile_counters()
+        self.artist.refresh_from_db()
+        self.assertEqual((self.artist.follower_count, self.artist.reel_count, self.artist.total_views), (1, 1, 7))
+        self.assertFalse(any(reconcile_counters(fix=False).values()))
+
+
+class ReelUploadTests(TestCase):
+    # The first bytes of an MP4, padded out to a 5000-byte "video"
+    VIDEO = b'\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom' + bytes(range(256)) * 20
+
+    def setUp(self):
+        temp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp, ignore_errors=True)
+        overrides = override_settings(
+            MEDIA_ROOT=os.path.join(temp, 'media'), REEL_UPLOAD_DIR=os.path.join(temp, 'partial'),
+            REEL_UPLOAD_CHUNK_SIZE=2048,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.artist = make_artist('singer')
+        self.artist.user.role = 'artist'
+        self.artist.user.save()
+        self.client.force_login(self.artist.user)
+
+    def start(self, content):
+        response = self.client.post(reverse('artists:start_reel_upload'), {'filename': 'clip.mp4', 'size': len(content)})
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def send(self, state, chunk, offset, **headers):
+        return self.client.patch(state['url'], chunk, content_type='application/octet-stream',
+                                 headers={'Upload-Offset': str(offset), **headers})
+
+    def test_chunks_resume_and_attach_to_a_reel(self):
+        video = self.VIDEO[:5000]
+        state = self.start(video)
+        self.assertEqual(self.send(state, video[:2048], 0).json()['offset'], 2048)
+
+        # A resent chunk and a corrupted chunk leave the offset where it was
+        resent = self.send(state, video[:2048], 0)
+        self.assertEqual((resent.status_code, resent.json()['offset']), (409, 2048))
+        corrupted = self.send(state, video[2048:4096], 2048, **{'X-Chunk-SHA256': '0' * 64})
+        self.assertEqual(corrupted.status_code, 400)
+        self.assertEqual(self.client.get(state['url']).json()['offset'], 2048)
+
+        self.send(state, video[2048:4096], 2048, **{'X-Chunk-SHA256': hashlib.sha256(video[2048:4096]).hexdigest()})
+        self.assertEqual(self.send(state, video[4096:], 4096).json()['offset'], 5000)
+        completed = self.client.post(state['complete_url'], {'sha256': hashlib.sha256(video).hexdigest()}).json()
+        self.assertEqual((completed['status'], completed['checksum']), ('complete', hashlib.sha256(video).hexdigest()))
+
+        response = self.client.post(reverse('artists:upload_reel'), {
+            'title': 'Chunked', 'content_type': 'video', 'upload': state['upload_id'],
+        })
+        self.assertRedirects(response, reverse('artists:manage_reels'), fetch_redirect_response=False)
+        reel = Reel.objects.get(title='Chunked')
+        with reel.video_file.open('rb') as f:
+            self.assertEqual(f.read(), video)
+        self.assertFalse(ReelUpload.objects.exists())
+        self.assertEqual(os.listdir(settings.REEL_UPLOAD_DIR), [])  # moved, not copied
+
+    def upload(self, content):
+        state = self.start(content)
+        for offset in range(0, len(content), 2048):
+            self.send(state, content[offset:offset + 2048], offset)
+        self.client.post(state['complete_url'])
+        return state
+
+    def test_edit_attaches_upload(self):
+        reel = Reel.objects.create(artist=self.artist, title='Old cut', content_type='video', status='published')
+        state = self.upload(self.VIDEO)
+        response = self.client.post(reverse('artists:edit_reel', args=[reel.pk]), {
+            'title': 'New cut', 'content_type': 'video', 'upload': state['upload_id'],
+        })
+        self.assertRedirects(response, reverse('artists:manage_reels'), fetch_redirect_response=False)
+        reel.refresh_from_db()
+        with reel.video_file.open('rb') as f:
+            self.assertEqual(f.read(), self.VIDEO)
+        self.assertFalse(ReelUpload.objects.exists())
+
+    def test_failed_save_keeps_the_upload(self):
+        state = self.upload(self.VIDEO)
+        upload = ReelUpload.objects.get()
+        reel = Reel(artist=self.artist, title='Doomed', content_type='video')
+        with mock.patch.object(Reel, 'save', side_effect=RuntimeError('database went away')):
+            with self.assertRaises(RuntimeError):
+                attach_upload(reel, upload)
+        self.assertTrue(ReelUpload.objects.filter(pk=state['upload_id'], status='complete').exists())
+        self.assertEqual(os.listdir(settings.REEL_UPLOAD_DIR), [f'{upload.pk.hex}.part'])
+
+        attach_upload(reel, upload)
+        self.assertFalse(ReelUpload.objects.exists())
+        self.assertEqual(Reel.objects.get(title='Doomed').video_file.size, len(self.VIDEO))
+
+    def test_rejects_files_that_are_not_video(self):
+        content = b'%PDF-1.4\n' + b'x' * 3000
+        state = self.start(content)
+        response = self.send(state, content[:2048], 0)
+        self.assertEqual(response.status_code, 415)
+        self.assertFalse(ReelUpload.objects.exists())
+
+
+class ReelVideoTests(TestCase):
+    VIDEO = bytes(range(256)) * 40
+
+    def setUp(self):
+        cache.clear()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        overrides = override_settings(MEDIA_ROOT=media)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        reel = Reel.objects.create(artist=make_artist('singer'), title='Clip', status='published')
+        reel.video_file.save('clip.mp4', ContentFile(self.VIDEO))
+        self.url = reverse('artists:reel_video', args=[reel.slug])
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_serves_byte_ranges(self):
+        full = self.client.get(self.url)
+        self.assertEqual((full.status_code, full['Accept-Ranges'], full['Content-Type']), (200, 'bytes', 'video/mp4'))
+        self.assertEqual(self.body(full), self.VIDEO)
+
+        with self.assertNumQueries(0):  # the slug lookup is cached
+            partial = self.client.get(self.url, headers={'Range': 'bytes=100-199'})
+        self.assertEqual((partial.status_code, partial['Content-Range'], partial['Content-Length']), (206, 'bytes 100-199/10240', '100'))
+        self.assertEqual(self.body(partial), self.VIDEO[100:200])
+
+        tail = self.client.get(self.url, headers={'Range': 'bytes=-10'})
+        self.assertEqual((tail['Content-Range'], self.body(tail)), ('bytes 10230-10239/10240', self.VIDEO[-10:]))
+
+        beyond = self.client.get(self.url, headers={'Range': 'bytes=20000-'})
+        self.assertEqual((beyond.status_code, beyond['Content-Range']), (416, 'bytes */10240'))
+
+    def test_conditional_requests(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+        # A Range whose If-Range no longer matches gets the whole (changed) file
+        stale = self.client.get(self.url, headers={'Range': 'bytes=0-9', 'If-Range': '"old"'})
+        self.assertEqual(stale.status_code, 200)
+        fresh = self.client.get(self.url, headers={'Range': 'bytes=0-9', 'If-Range': etag})
+        self.assertEqual(fresh.status_code, 206)
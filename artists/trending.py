@@ -0,0 +1,49 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ArtistProfile, ReelViewRollup, Follow
+from .ingest import bucket_start
+
+# Scoring weights: a new follower is worth ten reel views
+VIEW_WEIGHT = 1
+FOLLOW_WEIGHT = 10
+
+TRENDING_WINDOW_DAYS = 7
+TRENDING_LIMIT = 50
+
+
+def _total_since(queryset, artist_lookup, aggregate):
+    """Correlated aggregate subquery over `queryset` rows belonging to the outer artist."""
+    totals = (
+        queryset.filter(**{artist_lookup: OuterRef('pk')})
+        .order_by()
+        .values(artist_lookup)
+        .annotate(total=aggregate)
+        .values('total')
+    )
+    return Coalesce(Subquery(totals, output_field=IntegerField()), Value(0))
+
+
+def trending_artists(window_days=TRENDING_WINDOW_DAYS, limit=TRENDING_LIMIT):
+    """Return artists ordered by trending score over the last `window_days`.
+
+    Scores for every artist are computed by the database in a single
+    statement (views come from the hourly rollups), so callers can paginate
+    the result without issuing per-artist queries.
+    """
+    since = timezone.now() - timezone.timedelta(days=window_days)
+
+    artists = ArtistProfile.objects.annotate(
+        recent_views=_total_since(
+            ReelViewRollup.objects.filter(period='hour', bucket__gte=bucket_start(since, 'hour')),
+            'artist', Sum('view_count'),
+        ),
+        recent_follows=_total_since(Follow.objects.filter(created_at__gte=since), 'artist', Count('pk')),
+    ).annotate(
+        trending_score=F('recent_views') * VIEW_WEIGHT + F('recent_follows') * FOLLOW_WEIGHT,
+    ).order_by('-trending_score', 'id')
+
+    if limit:
+        artists = artists[:limit]
+    return artists
@@ -0,0 +1,212 @@
+"""
+Resumable, chunked reel video uploads.
+
+    POST   /artists/reels/uploads/                     filename, size -> upload id
+    PATCH  /artists/reels/uploads/<id>/                raw bytes, Upload-Offset header
+    GET    /artists/reels/uploads/<id>/                current offset, to resume
+    POST   /artists/reels/uploads/<id>/complete/       optional sha256
+    then the upload form posts `upload=<id>` instead of a file
+
+Each chunk is read from the request stream in small blocks and written
+straight into a partial file under REEL_UPLOAD_DIR, so a worker never holds
+more than one block of a video in memory however many uploads it serves.
+A chunk must start at the upload's current offset, and the offset only
+advances after the bytes are on disk. A dropped connection loses at most
+one chunk: the client asks for the offset and carries on from there.
+
+The first chunk is sniffed with python-magic and the upload is rejected
+unless it is one of VIDEO_MIME_TYPES. Each chunk's SHA-256 is computed as
+it streams in and checked against an optional X-Chunk-SHA256 header. A hash
+object can't be shared between worker processes, so the whole file's
+SHA-256 is computed in one streaming pass when the upload completes.
+`attach_upload` then moves the file into media storage without copying it
+and saves the reel, in one transaction with consuming the upload.
+"""
+import hashlib
+import os
+from datetime import timedelta
+
+import magic
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ReelUpload
+
+# Read and hash request bodies in blocks of this many bytes
+BLOCK_SIZE = 64 * 1024
+# How much of the first chunk python-magic looks at
+SNIFF_BYTES = 2048
+# The same formats ReelForm accepts: .mp4, .mov, .avi and .mkv
+VIDEO_MIME_TYPES = {'video/mp4', 'video/quicktime', 'video/x-msvideo', 'video/x-matroska'}
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def max_size():
+    return getattr(settings, 'REEL_VIDEO_MAX_SIZE', 50 * 1024 * 1024)
+
+
+def chunk_size():
+    return getattr(settings, 'REEL_UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024)
+
+
+def partial_path(upload):
+    return os.path.join(settings.REEL_UPLOAD_DIR, f'{upload.pk.hex}.part')
+
+
+def start_upload(artist, filename, size):
+    """Open an upload session for a `size`-byte video."""
+    filename = os.path.basename(filename or '').strip()
+    if not filename:
+        raise UploadError('A file name is required')
+    if size <= 0:
+        raise UploadError('The file is empty')
+    if size > max_size():
+        raise UploadError(f'Video file size cannot exceed {max_size() // (1024 * 1024)}MB!', 413)
+
+    upload = ReelUpload.objects.create(artist=artist, filename=filename[:255], size=size)
+    os.makedirs(settings.REEL_UPLOAD_DIR, exist_ok=True)
+    open(partial_path(upload), 'wb').close()
+    return upload
+
+
+def append_chunk(upload, offset, stream, length, sha256=None):
+    """Write `length` bytes read from `stream` at `offset`. Returns the new offset."""
+    if upload.status != 'uploading':
+        raise UploadError('This upload is already complete', 409)
+    if offset != upload.received:
+        raise UploadError(f'Expected a chunk at offset {upload.received}', 409)
+    if length <= 0:
+        raise UploadError('The chunk is empty')
+    if length > chunk_size() or offset + length > upload.size:
+        raise UploadError('The chunk is too large', 413)
+    if offset == 0 and length < min(SNIFF_BYTES, upload.size):
+        raise UploadError(f'The first chunk must be at least {SNIFF_BYTES} bytes')
+
+    digest = hashlib.sha256()
+    head = b''
+    written = 0
+    with open(partial_path(upload), 'r+b') as f:
+        f.seek(offset)
+        while written < length:
+            block = stream.read(min(BLOCK_SIZE, length - written))
+            if not block:
+                break
+            if offset == 0 and len(head) < SNIFF_BYTES:
+                head += block[:SNIFF_BYTES - len(head)]
+            f.write(block)
+            digest.update(block)
+            written += len(block)
+
+    if written != length:
+        raise UploadError('The chunk was cut short; send it again')
+    if sha256 and digest.hexdigest() != sha256.strip().lower():
+        raise UploadError('The chunk checksum does not match; send it again')
+
+    updates = {'received': offset + length, 'updated_at': timezone.now()}
+    if offset == 0:
+        mime_type = magic.from_buffer(head, mime=True)
+        if mime_type not in VIDEO_MIME_TYPES:
+            abort_upload(upload)
+            raise UploadError('Invalid video file format!', 415)
+        updates['mime_type'] = mime_type
+
+    # Claim the offset, so a retried or concurrent copy of this chunk can't advance it twice
+    claimed = ReelUpload.objects.filter(pk=upload.pk, status='uploading', received=offset).update(**updates)
+    if not claimed:
+        raise UploadError('This chunk was already received', 409)
+    for field, value in updates.items():
+        setattr(upload, field, value)
+    return upload.received
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def complete_upload(upload, sha256=None):
+    """Check that every byte arrived (and matches `sha256`, if given) and mark the upload complete."""
+    if upload.status == 'complete':
+        return upload
+    if upload.received != upload.size:
+        raise UploadError(f'{upload.size - upload.received} bytes are still missing', 409)
+
+    checksum = file_sha256(partial_path(upload))
+    if sha256 and checksum != sha256.strip().lower():
+        abort_upload(upload)
+        raise UploadError('The file checksum does not match; upload it again', 422)
+
+    ReelUpload.objects.filter(pk=upload.pk, status='uploading').update(
+        status='complete', checksum=checksum, updated_at=timezone.now()
+    )
+    upload.status, upload.checksum = 'complete', checksum
+    return upload
+
+
+def abort_upload(upload):
+    """Delete an upload session and its partial file."""
+    ReelUpload.objects.filter(pk=upload.pk).delete()
+    try:
+        os.remove(partial_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+class _PartialFile(File):
+    # FileSystemStorage moves files that have a temporary path instead of copying them
+    def temporary_file_path(self):
+        return self.name
+
+
+def attach_upload(reel, upload):
+    """Move a complete upload into `reel.video_file` and save the reel. Each upload can be attached once.
+
+    The upload row is only deleted once the reel is saved; if the save
+    fails it is rolled back and the file is moved back, so the upload can
+    be attached again.
+    """
+    with transaction.atomic():
+        # Lock the row so a concurrent attach of the same upload waits, then finds it gone
+        if not ReelUpload.objects.select_for_update().filter(pk=upload.pk, status='complete').exists():
+            raise UploadError('This upload was already used or has expired', 409)
+        with _PartialFile(open(partial_path(upload), 'rb')) as video:
+            video.size = upload.size
+            reel.video_file.save(upload.filename, video, save=False)
+        try:
+            reel.save()
+            ReelUpload.objects.filter(pk=upload.pk).delete()
+        except Exception:
+            _restore_partial(reel.video_file.name, upload)
+            raise
+    # Gone if it was moved; a storage that copied it leaves the original behind
+    if os.path.exists(partial_path(upload)):
+        os.remove(partial_path(upload))
+
+
+def _restore_partial(name, upload):
+    try:
+        os.replace(default_storage.path(name), partial_path(upload))
+    except NotImplementedError:
+        default_storage.delete(name)
+
+
+def prune_uploads(hours=None):
+    """Delete uploads that haven't been touched for `hours`. Returns how many."""
+    hours = hours if hours is not None else getattr(settings, 'REEL_UPLOAD_EXPIRY_HOURS', 24)
+    stale = ReelUpload.objects.filter(updated_at__lt=timezone.now() - timedelta(hours=hours))
+    pruned = 0
+    for upload in stale.iterator():
+        abort_upload(upload)
+        pruned += 1
+    return pruned
@@ -16,6 +16,9 @@ urlpatterns = [
      path('profile/', views.edit_artist_profile, name='edit_artist_profile'),
 
     path('reels/', views.manage_reels, name='manage_reels'),
+    path('reels/uploads/', views.start_reel_upload, name='start_reel_upload'),
+    path('reels/uploads/<uuid:upload_id>/', views.reel_upload, name='reel_upload'),
+    path('reels/uploads/<uuid:upload_id>/complete/', views.complete_reel_upload, name='complete_reel_upload'),
     path('edit-reel/<int:pk>/', views.edit_reel, name='edit_reel'),
     path('delete-reel/<int:pk>/', views.delete_reel, name='delete_reel'),
 
@@ -24,6 +27,7 @@ urlpatterns = [
 
     # Reel detail and actions
      path('reel/<slug:slug>/', views.reel_detail, name='reel_detail'),
+     path('reel/<slug:slug>/video/', views.reel_video, name='reel_video'),
      path('reel/slug:slug>/feeds', views.reels_feed, name='reels_feed'),
      path('reel/<slug:slug>/like/', views.like_reel, name='like_reel'),
      path('reel/<slug:slug>/share/', views.share_reel, name='share_reel'),
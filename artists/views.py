@@ -1,18 +1,30 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.template.response import TemplateResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Count, Sum, F
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.db.models import Q, Sum, F
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_POST, require_http_methods, require_safe
 from django.core.paginator import Paginator
 from django.urls import reverse
 from django.utils import timezone
 import json
 
-from .models import ArtistProfile, Reel, ReelView, ReelLike, Follow
+from .models import ArtistProfile, Reel, ReelUpload, ReelView, ReelLike, Follow
 from .forms import ArtistProfileForm, ReelForm
+from .trending import trending_artists as get_trending_artists
+from .ingest import reel_view_queue
+from .media import serve_video, video_name
+from .social import toggle_follow, toggle_like
+from .uploads import UploadError, append_chunk, abort_upload, attach_upload, chunk_size, complete_upload, start_upload
+from core.aio import gather_queries
+from core.cache import cache_listing
+from core.counters import view_counter
+from core.notifications import notify_followers
+from core.pagination import paginate_listing
 from events.models import Event
 
+@cache_listing('artists', 'reels')
 def artist_list(request):
     """List all artists with filtering and search"""
     artists = ArtistProfile.objects.all().order_by('-follower_count')
@@ -31,23 +43,20 @@ def artist_list(request):
     if genre:
         artists = artists.filter(genre__icontains=genre)
     
-    # Sort options
+    # Sort options; id breaks ties so cursor positions are unique
     sort = request.GET.get('sort', 'followers')
-    if sort == 'followers':
-        artists = artists.order_by('-follower_count')
-    elif sort == 'reels':
-        artists = artists.annotate(reel_count=Count('reels')).order_by('-reel_count')
+    ordering = ('-follower_count', '-id')
+    if sort == 'reels':
+        ordering = ('-reel_count', '-id')
     elif sort == 'views':
-        artists = artists.order_by('-total_views')
+        ordering = ('-total_views', '-id')
     elif sort == 'newest':
-        artists = artists.order_by('-created_at')
+        ordering = ('-created_at', '-id')
     elif sort == 'verified':
-        artists = artists.filter(is_verified=True).order_by('-follower_count')
+        artists = artists.filter(is_verified=True)
     
     # Pagination
-    paginator = Paginator(artists, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate_listing(request, artists, 12, ordering)
     
     # Get unique genres for filter
     genres = ArtistProfile.objects.values_list('genre', flat=True).distinct()
@@ -60,15 +69,12 @@ def artist_list(request):
         'selected_sort': sort,
         'genres': genres,
     }
-    return render(request, 'artists/artist_list.html', context)
+    return TemplateResponse(request, 'artists/artist_list.html', context)
 
 def artist_list_by_genre(request, genre):
     """List artists by genre"""
-    artists = ArtistProfile.objects.filter(genre__icontains=genre).order_by('-follower_count')
-    
-    paginator = Paginator(artists, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    artists = ArtistProfile.objects.filter(genre__icontains=genre)
+    page_obj = paginate_listing(request, artists, 12, ('-follower_count', '-id'))
     
     context = {
         'page_obj': page_obj,
@@ -76,56 +82,25 @@ def artist_list_by_genre(request, genre):
     }
     return render(request, 'artists/artist_list_by_genre.html', context)
 
+@cache_listing('artists')
 def featured_artists(request):
     """List featured artists"""
-    artists = ArtistProfile.objects.filter(is_featured=True).order_by('-follower_count')
-    
-    paginator = Paginator(artists, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    artists = ArtistProfile.objects.filter(is_featured=True)
+    page_obj = paginate_listing(request, artists, 12, ('-follower_count', '-id'))
     
     context = {
         'page_obj': page_obj,
         'title': 'Featured Artists',
     }
-    return render(request, 'artists/artist_list.html', context)
+    return TemplateResponse(request, 'artists/artist_list.html', context)
 
+@cache_listing('artists', 'reels')
 def trending_artists(request):
     """List trending artists (by recent activity)"""
-    # Trending based on recent views and follows
-    one_week_ago = timezone.now() - timezone.timedelta(days=7)
-    
-    trending_ids = []
-    for artist in ArtistProfile.objects.all():
-        recent_views = ReelView.objects.filter(
-            reel__artist=artist,
-            viewed_at__gte=one_week_ago
-        ).count()
-        
-        recent_follows = Follow.objects.filter(
-            artist=artist,
-            created_at__gte=one_week_ago
-        ).count()
-        
-        # Simple trending score
-        score = recent_views * 1 + recent_follows * 10
-        trending_ids.append((artist.id, score))
+    # Trending based on recent views and follows, scored and ordered in the database
+    artists = get_trending_artists()
     
-    # Sort by score and get top artists
-    trending_ids.sort(key=lambda x: x[1], reverse=True)
-    trending_ids = [tid for tid, score in trending_ids[:50]]
-    
-    artists = ArtistProfile.objects.filter(id__in=trending_ids)
-    
-    # Maintain order
-    ordered_artists = []
-    for tid in trending_ids:
-        for artist in artists:
-            if artist.id == tid:
-                ordered_artists.append(artist)
-                break
-    
-    paginator = Paginator(ordered_artists, 12)
+    paginator = Paginator(artists, 12)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
@@ -133,26 +108,27 @@ def trending_artists(request):
         'page_obj': page_obj,
         'title': 'Trending Artists',
     }
-    return render(request, 'artists/artist_list.html', context)
+    return TemplateResponse(request, 'artists/artist_list.html', context)
 
-def artist_detail(request, slug):
-    """Artist profile page"""
-    artist = get_object_or_404(ArtistProfile, slug=slug)
+async def artist_detail(request, slug):
+    """Artist profile page (its independent queries run concurrently)"""
+    artist = await aget_object_or_404(ArtistProfile, slug=slug)
+    user = await request.auser()
     
     # Check if user follows this artist
-    is_following = False
-    if request.user.is_authenticated:
+    is_following = lambda: False
+    if user.is_authenticated:
         is_following = Follow.objects.filter(
             artist=artist,
-            follower=request.user
-        ).exists()
+            follower=user
+        ).exists
     
     # Get artist's reels
     reels = artist.reels.filter(status='published').order_by('-created_at')
     
     # Get artist's upcoming events
     events = Event.objects.filter(
-        host=artist.user,
+        host_id=artist.user_id,
         status='published',
         start_date__gt=timezone.now()
     ).order_by('start_date')
@@ -162,15 +138,16 @@ def artist_detail(request, slug):
         genre__icontains=artist.genre
     ).exclude(id=artist.id).order_by('-follower_count')[:6]
     
-    context = {
-        'artist': artist,
-        'is_following': is_following,
-        'reels': reels[:6],  # Show first 6 reels
-        'events': events[:3],  # Show first 3 events
-        'similar_artists': similar_artists,
-        'total_reels': reels.count(),
-    }
-    return render(request, 'artists/artist_detail.html', context)
+    context = await gather_queries(
+        is_following=is_following,
+        reels=reels[:6],  # Show first 6 reels
+        events=events[:3],  # Show first 3 events
+        similar_artists=similar_artists,
+        total_reels=reels.count,
+    )
+    context['artist'] = artist
+    # Rendered after the view returns, on a thread where templates may query lazily
+    return TemplateResponse(request, 'artists/artist_detail.html', context)
 
 @login_required
 @require_POST
@@ -178,28 +155,13 @@ def follow_artist(request, slug):
     """Follow/unfollow an artist"""
     artist = get_object_or_404(ArtistProfile, slug=slug)
     
-    follow, created = Follow.objects.get_or_create(
-        artist=artist,
-        follower=request.user
-    )
-    
-    if not created:
-        # Unfollow
-        follow.delete()
-        is_following = False
-        artist.follower_count = max(0, artist.follower_count - 1)
-    else:
-        # Follow
-        is_following = True
-        artist.follower_count += 1
-    
-    artist.save(update_fields=['follower_count'])
+    is_following, follower_count = toggle_follow(artist, request.user)
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({
             'success': True,
             'is_following': is_following,
-            'follower_count': artist.follower_count,
+            'follower_count': follower_count,
         })
     
     messages.success(request, 'Following artist!' if is_following else 'Unfollowed artist!')
@@ -208,7 +170,7 @@ def follow_artist(request, slug):
 def artist_followers(request, slug):
     """List artist's followers"""
     artist = get_object_or_404(ArtistProfile, slug=slug)
-    followers = Follow.objects.filter(artist=artist).order_by('-created_at')
+    followers = Follow.objects.filter(artist=artist).select_related('follower').order_by('-created_at')
     
     paginator = Paginator(followers, 20)
     page_number = request.GET.get('page')
@@ -223,11 +185,8 @@ def artist_followers(request, slug):
 def artist_reels(request, slug):
     """List artist's reels"""
     artist = get_object_or_404(ArtistProfile, slug=slug)
-    reels = artist.reels.filter(status='published').order_by('-created_at')
-    
-    paginator = Paginator(reels, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    reels = artist.reels.filter(status='published')
+    page_obj = paginate_listing(request, reels, 12, ('-created_at', '-id'))
     
     context = {
         'artist': artist,
@@ -237,42 +196,46 @@ def artist_reels(request, slug):
 
 def reel_detail(request, slug):
     """Reel detail page"""
-    reel = get_object_or_404(Reel, slug=slug, status='published')
+    reel = get_object_or_404(Reel.objects.select_related('artist__user'), slug=slug, status='published')
     
-    # Track view
+    # Track view (one per user; raw rows are written in batches, so check this process's queue too)
+    view_created = False
     if request.user.is_authenticated:
-        ReelView.objects.get_or_create(
-            reel=reel,
-            user=request.user,
-            defaults={
-                'ip_address': request.META.get('REMOTE_ADDR'),
-                'user_agent': request.META.get('HTTP_USER_AGENT', '')
-            }
+        already_viewed = (
+            reel_view_queue.is_queued(reel, request.user)
+            or ReelView.objects.filter(reel=reel, user=request.user).exists()
         )
+        if not already_viewed:
+            reel_view_queue.record(
+                reel,
+                user=request.user,
+                ip_address=request.META.get('REMOTE_ADDR'),
+                user_agent=request.META.get('HTTP_USER_AGENT', '')
+            )
+            view_created = True
     else:
         # Track anonymous views (less frequently)
-        import uuid
-        session_key = request.session.session_key or str(uuid.uuid4())
         if not hasattr(request, '_reel_views_tracked'):
             request._reel_views_tracked = set()
         
         if reel.id not in request._reel_views_tracked:
-            ReelView.objects.get_or_create(
-                reel=reel,
-                user=None,
-                defaults={
-                    'ip_address': request.META.get('REMOTE_ADDR'),
-                    'user_agent': request.META.get('HTTP_USER_AGENT', '')
-                }
+            already_viewed = (
+                reel_view_queue.is_queued(reel)
+                or ReelView.objects.filter(reel=reel, user=None).exists()
             )
+            if not already_viewed:
+                reel_view_queue.record(
+                    reel,
+                    ip_address=request.META.get('REMOTE_ADDR'),
+                    user_agent=request.META.get('HTTP_USER_AGENT', '')
+                )
+                view_created = True
             request._reel_views_tracked.add(reel.id)
     
-    # Update view count (update less frequently)
-    if request.user.is_authenticated:
-        new_count = ReelView.objects.filter(reel=reel).count()
-        if new_count > reel.view_count:
-            reel.view_count = new_count
-            reel.save(update_fields=['view_count'])
+    # Update view count through the write-behind buffer
+    if view_created:
+        view_counter.incr(reel)
+    reel.view_count = view_counter.current(reel)
     
     # Check if user liked this reel
     is_liked = False
@@ -295,34 +258,27 @@ def reel_detail(request, slug):
     }
     return render(request, 'artists/reel_detail.html', context)
 
+@require_safe
+def reel_video(request, slug):
+    """Published reel's video, with byte-range and conditional GET support (see artists/media.py)"""
+    name = video_name(slug)
+    if not name:
+        raise Http404('This reel has no video')
+    return serve_video(request, name)
+
 @login_required
 @require_POST
 def like_reel(request, slug):
     """Like/unlike a reel"""
     reel = get_object_or_404(Reel, slug=slug, status='published')
     
-    like, created = ReelLike.objects.get_or_create(
-        reel=reel,
-        user=request.user
-    )
-    
-    if not created:
-        # Unlike
-        like.delete()
-        is_liked = False
-        reel.like_count = max(0, reel.like_count - 1)
-    else:
-        # Like
-        is_liked = True
-        reel.like_count += 1
-    
-    reel.save(update_fields=['like_count'])
+    is_liked, like_count = toggle_like(reel, request.user)
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({
             'success': True,
             'is_liked': is_liked,
-            'like_count': reel.like_count,
+            'like_count': like_count,
         })
     
     messages.success(request, 'Liked reel!' if is_liked else 'Unliked reel!')
@@ -426,14 +382,23 @@ def upload_reel(request):
         return redirect('core:home')
     
     if request.method == 'POST':
-        form = ReelForm(request.POST, request.FILES)
+        form = ReelForm(request.POST, request.FILES, artist=request.user.artist_profile)
         if form.is_valid():
             reel = form.save(commit=False)
             reel.artist = request.user.artist_profile
-            reel.save()
-            
-            messages.success(request, 'Reel uploaded successfully!')
-            return redirect('artists:manage_reels')
+            try:
+                if form.cleaned_data['upload'] and not reel.video_file:
+                    attach_upload(reel, form.cleaned_data['upload'])
+                else:
+                    reel.save()
+            except UploadError as exc:
+                form.add_error('upload', str(exc))
+            else:
+                if reel.status == 'published':
+                    notify_followers.delay(reel)
+                
+                messages.success(request, 'Reel uploaded successfully!')
+                return redirect('artists:manage_reels')
     else:
         form = ReelForm()
     
@@ -443,6 +408,72 @@ def upload_reel(request):
     }
     return render(request, 'artists/upload_reel.html', context)
 
+def _upload_state(upload):
+    return {
+        'success': True,
+        'upload_id': str(upload.pk),
+        'offset': upload.received,
+        'size': upload.size,
+        'status': upload.status,
+        'chunk_size': chunk_size(),
+        'url': reverse('artists:reel_upload', args=[upload.pk]),
+        'complete_url': reverse('artists:complete_reel_upload', args=[upload.pk]),
+    }
+
+def _upload_error(exc):
+    return JsonResponse({'success': False, 'message': str(exc)}, status=exc.status)
+
+@login_required
+@require_POST
+def start_reel_upload(request):
+    """Open a resumable video upload (see artists/uploads.py)"""
+    if not request.user.can_upload_reels():
+        return JsonResponse({'success': False, 'message': 'You do not have permission to upload reels!'}, status=403)
+    try:
+        size = int(request.POST.get('size', ''))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid file size'}, status=400)
+    try:
+        upload = start_upload(request.user.artist_profile, request.POST.get('filename'), size)
+    except UploadError as exc:
+        return _upload_error(exc)
+    return JsonResponse(_upload_state(upload), status=201)
+
+@login_required
+@require_http_methods(['GET', 'PATCH', 'DELETE'])
+def reel_upload(request, upload_id):
+    """Report (GET), append a chunk to (PATCH) or abandon (DELETE) a video upload"""
+    upload = get_object_or_404(ReelUpload, pk=upload_id, artist__user=request.user)
+    if request.method == 'DELETE':
+        abort_upload(upload)
+        return JsonResponse({'success': True})
+    if request.method == 'PATCH':
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'Upload-Offset header is required'}, status=400)
+        try:
+            # Read from the request stream, never request.body, so the chunk isn't buffered in memory
+            append_chunk(upload, offset, request, length, request.headers.get('X-Chunk-SHA256'))
+        except UploadError as exc:
+            if exc.status == 409:
+                upload.refresh_from_db()
+                return JsonResponse({**_upload_state(upload), 'success': False, 'message': str(exc)}, status=409)
+            return _upload_error(exc)
+    return JsonResponse(_upload_state(upload))
+
+@login_required
+@require_POST
+def complete_reel_upload(request, upload_id):
+    """Verify a fully received upload so the reel form can use it"""
+    upload = get_object_or_404(ReelUpload, pk=upload_id, artist__user=request.user)
+    try:
+        complete_upload(upload, request.POST.get('sha256'))
+    except UploadError as exc:
+        return _upload_error(exc)
+    return JsonResponse({**_upload_state(upload), 'checksum': upload.checksum})
+
 @login_required
 def manage_reels(request):
     """Manage artist's reels"""
@@ -467,11 +498,22 @@ def edit_reel(request, pk):
     reel = get_object_or_404(Reel, pk=pk, artist=request.user.artist_profile)
     
     if request.method == 'POST':
-        form = ReelForm(request.POST, request.FILES, instance=reel)
+        was_published = reel.status == 'published'
+        form = ReelForm(request.POST, request.FILES, instance=reel, artist=reel.artist)
         if form.is_valid():
-            form.save()
-            messages.success(request, 'Reel updated successfully!')
-            return redirect('artists:manage_reels')
+            reel = form.save(commit=False)
+            try:
+                if form.cleaned_data['upload'] and 'video_file' not in request.FILES:
+                    attach_upload(reel, form.cleaned_data['upload'])
+                else:
+                    reel.save()
+            except UploadError as exc:
+                form.add_error('upload', str(exc))
+            else:
+                if reel.status == 'published' and not was_published:
+                    notify_followers.delay(reel)
+                messages.success(request, 'Reel updated successfully!')
+                return redirect('artists:manage_reels')
     else:
         form = ReelForm(instance=reel)
     
@@ -508,25 +550,12 @@ def ajax_follow_artist(request, artist_id):
     """AJAX endpoint for following artists"""
     artist = get_object_or_404(ArtistProfile, id=artist_id)
     
-    follow, created = Follow.objects.get_or_create(
-        artist=artist,
-        follower=request.user
-    )
-    
-    if not created:
-        follow.delete()
-        is_following = False
-        artist.follower_count = max(0, artist.follower_count - 1)
-    else:
-        is_following = True
-        artist.follower_count += 1
-    
-    artist.save(update_fields=['follower_count'])
+    is_following, follower_count = toggle_follow(artist, request.user)
     
     return JsonResponse({
         'success': True,
         'is_following': is_following,
-        'follower_count': artist.follower_count,
+        'follower_count': follower_count,
     })
 
 @login_required
@@ -535,47 +564,31 @@ def ajax_like_reel(request, reel_id):
     """AJAX endpoint for liking reels"""
     reel = get_object_or_404(Reel, id=reel_id, status='published')
     
-    like, created = ReelLike.objects.get_or_create(
-        reel=reel,
-        user=request.user
-    )
-    
-    if not created:
-        like.delete()
-        is_liked = False
-        reel.like_count = max(0, reel.like_count - 1)
-    else:
-        is_liked = True
-        reel.like_count += 1
-    
-    reel.save(update_fields=['like_count'])
+    is_liked, like_count = toggle_like(reel, request.user)
     
     return JsonResponse({
         'success': True,
         'is_liked': is_liked,
-        'like_count': reel.like_count,
+        'like_count': like_count,
     })
 
 def ajax_view_reel(request, reel_id):
     """AJAX endpoint for tracking reel views"""
     reel = get_object_or_404(Reel, id=reel_id, status='published')
     
-    # Track view
-    ReelView.objects.create(
-        reel=reel,
-        user=request.user if request.user.is_authenticated else None,
+    # Track view (queued and written in batches)
+    reel_view_queue.record(
+        reel,
+        user=request.user,
         ip_address=request.META.get('REMOTE_ADDR'),
         user_agent=request.META.get('HTTP_USER_AGENT', '')
     )
-    # Increment the aggregate view count (best-effort)
-    reel.view_count = F('view_count') + 1
-    reel.save(update_fields=['view_count'])
-    # Refresh from DB to get the actual integer value
-    reel.refresh_from_db()
+    # Buffer the aggregate view count; it is written back in batches
+    view_counter.incr(reel)
 
     return JsonResponse({
         'success': True,
-        'view_count': reel.view_count,
+        'view_count': view_counter.current(reel),
     })
     
     
@@ -0,0 +1,202 @@
+"""
+p50/p99 latency of the async pages under concurrent load, served the WSGI
+way and the ASGI way.
+
+Creates a throwaway test database and seeds it. Starts a stub Paystack
+that answers after --paystack-latency ms. Then sends --requests requests,
+--concurrency at a time, to the home page, an artist page and the payment
+redirect, through Django's handlers:
+
+  wsgi  a pool of --wsgi-threads threads, one request each at a time, like
+        gunicorn sync/gthread workers (requests queue for a free thread)
+  asgi  one event loop, like a uvicorn worker
+
+    python benchmarks/async_views.py --concurrency 32 --requests 300
+
+Listing caches are disabled so every request runs its queries. On SQLite,
+core.aio.gather_queries runs a page's queries one after another. Point
+DATABASE_URL at Postgres to see them overlap.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'entertainment_project.settings')
+
+import django  # noqa: E402
+from asgiref.sync import ThreadSensitiveContext  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import AsyncClient, Client, override_settings  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from artists.models import ArtistProfile, Follow, Reel  # noqa: E402
+from events.inventory import create_held_booking  # noqa: E402
+from events.models import Event  # noqa: E402
+
+User = get_user_model()
+
+
+class SlowPaystack(BaseHTTPRequestHandler):
+    latency = 0.2
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        time.sleep(self.latency)
+        body = b'{"status": true, "data": {"reference": "ref", "authorization_url": "https://checkout.test/pay"}}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def seed(artists, bookings):
+    now = timezone.now()
+    users = User.objects.bulk_create(
+        [User(username=f'user{i}', email=f'user{i}@example.com', password='!') for i in range(artists + 1)]
+    )
+    fan = users[-1]
+    profiles = ArtistProfile.objects.bulk_create([
+        ArtistProfile(user=user, stage_name=f'Artist {i}', slug=f'artist-{i}', genre='Afrobeats',
+                      is_featured=i < 12, follower_count=i)
+        for i, user in enumerate(users[:-1])
+    ])
+    Reel.objects.bulk_create([
+        Reel(artist=profile, title=f'Reel {profile.pk}-{j}', slug=f'reel-{profile.pk}-{j}',
+             status='published', view_count=j)
+        for profile in profiles for j in range(5)
+    ])
+    Follow.objects.create(artist=profiles[0], follower=fan)
+    event = Event.objects.create(
+        title='Benchmark Live', slug='benchmark-live', description='', short_description='', host=users[0],
+        venue_name='Hall', venue_address='', city='Lagos', state='Lagos', is_featured=True,
+        start_date=now + timezone.timedelta(days=7), end_date=now + timezone.timedelta(days=7, hours=4),
+        ticket_price=5000, available_tickets=bookings + 10, status='published',
+    )
+    references = [create_held_booking(event, fan, 1).booking_reference for _ in range(bookings)]
+    return fan, profiles[0], references
+
+
+def percentiles(latencies):
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return statistics.median(ordered) * 1000, p99 * 1000
+
+
+def run_wsgi(urls, user, concurrency, threads):
+    local = threading.local()
+    workers = threading.Semaphore(threads)
+
+    def fetch(url):
+        if not hasattr(local, 'client'):
+            local.client = Client()
+            local.client.force_login(user)
+        start = time.perf_counter()
+        # Requests beyond the worker threads wait for one, as they would for a sync worker
+        with workers:
+            local.client.get(url)
+        return time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(fetch, urls))
+    return latencies, time.perf_counter() - started
+
+
+async def run_asgi(urls, user, concurrency):
+    client = AsyncClient()
+    await client.aforce_login(user)
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def fetch(url):
+        # Like ASGIHandler: each request's sync parts (middleware, templates) get their own thread
+        async with slots, ThreadSensitiveContext():
+            start = time.perf_counter()
+            await client.get(url)
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(fetch(url) for url in urls))
+    return latencies, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help='requests per page and mode')
+    parser.add_argument('--concurrency', type=int, default=32, help='requests in flight at once')
+    parser.add_argument('--wsgi-threads', type=int, default=4, help='request threads in wsgi mode')
+    parser.add_argument('--artists', type=int, default=200, help='artists to seed (5 reels each)')
+    parser.add_argument('--paystack-latency', type=float, default=200, help='stub Paystack delay in ms')
+    args = parser.parse_args()
+
+    SlowPaystack.latency = args.paystack_latency / 1000
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowPaystack)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # A file, not :memory:, so request threads share the seeded data
+    test_db = tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False).name
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = test_db
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    overrides = override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+        PAYSTACK_BASE_URL=f'http://127.0.0.1:{server.server_port}',
+        ALLOWED_HOSTS=['*'],
+    )
+    try:
+        print(f'Seeding {args.artists} artists on {connection.vendor}...')
+        fan, artist, references = seed(args.artists, args.requests * 2)
+        overrides.enable()
+        pages = {
+            'home': [reverse('core:home')] * args.requests,
+            'artist_detail': [reverse('artists:artist_detail', args=[artist.slug])] * args.requests,
+            'process_payment': [
+                reverse('payments:process_payment', args=[reference]) for reference in references
+            ],
+        }
+
+        print(f'{args.requests} requests per page, {args.concurrency} in flight, '
+              f'{args.wsgi_threads} WSGI threads, Paystack {args.paystack_latency:.0f} ms\n')
+        print(f'{"page":<16} {"mode":<5} {"p50 ms":>9} {"p99 ms":>9} {"req/s":>8}')
+        for name, urls in pages.items():
+            halves = {'wsgi': urls[:args.requests], 'asgi': urls[-args.requests:]}
+            for mode, mode_urls in halves.items():
+                if mode == 'wsgi':
+                    latencies, elapsed = run_wsgi(mode_urls, fan, args.concurrency, args.wsgi_threads)
+                else:
+                    latencies, elapsed = asyncio.run(run_asgi(mode_urls, fan, args.concurrency))
+                p50, p99 = percentiles(latencies)
+                print(f'{name:<16} {mode:<5} {p50:>9.1f} {p99:>9.1f} {len(latencies) / elapsed:>8.1f}')
+    finally:
+        if overrides.wrapped is not None:
+            overrides.disable()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        server.shutdown()
+        if os.path.exists(test_db):
+            os.remove(test_db)
+
+
+if __name__ == '__main__':
+    main()
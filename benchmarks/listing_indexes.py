@@ -0,0 +1,179 @@
+"""
+Query plans and timings for the listing queries, with and without the
+listing indexes (events/artists migrations 0003_listing_indexes).
+
+Creates a throwaway test database, seeds it, then runs every listing
+query twice: once with the indexes dropped and once with them in place.
+
+    python benchmarks/listing_indexes.py --events 50000 --repeat 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'entertainment_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from artists.models import ArtistProfile, Reel  # noqa: E402
+from events.models import Booking, Event, EventCategory, EventFavorite  # noqa: E402
+
+User = get_user_model()
+CITIES = ['Lagos', 'Abuja', 'Ibadan', 'Port Harcourt', 'Kano', 'Enugu', 'Benin', 'Jos']
+INDEXED_MODELS = [Event, Booking, EventFavorite, Reel, ArtistProfile]
+
+
+def seed(events, seed_value=1):
+    rng = random.Random(seed_value)
+    now = timezone.now()
+    users = User.objects.bulk_create(
+        [User(username=f'user{i}', email=f'user{i}@example.com', password='!') for i in range(events // 50 + 10)],
+        batch_size=1000,
+    )
+    categories = EventCategory.objects.bulk_create(
+        [EventCategory(name=f'Category {i}', slug=f'category-{i}') for i in range(12)]
+    )
+    Event.objects.bulk_create(
+        [
+            Event(
+                title=f'Event {i}', slug=f'event-{i}', description='', short_description='',
+                host=rng.choice(users), category=rng.choice(categories),
+                venue_name='Venue', venue_address='', city=rng.choice(CITIES), state='',
+                start_date=now + timedelta(hours=rng.randint(-24 * 365, 24 * 365)),
+                end_date=now + timedelta(hours=rng.randint(-24 * 365, 24 * 365) + 4),
+                ticket_price=rng.choice([0, 2000, 5000, 10000]),
+                available_tickets=500,
+                is_featured=rng.random() < 0.02,
+                is_free=rng.random() < 0.1,
+                status=rng.choices(['published', 'draft', 'cancelled', 'completed'], [70, 15, 5, 10])[0],
+                view_count=rng.randint(0, 10000),
+            )
+            for i in range(events)
+        ],
+        batch_size=1000,
+    )
+    event_ids = list(Event.objects.values_list('pk', flat=True))
+    Booking.objects.bulk_create(
+        [
+            Booking(
+                booking_reference=f'BM{i:012d}', event_id=rng.choice(event_ids), user=rng.choice(users),
+                quantity=1, unit_price=5000, total_price=5000,
+                status=rng.choice(['pending', 'confirmed', 'confirmed', 'cancelled']),
+                customer_name='', customer_email='', customer_phone='',
+            )
+            for i in range(events * 2)
+        ],
+        batch_size=1000,
+    )
+    artists = ArtistProfile.objects.bulk_create(
+        [
+            ArtistProfile(user=user, stage_name=f'Artist {i}', slug=f'artist-{i}', genre='Afrobeats',
+                          is_featured=rng.random() < 0.05, follower_count=rng.randint(0, 100000))
+            for i, user in enumerate(users)
+        ],
+        batch_size=1000,
+    )
+    Reel.objects.bulk_create(
+        [
+            Reel(artist=rng.choice(artists), title=f'Reel {i}', slug=f'reel-{i}',
+                 status=rng.choice(['published', 'published', 'draft']), view_count=rng.randint(0, 50000))
+            for i in range(events)
+        ],
+        batch_size=1000,
+    )
+    return users[0], categories[0], artists[0], event_ids[0]
+
+
+def listing_queries(user, category, artist, event_id):
+    now = timezone.now()
+    published = Event.objects.filter(status='published')
+    return {
+        'event_list': published.filter(start_date__gte=now).order_by('start_date')[:12],
+        'featured_events': published.filter(is_featured=True).order_by('-start_date')[:12],
+        'free_events': published.filter(is_free=True, start_date__gte=now).order_by('start_date')[:12],
+        'events_in_city': published.filter(city='Lagos', start_date__gte=now).order_by('start_date')[:12],
+        'events_in_category': published.filter(category=category).order_by('start_date')[:12],
+        'host_events': Event.objects.filter(host=user).order_by('-created_at')[:12],
+        'my_bookings': Booking.objects.filter(user=user).order_by('-booked_at')[:12],
+        'event_confirmed_bookings': Booking.objects.filter(event_id=event_id, status='confirmed'),
+        'my_favorites': EventFavorite.objects.filter(user=user).order_by('-created_at')[:12],
+        'artist_reels': Reel.objects.filter(artist=artist, status='published').order_by('-created_at')[:12],
+        'popular_reels': Reel.objects.filter(status='published').order_by('-view_count')[:8],
+        'featured_artists': ArtistProfile.objects.filter(is_featured=True).order_by('-follower_count')[:6],
+    }
+
+
+def drop_listing_indexes():
+    with connection.schema_editor() as editor:
+        for model in INDEXED_MODELS:
+            for index in model._meta.indexes:
+                editor.remove_index(model, index)
+
+
+def create_listing_indexes():
+    with connection.schema_editor() as editor:
+        for model in INDEXED_MODELS:
+            for index in model._meta.indexes:
+                editor.add_index(model, index)
+
+
+def analyze():
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def measure(queries, repeat):
+    results = {}
+    for name, queryset in queries.items():
+        plan = queryset.explain()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            list(queryset.all())
+        results[name] = (plan, (time.perf_counter() - start) / repeat * 1000)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=20000, help='events to seed (bookings = 2x)')
+    parser.add_argument('--repeat', type=int, default=20, help='runs per query when timing')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        print(f'Seeding {args.events} events on {connection.vendor}...')
+        queries = listing_queries(*seed(args.events))
+
+        drop_listing_indexes()
+        analyze()
+        before = measure(queries, args.repeat)
+
+        create_listing_indexes()
+        analyze()
+        after = measure(queries, args.repeat)
+
+        for name in queries:
+            plan_before, ms_before = before[name]
+            plan_after, ms_after = after[name]
+            print(f'\n== {name}: {ms_before:.2f} ms -> {ms_after:.2f} ms')
+            print('  without indexes:\n    ' + plan_before.replace('\n', '\n    '))
+            print('  with indexes:\n    ' + plan_after.replace('\n', '\n    '))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Time to first frame for a reel video, served as a plain media file and
+through the range-aware artists:reel_video view.
+
+A player that opens a video and seeks to a position needs the file's
+metadata (the first --moov-kb KB) and then about --frame-kb KB from the
+seek position. Servers without range support send the file from byte 0,
+so the player has to download everything before the seek point first.
+With ranges it fetches the two pieces it needs.
+
+Creates a throwaway test database and a --size-mb video file. Then it
+serves both through Django on a local HTTP server and reads the responses
+at --mbps megabits per second, like a phone on a mobile connection:
+
+  static  django.views.static.serve, how /media/ is served now (no ranges)
+  ranges  artists:reel_video (Range, ETag, sendfile under gunicorn)
+
+    python benchmarks/range_serving.py --size-mb 40 --mbps 20
+
+The local server has no sendfile(), so this measures what the client waits
+for, not server CPU. Use --mbps 0 to read as fast as loopback allows.
+"""
+import argparse
+import http.client
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'entertainment_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.files.base import File  # noqa: E402
+from django.core.handlers.wsgi import WSGIHandler  # noqa: E402
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+from django.urls import include, path, re_path  # noqa: E402
+from django.views.static import serve  # noqa: E402
+
+from artists.models import ArtistProfile, Reel  # noqa: E402
+
+User = get_user_model()
+BLOCK = 16 * 1024
+MEDIA_ROOT = tempfile.mkdtemp()
+
+urlpatterns = [
+    re_path(r'^media/(?P<path>.*)$', serve, {'document_root': MEDIA_ROOT}),
+    path('artists/', include('artists.urls')),
+]
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def seed(size):
+    user = User.objects.create_user(username='bench', email='bench@example.com', password='!')
+    artist = ArtistProfile.objects.create(user=user, stage_name='Bench', genre='Afrobeats')
+    reel = Reel.objects.create(artist=artist, title='Benchmark reel', status='published')
+    with tempfile.TemporaryFile() as video:
+        for _ in range(0, size, 1024 * 1024):
+            video.write(os.urandom(min(1024 * 1024, size - video.tell())))
+        video.seek(0)
+        reel.video_file.save('benchmark.mp4', File(video))
+    return reel
+
+
+def fetch(port, url, byte_range, need, mbps):
+    """Read `url` at `mbps` until `need` bytes have arrived. Returns seconds taken."""
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    headers = {'Range': 'bytes=%d-%d' % byte_range} if byte_range else {}
+    started = time.perf_counter()
+    conn.request('GET', url, headers=headers)
+    response = conn.getresponse()
+    received = 0
+    while received < need:
+        block = response.read(min(BLOCK, need - received))
+        if not block:
+            raise RuntimeError(f'{url} ended after {received} of {need} bytes')
+        received += len(block)
+        if mbps:
+            # Hold the pace of a link of `mbps` megabits per second
+            delay = started + received * 8 / (mbps * 1_000_000) - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    conn.close()
+    return time.perf_counter() - started
+
+
+def first_frame(mode, port, urls, size, seek, moov, frame, mbps):
+    start = int(size * seek)
+    if mode == 'static':
+        # No ranges: everything up to the seek point comes first
+        return fetch(port, urls['static'], None, min(size, start + frame), mbps)
+    metadata = fetch(port, urls['ranges'], (0, moov - 1), moov, mbps)
+    # Ranges: the metadata, then the frame data at the seek point (minus what the first read covered)
+    begin, end = max(start, moov), min(size, start + frame) - 1
+    if begin > end:
+        return metadata
+    return metadata + fetch(port, urls['ranges'], (begin, end), end - begin + 1, mbps)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=40, help='video size in MB')
+    parser.add_argument('--mbps', type=float, default=20, help='client link speed in megabits/s (0: unthrottled)')
+    parser.add_argument('--moov-kb', type=int, default=64, help='metadata a player reads first, in KB')
+    parser.add_argument('--frame-kb', type=int, default=256, help='data needed to show the first frame, in KB')
+    parser.add_argument('--runs', type=int, default=3, help='runs per seek position and mode')
+    args = parser.parse_args()
+    size, moov, frame = args.size_mb * 1024 * 1024, args.moov_kb * 1024, args.frame_kb * 1024
+
+    # A file, not :memory:, so server threads share the seeded data
+    test_db = tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False).name
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = test_db
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    overrides = override_settings(ROOT_URLCONF=__name__, MEDIA_ROOT=MEDIA_ROOT, ALLOWED_HOSTS=['*'])
+    overrides.enable()
+    # The static mode hangs up once it has enough, which the server would log as a broken pipe
+    logging.getLogger('django.server').setLevel(logging.ERROR)
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler)
+    server.set_app(WSGIHandler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        print(f'Writing a {args.size_mb} MB video...')
+        reel = seed(size)
+        urls = {'static': f'/media/{reel.video_file.name}', 'ranges': f'/artists/reel/{reel.slug}/video/'}
+        port = server.server_address[1]
+
+        link = f'{args.mbps:g} Mbit/s' if args.mbps else 'unthrottled'
+        print(f'{link}, {args.moov_kb} KB metadata + {args.frame_kb} KB to the first frame, '
+              f'median of {args.runs}\n')
+        print(f'{"seek to":<8} {"mode":<7} {"first frame ms":>15}')
+        for seek in (0, 0.25, 0.5, 0.9):
+            for mode in ('static', 'ranges'):
+                timings = [
+                    first_frame(mode, port, urls, size, seek, moov, frame, args.mbps) for _ in range(args.runs)
+                ]
+                print(f'{seek:<8.0%} {mode:<7} {statistics.median(timings) * 1000:>15.1f}')
+    finally:
+        server.shutdown()
+        server.server_close()
+        overrides.disable()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        if os.path.exists(test_db):
+            os.remove(test_db)
+
+
+if __name__ == '__main__':
+    main()
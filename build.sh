@@ -6,4 +6,5 @@ pip install --upgrade pip
 pip install -r requirements.txt
 
 python manage.py collectstatic --no-input
-python manage.py migrate --noinput
\ No newline at end of file
+python manage.py migrate --noinput
+python manage.py createcachetable
\ No newline at end of file
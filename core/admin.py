@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import SiteConfiguration, ActivityLog, Notification, ContactMessage, FAQ
+from .jobs import retry_dead
+from .models import SiteConfiguration, ActivityLog, Notification, ContactMessage, FAQ, Job
 
 @admin.register(SiteConfiguration)
 class SiteConfigurationAdmin(admin.ModelAdmin):
@@ -114,4 +115,18 @@ class FAQAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'queue', 'status', 'attempts', 'max_attempts', 'run_at', 'finished_at']
+    list_filter = ['status', 'queue', 'name']
+    search_fields = ['name', 'last_error']
+    readonly_fields = ['name', 'queue', 'args', 'kwargs', 'attempts', 'last_error', 'created_at',
+                       'locked_at', 'locked_by', 'finished_at']
+    actions = ['requeue_dead_jobs']
+
+    @admin.action(description='Requeue selected dead jobs')
+    def requeue_dead_jobs(self, request, queryset):
+        requeued = retry_dead(queryset)
+        self.message_user(request, f'Requeued {requeued} dead jobs.')
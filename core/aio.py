@@ -0,0 +1,73 @@
+"""
+Helpers for async views.
+
+    context = await gather_queries(
+        featured_events=Event.objects.filter(is_featured=True)[:6],
+        total_reels=reels.count,
+    )
+
+`gather_queries` evaluates independent querysets (into lists) or
+zero-argument callables concurrently. Each runs on its own thread from a
+pool of ASYNC_QUERY_WORKERS threads, so each uses its own database
+connection, and a page's queries overlap instead of running one after
+another. Connections stay open for CONN_MAX_AGE, as in request threads.
+
+Queries run one after another on the request's thread instead when:
+- ASYNC_PARALLEL_QUERIES is off;
+- the database is SQLite (a single writer, often in memory);
+- the caller is inside a transaction, since other connections could not
+  see its uncommitted rows.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models.query import QuerySet
+
+_executor = None
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'ASYNC_QUERY_WORKERS', 16), thread_name_prefix='query'
+        )
+    return _executor
+
+
+def _evaluate(query):
+    if isinstance(query, QuerySet):
+        return list(query)
+    return query()
+
+
+def _in_pool_thread(query):
+    close_old_connections()
+    try:
+        return _evaluate(query)
+    finally:
+        close_old_connections()
+
+
+def _can_run_in_parallel():
+    return (
+        getattr(settings, 'ASYNC_PARALLEL_QUERIES', True)
+        and connection.vendor != 'sqlite'
+        and not connection.in_atomic_block
+    )
+
+
+async def gather_queries(**queries):
+    """Evaluate `queries` (querysets or callables) concurrently. Returns {name: result}."""
+    if not await sync_to_async(_can_run_in_parallel)():
+        evaluate_all = sync_to_async(lambda: {name: _evaluate(query) for name, query in queries.items()})
+        return await evaluate_all()
+
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(
+        loop.run_in_executor(_pool(), _in_pool_thread, query) for query in queries.values()
+    ))
+    return dict(zip(queries, results))
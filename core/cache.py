@@ -0,0 +1,140 @@
+"""
+Caching for public listing pages.
+
+`cache_listing` caches the context of a TemplateResponse-returning view,
+keyed by view, URL kwargs, query string (filters + page number), visitor
+variant (anonymous or authenticated) and the version of every namespace
+the listing depends on. Saving or deleting an Event, ArtistProfile or
+Reel bumps its namespace version (see core/signals.py), which orphans all
+cached listings built from it; orphaned entries simply expire.
+
+Only context is cached, the template is rendered per request, so CSRF
+tokens, messages and the user menu are never shared between visitors.
+
+Async views can be decorated too; the cache is then read and written
+with the async cache API.
+"""
+import asyncio
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models.query import QuerySet
+from django.template.response import TemplateResponse
+
+VERSION_KEY = 'listing-version:{}'
+
+
+def namespace_versions(namespaces):
+    """Current version of each namespace, in order."""
+    keys = [VERSION_KEY.format(ns) for ns in namespaces]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            cache.add(key, 1, None)
+            found[key] = cache.get(key, 1)
+        versions.append(found[key])
+    return versions
+
+
+def bump_namespace(*namespaces):
+    """Invalidate every cached listing that depends on `namespaces`."""
+    for ns in namespaces:
+        key = VERSION_KEY.format(ns)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Unknown or evicted version: start a fresh one no cached key can match
+            cache.add(key, 1, None)
+            cache.incr(key)
+
+
+def listing_cache_key(name, request, namespaces, view_kwargs=None, authenticated=None):
+    if authenticated is None:
+        authenticated = request.user.is_authenticated
+    variant = 'auth' if authenticated else 'anon'
+    versions = '.'.join(str(v) for v in namespace_versions(namespaces))
+    params = urlencode(sorted((k, v) for k, values in request.GET.lists() for v in values))
+    kwargs = urlencode(sorted((view_kwargs or {}).items()))
+    digest = hashlib.md5(f'{kwargs}?{params}'.encode()).hexdigest()
+    return f'listing:{name}:{versions}:{variant}:{digest}'
+
+
+def detach_page(page):
+    """Copy a Page so it no longer references its queryset and can be pickled."""
+    source = page.paginator
+    paginator = Paginator([], source.per_page, orphans=source.orphans,
+                          allow_empty_first_page=source.allow_empty_first_page)
+    paginator.count = source.count
+    return Page(list(page.object_list), page.number, paginator)
+
+
+def freeze_context(context):
+    """Evaluate querysets and pages in `context` into cacheable values."""
+    frozen = {}
+    for key, value in context.items():
+        if isinstance(value, Page):
+            value = detach_page(value)
+        elif isinstance(value, QuerySet):
+            value = list(value)
+        frozen[key] = value
+    return frozen
+
+
+def listing_timeout(request, authenticated=None):
+    if authenticated is None:
+        authenticated = request.user.is_authenticated
+    if authenticated:
+        return getattr(settings, 'LISTING_CACHE_TIMEOUT_AUTHENTICATED', 60)
+    return getattr(settings, 'LISTING_CACHE_TIMEOUT', 300)
+
+
+def cache_listing(*namespaces):
+    """Cache a listing view's context; invalidated when any of `namespaces` changes."""
+    def decorator(view):
+        name = f'{view.__module__}.{view.__name__}'
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            key = listing_cache_key(name, request, namespaces, kwargs)
+            cached = cache.get(key)
+            if cached is not None:
+                template_name, context = cached
+                return TemplateResponse(request, template_name, context)
+
+            response = view(request, *args, **kwargs)
+            if isinstance(response, TemplateResponse) and response.status_code == 200:
+                response.context_data = freeze_context(response.context_data or {})
+                cache.set(key, (response.template_name, response.context_data), listing_timeout(request))
+            return response
+
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await view(request, *args, **kwargs)
+
+            authenticated = (await request.auser()).is_authenticated
+            key = await sync_to_async(listing_cache_key)(name, request, namespaces, kwargs, authenticated)
+            cached = await cache.aget(key)
+            if cached is not None:
+                template_name, context = cached
+                return TemplateResponse(request, template_name, context)
+
+            response = await view(request, *args, **kwargs)
+            if isinstance(response, TemplateResponse) and response.status_code == 200:
+                response.context_data = await sync_to_async(freeze_context)(response.context_data or {})
+                await cache.aset(
+                    key, (response.template_name, response.context_data), listing_timeout(request, authenticated)
+                )
+            return response
+
+        return async_wrapper if asyncio.iscoroutinefunction(view) else wrapper
+    return decorator
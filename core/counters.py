@@ -0,0 +1,154 @@
+"""
+Write-behind counters for hot analytics fields (Event.view_count, Reel.view_count).
+
+Increments are accumulated in a process-wide buffer and written back with
+one `UPDATE ... SET field = field + n` per (model, field, increment) group,
+either when the buffer grows past a threshold or when the flush interval
+has elapsed. A daemon thread, started by an increment when none is
+running, flushes once the interval has passed without a flush, so counts
+don't wait for more traffic; it exits when the buffer is empty. The
+buffer is drained at interpreter shutdown and can be drained on demand
+with `python manage.py flush_view_counters`.
+
+Pending counts are per process: `pending()` and `current()` only include
+increments buffered by this worker. Other workers' increments show up once
+they flush, at most VIEW_COUNTER_FLUSH_INTERVAL seconds later.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+
+from .live import publish
+
+logger = logging.getLogger(__name__)
+
+
+class CounterBuffer:
+    """Accumulate counter increments in memory and flush them in batches."""
+
+    def __init__(self, flush_interval=None, flush_threshold=None):
+        self._flush_interval = flush_interval
+        self._flush_threshold = flush_threshold
+        self._pending = defaultdict(int)  # (model, field, pk) -> delta
+        self._pending_total = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return getattr(settings, 'VIEW_COUNTER_FLUSH_INTERVAL', 10)
+
+    @property
+    def flush_threshold(self):
+        if self._flush_threshold is not None:
+            return self._flush_threshold
+        return getattr(settings, 'VIEW_COUNTER_FLUSH_THRESHOLD', 500)
+
+    def incr(self, instance, field='view_count', amount=1):
+        """Buffer an increment of `field` on `instance`; flush if due."""
+        key = (type(instance), field, instance.pk)
+        with self._lock:
+            self._pending[key] += amount
+            self._pending_total += amount
+            self._start_timer()
+            due = (
+                self._pending_total >= self.flush_threshold
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def _start_timer(self):
+        # Called with self._lock held. A thread isn't alive after a fork, so each worker starts its own
+        if self.flush_interval > 0 and (self._timer is None or not self._timer.is_alive()):
+            self._timer = threading.Thread(target=self._flush_periodically, name='counter-flush', daemon=True)
+            self._timer.start()
+
+    def _flush_periodically(self):
+        """Flush whenever the interval passes without a flush; exit once the buffer is empty."""
+        # Sleep first: an incr() that finds a flush overdue does that flush itself
+        wait = self.flush_interval
+        while True:
+            time.sleep(wait)
+            wait = self._last_flush + self.flush_interval - time.monotonic()
+            if wait > 0:
+                continue
+            wait = self.flush_interval
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Periodic counter flush failed')
+            finally:
+                close_old_connections()
+            with self._lock:
+                if not self._pending:
+                    # The next incr() starts a new timer
+                    self._timer = None
+                    return
+
+    def pending(self, instance, field='view_count'):
+        """Increments buffered for `instance` in this process but not yet written."""
+        with self._lock:
+            return self._pending.get((type(instance), field, instance.pk), 0)
+
+    def current(self, instance, field='view_count'):
+        """Committed value loaded on `instance` plus pending increments."""
+        return getattr(instance, field) + self.pending(instance, field)
+
+    def flush(self):
+        """Write all buffered increments to the database.
+
+        Returns the number of rows updated. Increments that fail to write
+        are put back into the buffer so they are retried on the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, defaultdict(int)
+                self._pending_total = 0
+                self._last_flush = time.monotonic()
+
+            if not batch:
+                return 0
+
+            groups = defaultdict(list)
+            for (model, field, pk), delta in batch.items():
+                groups[(model, field, delta)].append(pk)
+
+            updated = 0
+            for (model, field, delta), pks in groups.items():
+                try:
+                    updated += model._default_manager.filter(pk__in=pks).update(
+                        **{field: F(field) + delta}
+                    )
+                    publish(model._meta.model_name, *pks)
+                except Exception:
+                    logger.exception('Failed to flush %s.%s counters', model.__name__, field)
+                    with self._lock:
+                        for pk in pks:
+                            self._pending[(model, field, pk)] += delta
+                            self._pending_total += delta
+            return updated
+
+
+view_counter = CounterBuffer()
+
+
+def _drain_on_exit():
+    try:
+        view_counter.flush()
+        close_old_connections()
+    except Exception:
+        logger.exception('Failed to drain view counters on shutdown')
+
+
+atexit.register(_drain_on_exit)
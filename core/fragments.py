@@ -0,0 +1,67 @@
+"""
+Template fragment caching keyed by role and per-user version stamps.
+
+    {% load fragments %}
+    {% cachefragment "nav_user_menu" %}...{% endcachefragment %}
+    {% cachefragment "dashboard_bookings" per_user "events" %}...{% endcachefragment %}
+
+Every fragment is cached per role. Users with the same role flags see the
+same navigation, so one copy serves all of them. `per_user` fragments
+also key on the user's id and version stamp. `bump_user` moves the stamp
+whenever their bookings, favorites or follows change (core/signals.py and
+events/inventory.py call it), which orphans every per-user fragment at
+once.
+
+Any further arguments name listing namespaces (see core/cache.py). The
+fragment is rebuilt when a model in one of those namespaces is saved.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import namespace_versions
+
+USER_VERSION_KEY = 'fragment-user:{}'
+
+
+def user_role(user):
+    """The role variant a user's fragments are cached under."""
+    if user is None or not user.is_authenticated:
+        return 'anon'
+    flags = [user.role or 'user']
+    flags += [name for name in ('is_superuser', 'is_staff', 'is_artist', 'is_host') if getattr(user, name, False)]
+    return '.'.join(flags)
+
+
+def user_version(user_id):
+    version = cache.get(USER_VERSION_KEY.format(user_id))
+    if version is None:
+        cache.add(USER_VERSION_KEY.format(user_id), 1, None)
+        version = cache.get(USER_VERSION_KEY.format(user_id), 1)
+    return version
+
+
+def bump_user(*user_ids):
+    """Invalidate every per-user fragment of `user_ids`."""
+    for user_id in user_ids:
+        if user_id is None:
+            continue
+        key = USER_VERSION_KEY.format(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Unknown or evicted stamp: start a fresh one no cached fragment can match
+            cache.add(key, 1, None)
+            cache.incr(key)
+
+
+def fragment_key(name, user, per_user=False, namespaces=()):
+    parts = ['fragment', name, user_role(user)]
+    if per_user and user is not None and user.is_authenticated:
+        parts.append(f'u{user.pk}.{user_version(user.pk)}')
+    if namespaces:
+        parts.append('.'.join(str(v) for v in namespace_versions(namespaces)))
+    return ':'.join(parts)
+
+
+def fragment_timeout():
+    return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 600)
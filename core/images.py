@@ -0,0 +1,135 @@
+"""
+Responsive renditions of uploaded images.
+
+    {% load images %}
+    {% responsive_image event.image alt=event.title sizes="(max-width: 768px) 100vw, 33vw" %}
+
+When an event, artist or reel image changes (core/signals.py), the
+`generate_derivatives` job is queued on the 'images' queue. It resizes the
+upload to each IMAGE_DERIVATIVE_WIDTHS width narrower than the original,
+and to the original width if that is not over the largest. Each size is
+written as WebP and as JPEG, next to the upload, with a manifest:
+
+    event_images/poster.png
+    event_images/poster.renditions/320.webp, 320.jpg, 640.webp, ...
+    event_images/poster.renditions/manifest.json
+
+Manifests are cached. The template tag turns one into a <picture> with
+srcsets, so browsers download the smallest file that fills the slot.
+Until the job has run it falls back to the original. Run
+`manage.py build_image_derivatives` to queue existing uploads.
+"""
+import hashlib
+import io
+import json
+import posixpath
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .jobs import job
+
+# (manifest key, Pillow format, file extension)
+FORMATS = [('webp', 'WEBP', 'webp'), ('jpeg', 'JPEG', 'jpg')]
+MANIFEST_KEY = 'image-manifest:{}'
+# A missing manifest is remembered briefly, so listings don't check the disk for every card
+MISSING_MANIFEST_TIMEOUT = 60
+
+
+def widths():
+    return sorted(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', [320, 640, 1024, 1600]))
+
+
+def rendition_dir(name):
+    return posixpath.splitext(name)[0] + '.renditions'
+
+
+def manifest_name(name):
+    return posixpath.join(rendition_dir(name), 'manifest.json')
+
+
+def _manifest_key(name):
+    return MANIFEST_KEY.format(hashlib.md5(name.encode()).hexdigest())
+
+
+def load_manifest(name):
+    """The manifest for the upload stored as `name`, or {} if it has no renditions yet."""
+    key = _manifest_key(name)
+    manifest = cache.get(key)
+    if manifest is not None:
+        return manifest
+    try:
+        with default_storage.open(manifest_name(name)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        cache.set(key, {}, MISSING_MANIFEST_TIMEOUT)
+        return {}
+    cache.set(key, manifest, None)
+    return manifest
+
+
+def _target_widths(width):
+    targets = [w for w in widths() if w < width]
+    if widths() and width <= widths()[-1]:
+        targets.append(width)
+    return targets
+
+
+def _encode(image, pil_format):
+    if pil_format == 'JPEG' and image.mode != 'RGB':
+        # JPEG has no alpha: flatten transparent areas onto white
+        rgba = image.convert('RGBA')
+        flat = Image.new('RGB', rgba.size, (255, 255, 255))
+        flat.paste(rgba, mask=rgba.getchannel('A'))
+        image = flat
+    elif pil_format == 'WEBP' and image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    buffer = io.BytesIO()
+    quality = getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80)
+    image.save(buffer, pil_format, quality=quality, optimize=pil_format == 'JPEG')
+    return buffer.getvalue()
+
+
+def _save(name, content):
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    return default_storage.save(name, ContentFile(content))
+
+
+def build_derivatives(name):
+    """Write the renditions and manifest of the upload stored as `name`. Returns the manifest."""
+    with default_storage.open(name) as f, Image.open(f) as original:
+        original = ImageOps.exif_transpose(original)
+        width, height = original.size
+        renditions = {key: {} for key, _, _ in FORMATS}
+        for target in _target_widths(width):
+            size = (target, max(1, round(height * target / width)))
+            resized = original if size == original.size else original.resize(size, Image.Resampling.LANCZOS)
+            for key, pil_format, extension in FORMATS:
+                path = posixpath.join(rendition_dir(name), f'{target}.{extension}')
+                renditions[key][str(target)] = _save(path, _encode(resized, pil_format))
+
+    manifest = {'source': name, 'width': width, 'height': height, 'renditions': renditions}
+    _save(manifest_name(name), json.dumps(manifest).encode())
+    cache.set(_manifest_key(name), manifest, None)
+    return manifest
+
+
+@job(queue='images')
+def generate_derivatives(name):
+    """Build renditions for `name` unless it already has them (or is gone)."""
+    if load_manifest(name).get('source') == name or not default_storage.exists(name):
+        return 0
+    manifest = build_derivatives(name)
+    return sum(len(files) for files in manifest['renditions'].values())
+
+
+def srcset(manifest, key):
+    """'url 320w, url 640w' for one format of a manifest."""
+    files = manifest.get('renditions', {}).get(key, {})
+    return ', '.join(
+        f'{default_storage.url(path)} {width}w' for width, path in sorted(files.items(), key=lambda item: int(item[0]))
+    )
@@ -0,0 +1,276 @@
+"""
+Database-backed background jobs.
+
+    @job(queue='email', max_attempts=5)
+    def deliver_email(to, subject):
+        ...
+
+    deliver_email.delay('a@example.com', 'Hi')   # returns the queued Job
+
+`.delay()` inserts a Job row in the caller's transaction, so a job queued
+by a request that rolls back never runs. `manage.py run_jobs` claims due
+jobs with a conditional UPDATE (safe with several workers), runs them on a
+thread pool, and retries failures with jittered exponential backoff.
+Jobs that fail `max_attempts` times are kept as 'dead' for inspection and
+can be requeued from the admin.
+
+JOB_QUEUE_CONCURRENCY caps how many jobs of a queue run at once across all
+workers (checked at claim time, so it is a soft limit under races), which
+keeps e.g. SMTP or a partner's webhook endpoint from being flooded.
+
+Arguments must be JSON-serializable; model instances (also inside dicts
+and lists) are stored as references and reloaded when the job runs.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import wraps
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, models
+from django.db.models import Count, F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+MODEL_REF = '__model__'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def encode(value):
+    """Make job arguments storable: model instances become {'__model__': label, 'pk': pk}."""
+    if isinstance(value, models.Model):
+        return {MODEL_REF: value._meta.label_lower, 'pk': value.pk}
+    if isinstance(value, dict):
+        return {key: encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode(item) for item in value]
+    return value
+
+
+def decode(value):
+    """Reverse `encode`, reloading referenced rows (None if the row is gone)."""
+    if isinstance(value, dict):
+        if set(value) == {MODEL_REF, 'pk'}:
+            model = apps.get_model(value[MODEL_REF])
+            return model._default_manager.filter(pk=value['pk']).first()
+        return {key: decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    return value
+
+
+def job(queue='default', max_attempts=None):
+    """Mark a function as a background job and give it `.delay(*args, **kwargs)`."""
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+
+        @wraps(func)
+        def delay(*args, **kwargs):
+            return enqueue(name, args, kwargs, queue=queue, max_attempts=max_attempts)
+
+        func.is_job = True
+        func.delay = delay
+        return func
+    return decorator
+
+
+def enqueue(name, args=(), kwargs=None, queue='default', max_attempts=None, run_at=None):
+    """Queue a call of the @job function at dotted path `name`. Returns the Job.
+
+    With JOBS_EAGER on, the job is run right away in this thread (for development).
+    """
+    queued = Job.objects.create(
+        name=name,
+        queue=queue,
+        args=encode(list(args)),
+        kwargs=encode(kwargs or {}),
+        max_attempts=max_attempts or _setting('JOB_MAX_ATTEMPTS', 5),
+        run_at=run_at or timezone.now(),
+    )
+    if _setting('JOBS_EAGER', False):
+        claimed = claim(worker='eager', queues=[queue], limit=1, pks=[queued.pk])
+        if claimed:
+            run_job(claimed[0])
+    return queued
+
+
+def retry_delay(attempts):
+    """Seconds before retry number `attempts`: exponential from JOB_RETRY_BASE_SECONDS plus jitter, max one hour."""
+    base = _setting('JOB_RETRY_BASE_SECONDS', 10)
+    return min(base * 2 ** max(attempts - 1, 0), 3600) + random.uniform(0, base)
+
+
+def _queue_limit(queue):
+    return _setting('JOB_QUEUE_CONCURRENCY', {}).get(queue)
+
+
+def claim(worker, queues=None, limit=10, pks=None):
+    """Take up to `limit` due jobs for `worker`, honouring per-queue concurrency. Returns the claimed Jobs."""
+    now = timezone.now()
+    due = Job.objects.filter(status='queued', run_at__lte=now)
+    if queues:
+        due = due.filter(queue__in=queues)
+    if pks is not None:
+        due = due.filter(pk__in=pks)
+    candidates = list(due.order_by('run_at', 'pk').values_list('pk', 'queue')[:limit * 4])
+    if not candidates:
+        return []
+
+    running = dict(
+        Job.objects.filter(status='running', queue__in={queue for _, queue in candidates})
+        .values_list('queue').annotate(count=Count('pk'))
+    )
+    claimed = []
+    for pk, queue in candidates:
+        if len(claimed) >= limit:
+            break
+        queue_limit = _queue_limit(queue)
+        if queue_limit is not None and running.get(queue, 0) >= queue_limit:
+            continue
+        taken = Job.objects.filter(pk=pk, status='queued').update(
+            status='running', attempts=F('attempts') + 1, locked_at=now, locked_by=worker
+        )
+        if taken:
+            running[queue] = running.get(queue, 0) + 1
+            claimed.append(pk)
+    return list(Job.objects.filter(pk__in=claimed).order_by('run_at', 'pk'))
+
+
+def _fail(queued, error):
+    if queued.attempts >= queued.max_attempts:
+        logger.error('Job %s #%s is dead after %d attempts: %s', queued.name, queued.pk, queued.attempts, error)
+        Job.objects.filter(pk=queued.pk).update(status='dead', last_error=error, finished_at=timezone.now())
+        return 'dead'
+    Job.objects.filter(pk=queued.pk).update(
+        status='queued',
+        last_error=error,
+        locked_at=None,
+        locked_by='',
+        run_at=timezone.now() + timezone.timedelta(seconds=retry_delay(queued.attempts)),
+    )
+    return 'retry'
+
+
+def run_job(queued):
+    """Run a claimed job and record the outcome: 'done', 'retry' or 'dead'."""
+    try:
+        func = import_string(queued.name)
+        if not getattr(func, 'is_job', False):
+            raise ImportError(f'{queued.name} is not a @job function')
+    except ImportError as e:
+        # Retrying won't make the function appear
+        queued.attempts = queued.max_attempts
+        return _fail(queued, str(e))
+
+    try:
+        func(*decode(queued.args), **decode(queued.kwargs))
+    except Exception as e:
+        logger.warning('Job %s #%s failed (attempt %d): %s', queued.name, queued.pk, queued.attempts, e)
+        return _fail(queued, f'{type(e).__name__}: {e}')
+    Job.objects.filter(pk=queued.pk).update(status='done', last_error='', finished_at=timezone.now())
+    return 'done'
+
+
+def requeue_stale(timeout=None, exclude_worker=None):
+    """Count jobs running longer than JOB_TIMEOUT_SECONDS (crashed worker) as failed attempts. Returns jobs handled.
+
+    Jobs claimed by `exclude_worker` are skipped: a live worker calling this
+    still has them on its own threads.
+    """
+    timeout = timeout or _setting('JOB_TIMEOUT_SECONDS', 300)
+    cutoff = timezone.now() - timezone.timedelta(seconds=timeout)
+    stale = Job.objects.filter(status='running', locked_at__lt=cutoff)
+    if exclude_worker:
+        stale = stale.exclude(locked_by=exclude_worker)
+    stale = list(stale)
+    for queued in stale:
+        _fail(queued, f'Timed out after {timeout}s (worker {queued.locked_by or "unknown"})')
+    return len(stale)
+
+
+def retry_dead(queryset):
+    """Put dead jobs back on the queue with a fresh set of attempts. Returns jobs requeued."""
+    return queryset.filter(status='dead').update(
+        status='queued', attempts=0, run_at=timezone.now(), locked_at=None, locked_by='', finished_at=None
+    )
+
+
+def prune_finished(days=None):
+    """Delete jobs that finished successfully more than JOB_RETENTION_DAYS ago. Returns jobs deleted."""
+    days = days if days is not None else _setting('JOB_RETENTION_DAYS', 7)
+    cutoff = timezone.now() - timezone.timedelta(days=days)
+    deleted, _ = Job.objects.filter(status='done', finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def run_pending(queues=None, limit=100):
+    """Run due jobs in this thread until none are left (or `limit` ran). Returns an outcome -> count dict."""
+    results = {}
+    worker = worker_name()
+    ran = 0
+    while ran < limit:
+        batch = claim(worker, queues=queues, limit=min(10, limit - ran))
+        if not batch:
+            break
+        for queued in batch:
+            outcome = run_job(queued)
+            results[outcome] = results.get(outcome, 0) + 1
+            ran += 1
+    return results
+
+
+def _run_in_thread(queued):
+    close_old_connections()
+    try:
+        return run_job(queued)
+    finally:
+        close_old_connections()
+
+
+def run_worker(queues=None, concurrency=None, interval=1.0, stop=None, requeue_every=60.0):
+    """Claim and run jobs on a pool of `concurrency` threads until `stop` (a threading.Event) is set.
+
+    Every `requeue_every` seconds the worker also recovers jobs left running
+    by workers that stopped since it started (see requeue_stale).
+    """
+    concurrency = concurrency or _setting('JOB_WORKER_CONCURRENCY', 4)
+    stop = stop or threading.Event()
+    worker = worker_name()
+    in_flight = set()
+    last_requeue = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='job') as pool:
+        while not stop.is_set():
+            if time.monotonic() - last_requeue >= requeue_every:
+                stale = requeue_stale(exclude_worker=worker)
+                if stale:
+                    logger.warning('Recovered %d jobs left running by a stopped worker', stale)
+                last_requeue = time.monotonic()
+            free = concurrency - len(in_flight)
+            batch = claim(worker, queues=queues, limit=free) if free else []
+            for queued in batch:
+                in_flight.add(pool.submit(_run_in_thread, queued))
+            if in_flight:
+                done, in_flight = wait(in_flight, timeout=interval, return_when=FIRST_COMPLETED)
+                in_flight = set(in_flight)
+                for future in done:
+                    if future.exception():
+                        logger.error('Job thread crashed: %s', future.exception())
+            elif not batch:
+                stop.wait(interval)
+            close_old_connections()
@@ -0,0 +1,183 @@
+"""
+Live updates pushed to browsers over server-sent events.
+
+    const live = new EventSource('/live/?event=12&reel=40&reel=41');
+    live.addEventListener('update', e => render(JSON.parse(e.data)));
+
+A stream follows the remaining tickets of the listed events, the like and
+view counts of the listed reels, and, for a logged-in user, their unread
+notification count and new notifications.
+
+Code that changes one of those values calls `publish(kind, *pks)`. That
+writes a fresh version token for each topic to the cache, after the
+transaction commits. Each stream checks its topics' tokens with one
+cache round trip per tick. It only queries the database for topics whose
+token changed, plus a full resync every SSE_RESYNC_SECONDS in case a
+publish was missed.
+
+Ticks are 1/SSE_MAX_UPDATES_PER_SECOND apart, and everything that changed
+within a tick goes out as one `update` message. However hot an event is,
+a client gets at most that many messages a second, each with the latest
+values.
+
+Streaming needs the ASGI entry point (entertainment_project/asgi.py). Under
+WSGI the view answers with a single snapshot and a `retry:` hint, so
+EventSource falls back to polling instead of tying up a worker.
+"""
+import asyncio
+import json
+import os
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from artists.models import Reel
+from events.models import Event
+from .models import Notification
+
+TOPIC_KEY = 'live:{}:{}'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def topic_key(kind, pk):
+    return TOPIC_KEY.format(kind, pk)
+
+
+def publish(kind, *pks):
+    """Tell open streams that `kind` rows `pks` ('event', 'reel', 'notifications' user ids) changed."""
+    if not pks:
+        return
+    token = os.urandom(6).hex()
+    keys = {topic_key(kind, pk): token for pk in pks}
+    transaction.on_commit(lambda: cache.set_many(keys, 24 * 3600))
+
+
+def format_message(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, cls=_Encoder, separators=(",", ":"))}\n\n'
+
+
+class _Encoder(json.JSONEncoder):
+    def default(self, o):
+        if hasattr(o, 'isoformat'):
+            return o.isoformat()
+        return super().default(o)
+
+
+class LiveFeed:
+    """What one client follows and what it was last sent; `poll` returns only what changed."""
+
+    def __init__(self, user_id=None, event_ids=(), reel_ids=()):
+        self.user_id = user_id
+        self.event_ids = list(event_ids)
+        self.reel_ids = list(reel_ids)
+        self.sent = {}
+        self.last_notification_id = None
+
+    def topics(self):
+        keys = {topic_key('event', pk): ('event', pk) for pk in self.event_ids}
+        keys.update({topic_key('reel', pk): ('reel', pk) for pk in self.reel_ids})
+        if self.user_id:
+            keys[topic_key('notifications', self.user_id)] = ('notifications', self.user_id)
+        return keys
+
+    def poll(self, stale=None):
+        """Read the followed values (only `stale` (kind, pk) topics if given). Returns the changes or {}."""
+        stale = set(self.topics().values()) if stale is None else set(stale)
+        changes = {}
+
+        event_ids = [pk for kind, pk in stale if kind == 'event']
+        if event_ids:
+            tickets = self._changed('tickets', {
+                str(pk): max(0, total - sold - reserved)
+                for pk, total, sold, reserved in Event.objects.filter(pk__in=event_ids, status='published').values_list(
+                    'pk', 'available_tickets', 'sold_tickets', 'reserved_tickets'
+                )
+            })
+            if tickets:
+                changes['tickets'] = tickets
+
+        reel_ids = [pk for kind, pk in stale if kind == 'reel']
+        if reel_ids:
+            reels = self._changed('reels', {
+                str(pk): {'likes': likes, 'views': views}
+                for pk, likes, views in Reel.objects.filter(pk__in=reel_ids, status='published').values_list(
+                    'pk', 'like_count', 'view_count'
+                )
+            })
+            if reels:
+                changes['reels'] = reels
+
+        if ('notifications', self.user_id) in stale:
+            notifications = self._notifications()
+            if notifications:
+                changes['notifications'] = notifications
+        return changes
+
+    def _changed(self, group, values):
+        sent = self.sent.setdefault(group, {})
+        changed = {key: value for key, value in values.items() if sent.get(key) != value}
+        sent.update(changed)
+        return changed
+
+    def _notifications(self):
+        from .notifications import unread_count  # imports this module
+
+        mine = Notification.objects.filter(recipient_id=self.user_id)
+        if self.last_notification_id is None:
+            # Only notifications that arrive after connecting are pushed
+            self.last_notification_id = mine.order_by('-pk').values_list('pk', flat=True).first() or 0
+            latest = []
+        else:
+            latest = list(
+                mine.filter(pk__gt=self.last_notification_id).order_by('pk')
+                .values('id', 'notification_type', 'title', 'message', 'url', 'created_at')
+                [:_setting('SSE_NOTIFICATION_BATCH', 10)]
+            )
+            if latest:
+                self.last_notification_id = latest[-1]['id']
+
+        unread = unread_count(self.user_id)
+        if not latest and self.sent.get('unread') == unread:
+            return None
+        self.sent['unread'] = unread
+        return {'unread': unread, 'latest': latest}
+
+
+async def stream(feed, max_seconds=None):
+    """Yield SSE messages for `feed` until the client goes away or `max_seconds` pass."""
+    interval = 1 / max(_setting('SSE_MAX_UPDATES_PER_SECOND', 2), 0.1)
+    keepalive = _setting('SSE_KEEPALIVE_SECONDS', 15)
+    resync = _setting('SSE_RESYNC_SECONDS', 30)
+    max_seconds = max_seconds or _setting('SSE_STREAM_SECONDS', 600)
+    poll = sync_to_async(feed.poll)
+
+    topics = feed.topics()
+    started = last_sync = last_write = time.monotonic()
+    versions = await cache.aget_many(list(topics))
+
+    yield f'retry: {_setting("SSE_RETRY_MS", 3000)}\n\n'
+    yield format_message('update', await poll())
+
+    while time.monotonic() - started < max_seconds:
+        await asyncio.sleep(interval)
+        now = time.monotonic()
+        current = await cache.aget_many(list(topics))
+        if now - last_sync >= resync:
+            stale, last_sync = None, now
+        else:
+            stale = [topic for key, topic in topics.items() if current.get(key) != versions.get(key)]
+        versions = current
+
+        changes = await poll(stale) if stale is None or stale else {}
+        if changes:
+            yield format_message('update', changes)
+            last_write = now
+        elif now - last_write >= keepalive:
+            yield ': keepalive\n\n'
+            last_write = now
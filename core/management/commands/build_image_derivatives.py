@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.images import build_derivatives, generate_derivatives, load_manifest
+from core.signals import IMAGE_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Queue responsive renditions for event, artist and reel images that have none yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--now', action='store_true', help='build them in this process instead of queueing jobs')
+
+    def handle(self, *args, **options):
+        built = 0
+        for model, fields in IMAGE_FIELDS.items():
+            for values in model.objects.values_list(*fields).iterator():
+                for name in values:
+                    if not name or load_manifest(name):
+                        continue
+                    if options['now']:
+                        try:
+                            build_derivatives(name)
+                        except OSError as exc:  # missing or not an image
+                            self.stderr.write(f'Skipped {name}: {exc}')
+                            continue
+                    else:
+                        generate_derivatives.delay(name)
+                    built += 1
+        action = 'Built' if options['now'] else 'Queued'
+        self.stdout.write(self.style.SUCCESS(f'{action} renditions for {built} images'))
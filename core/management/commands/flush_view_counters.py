@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import view_counter
+
+
+class Command(BaseCommand):
+    help = 'Write buffered view counter increments to the database'
+
+    def handle(self, *args, **options):
+        updated = view_counter.flush()
+        self.stdout.write(self.style.SUCCESS(f'Flushed view counters ({updated} rows updated)'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard stats tables from bookings, events and users'
+
+    def handle(self, *args, **options):
+        events, hosts = rebuild_stats()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {events} events and {hosts} hosts'))
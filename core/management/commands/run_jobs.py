@@ -0,0 +1,43 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import prune_finished, requeue_stale, run_pending, run_worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (emails, webhooks, ...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='append', dest='queues',
+                            help='Only run jobs from this queue (repeatable; default: all queues)')
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help='Jobs run at once by this worker (default JOB_WORKER_CONCURRENCY)')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to wait between polls when no job is due')
+        parser.add_argument('--requeue-every', type=float, default=60.0,
+                            help='Seconds between sweeps for jobs left running by a crashed worker')
+        parser.add_argument('--burst', action='store_true',
+                            help='Run the jobs that are due now, then exit')
+
+    def handle(self, *args, **options):
+        stale = requeue_stale()
+        if stale:
+            self.stdout.write(f'Recovered {stale} jobs left running by a stopped worker')
+        pruned = prune_finished()
+        if pruned:
+            self.stdout.write(f'Deleted {pruned} finished jobs')
+
+        if options['burst']:
+            results = run_pending(queues=options['queues'], limit=10000)
+            summary = ', '.join(f'{count} {outcome}' for outcome, count in sorted(results.items())) or 'nothing due'
+            self.stdout.write(self.style.SUCCESS(f'Jobs: {summary}'))
+            return
+
+        stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stop.set())
+        self.stdout.write('Worker started; Ctrl+C to stop after running jobs finish')
+        run_worker(queues=options['queues'], concurrency=options['concurrency'],
+                   interval=options['interval'], stop=stop, requeue_every=options['requeue_every'])
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:03
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+PLATFORM_PK = 1
+
+
+def _booking_totals(bookings, key):
+    return {
+        row[key]: row for row in bookings.values(key).annotate(
+            bookings=Count('pk'),
+            confirmed_bookings=Count('pk', filter=Q(status='confirmed')),
+            tickets_sold=Sum('quantity', filter=Q(status='confirmed')),
+            revenue=Sum('total_price', filter=Q(status='confirmed')),
+        )
+    }
+
+
+def _totals(row, fields):
+    return {field: (row or {}).get(field) or 0 for field in fields}
+
+
+def backfill_stats(apps, schema_editor):
+    """Fill the stats tables from existing rows, as core.stats.rebuild_stats does.
+
+    The signal handlers only apply deltas, so without this the counters of
+    an existing site start at zero and go negative on the first delete.
+    """
+    Booking = apps.get_model('events', 'Booking')
+    Event = apps.get_model('events', 'Event')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    EventStats = apps.get_model('core', 'EventStats')
+    HostStats = apps.get_model('core', 'HostStats')
+    PlatformStats = apps.get_model('core', 'PlatformStats')
+
+    booking_fields = ('bookings', 'confirmed_bookings', 'revenue')
+    by_event = _booking_totals(Booking.objects.all(), 'event_id')
+    by_host = _booking_totals(Booking.objects.all(), 'event__host_id')
+    events_by_host = {
+        row['host_id']: row for row in Event.objects.values('host_id').annotate(
+            events=Count('pk'), published_events=Count('pk', filter=Q(status='published')),
+        )
+    }
+
+    EventStats.objects.all().delete()
+    EventStats.objects.bulk_create([
+        EventStats(event_id=event_id, **_totals(by_event.get(event_id), booking_fields + ('tickets_sold',)))
+        for event_id in Event.objects.values_list('pk', flat=True)
+    ], batch_size=500)
+
+    HostStats.objects.all().delete()
+    HostStats.objects.bulk_create([
+        HostStats(
+            host_id=host_id,
+            **_totals(by_host.get(host_id), booking_fields),
+            **_totals(events_by_host.get(host_id), ('events', 'published_events')),
+        )
+        for host_id in set(by_host) | set(events_by_host)
+        if host_id is not None
+    ], batch_size=500)
+
+    platform = Booking.objects.aggregate(
+        bookings=Count('pk'),
+        confirmed_bookings=Count('pk', filter=Q(status='confirmed')),
+        revenue=Sum('total_price', filter=Q(status='confirmed')),
+    )
+    platform['revenue'] = platform['revenue'] or Decimal('0.00')
+    platform.update(User.objects.aggregate(
+        users=Count('pk'),
+        artists=Count('pk', filter=Q(is_artist=True)),
+        hosts=Count('pk', filter=Q(is_host=True)),
+    ))
+    platform.update(Event.objects.aggregate(
+        events=Count('pk'),
+        published_events=Count('pk', filter=Q(status='published')),
+    ))
+    PlatformStats.objects.update_or_create(pk=PLATFORM_PK, defaults=platform)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_job'),
+        ('events', '0003_listing_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:08
+
+from django.db import migrations
+
+
+def _event_document(event):
+    parts = [
+        event.short_description, event.description,
+        event.venue_name, event.city, event.state,
+        event.category.name if event.category_id else '',
+    ]
+    return event.title, parts, event.status == 'published'
+
+
+def _artist_document(artist):
+    return artist.stage_name, [artist.genre, artist.bio], True
+
+
+def _reel_document(reel):
+    return reel.title, [reel.description, reel.artist.stage_name], reel.status == 'published'
+
+
+def backfill_index(apps, schema_editor):
+    """Index existing events, artists and reels, as core.search.rebuild_index does.
+
+    The signal handlers only index objects saved after the upgrade.
+    """
+    SearchDocument = apps.get_model('core', 'SearchDocument')
+    sources = [
+        ('event', _event_document, apps.get_model('events', 'Event').objects.select_related('category')),
+        ('artist', _artist_document, apps.get_model('artists', 'ArtistProfile').objects.all()),
+        ('reel', _reel_document, apps.get_model('artists', 'Reel').objects.select_related('artist')),
+    ]
+    SearchDocument.objects.all().delete()
+    for doc_type, build, queryset in sources:
+        batch = []
+        for instance in queryset.iterator(chunk_size=500):
+            title, parts, is_public = build(instance)
+            batch.append(SearchDocument(
+                doc_type=doc_type, object_id=instance.pk, title=title[:255],
+                body='\n'.join(part for part in parts if part), is_public=is_public,
+            ))
+        SearchDocument.objects.bulk_create(batch, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_backfill_stats'),
+        ('artists', '0005_reelview_viewed_at_default'),
+        ('events', '0003_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_index, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -158,4 +160,112 @@ class FAQ(models.Model):
         ordering = ['category', 'order', 'question']
 
     def __str__(self):
-        return self.question
\ No newline at end of file
+        return self.question
+
+class SearchDocument(models.Model):
+    """Denormalized searchable text of an event, artist or reel (see core/search.py)"""
+    DOCUMENT_TYPES = [
+        ('event', 'Event'),
+        ('artist', 'Artist'),
+        ('reel', 'Reel'),
+    ]
+
+    doc_type = models.CharField(max_length=10, choices=DOCUMENT_TYPES)
+    object_id = models.PositiveIntegerField()
+
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    is_public = models.BooleanField(default=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['doc_type', 'object_id']
+        indexes = [
+            models.Index(fields=['doc_type', 'is_public']),
+        ]
+
+    def __str__(self):
+        return f"{self.doc_type} #{self.object_id} - {self.title}"
+
+class EventStats(models.Model):
+    """Booking counters for one event, kept up to date by core/stats.py"""
+    event = models.OneToOneField('events.Event', on_delete=models.CASCADE, related_name='stats')
+
+    bookings = models.IntegerField(default=0)
+    confirmed_bookings = models.IntegerField(default=0)
+    tickets_sold = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for event #{self.event_id}"
+
+class HostStats(models.Model):
+    """Event and booking counters for one host, kept up to date by core/stats.py"""
+    host = models.OneToOneField(User, on_delete=models.CASCADE, related_name='host_stats')
+
+    events = models.IntegerField(default=0)
+    published_events = models.IntegerField(default=0)
+    bookings = models.IntegerField(default=0)
+    confirmed_bookings = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.host.username}"
+
+class PlatformStats(models.Model):
+    """Site-wide counters for the admin dashboard; a single row (see core/stats.py)"""
+    users = models.IntegerField(default=0)
+    artists = models.IntegerField(default=0)
+    hosts = models.IntegerField(default=0)
+    events = models.IntegerField(default=0)
+    published_events = models.IntegerField(default=0)
+    bookings = models.IntegerField(default=0)
+    confirmed_bookings = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'platform stats'
+
+    def __str__(self):
+        return "Platform stats"
+
+class Job(models.Model):
+    """Background job run by `manage.py run_jobs` (see core/jobs.py)"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('dead', 'Dead'),
+    ]
+
+    name = models.CharField(max_length=200, help_text="Dotted path of the @job function")
+    queue = models.CharField(max_length=50, default='default')
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['run_at']
+        indexes = [
+            models.Index(fields=['status', 'queue', 'run_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} - {self.status}"
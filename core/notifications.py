@@ -0,0 +1,135 @@
+"""
+Notification fan-out and unread counts.
+
+    notify_followers.delay(reel)                       # from the upload view
+    notify_bookers.delay(event, 'Venue changed', '...')
+
+Fan-out runs as a background job (core.jobs) so the request that triggers
+it only inserts one Job row. The job streams recipient ids with
+`.iterator()` and writes notifications with `bulk_create` in chunks of
+NOTIFICATION_FANOUT_CHUNK, so memory stays flat for a 100k-follower artist.
+
+Each user's unread count is cached; `bulk_create` and `mark_read` drop the
+cached counts of the users they touch, and saving or deleting a single
+Notification does the same (see core/signals.py).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from artists.models import Follow
+from events.models import Booking
+from .jobs import job
+from .live import publish
+from .models import Notification
+
+UNREAD_KEY = 'notifications-unread:{}'
+
+
+def _chunk_size():
+    return getattr(settings, 'NOTIFICATION_FANOUT_CHUNK', 1000)
+
+
+def forget_unread(user_ids):
+    """Drop the cached unread counts of `user_ids` and tell their live streams (core/live.py)."""
+    cache.delete_many([UNREAD_KEY.format(pk) for pk in user_ids])
+    publish('notifications', *user_ids)
+
+
+def unread_count(user):
+    """How many unread notifications `user` (or user id) has, cached for NOTIFICATION_UNREAD_CACHE_TIMEOUT."""
+    user_id = getattr(user, 'pk', user)
+    return cache.get_or_set(
+        UNREAD_KEY.format(user_id),
+        lambda: Notification.objects.filter(recipient_id=user_id, is_read=False).count(),
+        getattr(settings, 'NOTIFICATION_UNREAD_CACHE_TIMEOUT', 300),
+    )
+
+
+def mark_read(user, ids=None):
+    """Mark `user`'s notifications (all, or just `ids`) as read. Returns how many changed."""
+    unread = Notification.objects.filter(recipient=user, is_read=False)
+    if ids is not None:
+        unread = unread.filter(pk__in=ids)
+    updated = unread.update(is_read=True, read_at=timezone.now())
+    if updated:
+        forget_unread([user.pk])
+    return updated
+
+
+def fan_out(recipient_ids, notification_type, title, message, url='', sender=None, obj=None, exclude=None):
+    """Create one notification per id in `recipient_ids` (any iterable, e.g. a streaming values_list).
+
+    Returns the number created.
+    """
+    template = {
+        'notification_type': notification_type,
+        'title': title[:200],
+        'message': message,
+        'url': url,
+        'sender_id': sender.pk if sender else None,
+        'object_id': obj.pk if obj else None,
+        'object_type': obj._meta.model_name if obj else '',
+    }
+    created, chunk = 0, []
+
+    def flush():
+        Notification.objects.bulk_create([Notification(recipient_id=pk, **template) for pk in chunk])
+        forget_unread(chunk)
+        return len(chunk)
+
+    for pk in recipient_ids:
+        if pk == exclude:
+            continue
+        chunk.append(pk)
+        if len(chunk) >= _chunk_size():
+            created += flush()
+            chunk = []
+    if chunk:
+        created += flush()
+    return created
+
+
+@job(queue='notifications')
+def notify_followers(reel):
+    """Tell everyone following the reel's artist that it was published."""
+    if reel is None or reel.status != 'published':
+        return 0
+    artist = reel.artist
+    followers = (
+        Follow.objects.filter(artist=artist).order_by().values_list('follower_id', flat=True)
+        .iterator(chunk_size=_chunk_size())
+    )
+    return fan_out(
+        followers,
+        'follow',
+        f'New reel from {artist.stage_name}',
+        reel.title,
+        url=reverse('artists:reel_detail', kwargs={'slug': reel.slug}),
+        sender=artist.user,
+        obj=reel,
+    )
+
+
+@job(queue='notifications')
+def notify_bookers(event, title, message):
+    """Tell each user with a pending or confirmed booking for `event` about a change."""
+    if event is None:
+        return 0
+    bookers = (
+        Booking.objects.filter(Q(status='confirmed') | Q(status='pending'), event=event)
+        .order_by('user_id').values_list('user_id', flat=True).distinct()
+        .iterator(chunk_size=_chunk_size())
+    )
+    return fan_out(
+        bookers,
+        'booking',
+        title,
+        message,
+        url=reverse('events:event_detail', kwargs={'slug': event.slug}),
+        sender=event.host,
+        obj=event,
+        exclude=event.host_id,
+    )
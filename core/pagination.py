@@ -0,0 +1,207 @@
+"""
+Keyset (cursor) pagination for listings.
+
+OFFSET pagination makes the database walk and discard every row before
+the requested page, and Paginator adds a full COUNT(*) on top. A keyset
+page instead filters on the sort key of the last row seen, so page 500
+costs the same as page 1 when the ordering is backed by an index.
+
+Cursors are opaque, URL-safe tokens encoding the (sort key..., id)
+position of the boundary row and the direction of travel. The ordering
+must end in a unique column (normally `id`) so positions are stable, and
+its fields must be non-null.
+"""
+import base64
+import datetime
+import json
+
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import Q
+
+APPROXIMATE_COUNT_CAP = 1000
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder rounds datetimes to milliseconds; positions must be exact
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(position, reverse=False):
+    payload = {'p': position}
+    if reverse:
+        payload['r'] = 1
+    data = json.dumps(payload, separators=(',', ':'), cls=CursorEncoder).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """(position, reverse) for a cursor token. Raises InvalidCursor."""
+    try:
+        data = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(data)
+        return list(payload['p']), bool(payload.get('r'))
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor(token)
+
+
+def approximate_count(queryset, cap=APPROXIMATE_COUNT_CAP):
+    """(count, is_estimate) without a full scan of large result sets.
+
+    PostgreSQL reads the planner's row estimate and only counts exactly
+    when it is small; other databases count at most `cap` + 1 rows.
+    """
+    queryset = queryset.order_by()
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+        if estimate > cap:
+            return estimate, True
+        return queryset.count(), False
+
+    counted = queryset[:cap + 1].count()
+    if counted > cap:
+        return cap, True
+    return counted, False
+
+
+class CursorPage:
+    """One page of a keyset listing."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, count=None, count_is_estimate=False):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+        self.count_is_estimate = count_is_estimate
+        self.next_query = ''
+        self.previous_query = ''
+        self.first_query = ''
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginate `queryset` by `ordering`, e.g. ('-follower_count', '-id').
+
+    `count` is None (don't count), 'approximate' (see approximate_count)
+    or 'exact'.
+    """
+
+    def __init__(self, queryset, per_page, ordering, count=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        self.count_mode = count
+
+    def _position(self, obj):
+        return [getattr(obj, name) for name, _ in self.fields]
+
+    def _beyond(self, position, reverse):
+        """Rows strictly after `position` in the (possibly reversed) ordering."""
+        condition = Q()
+        for i, (name, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending != reverse else 'gt'
+            step = Q(**{f'{name}__{lookup}': position[i]})
+            for (prev_name, _), value in zip(self.fields[:i], position[:i]):
+                step &= Q(**{prev_name: value})
+            condition |= step
+        return condition
+
+    def _count(self):
+        if self.count_mode == 'exact':
+            return self.queryset.count(), False
+        if self.count_mode == 'approximate':
+            return approximate_count(self.queryset)
+        return None, False
+
+    def page(self, cursor=None):
+        """The page after (or, for a previous-page cursor, before) `cursor`; first page if invalid."""
+        position, reverse = None, False
+        if cursor:
+            try:
+                position, reverse = decode_cursor(cursor)
+            except InvalidCursor:
+                position = None
+            if position is not None and len(position) != len(self.fields):
+                position, reverse = None, False
+
+        order = [('-' if descending != reverse else '') + name for name, descending in self.fields]
+        queryset = self.queryset.order_by(*order)
+        if position is not None:
+            queryset = queryset.filter(self._beyond(position, reverse))
+
+        rows = list(queryset[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = bool(rows), more
+        else:
+            has_next, has_previous = more, position is not None and bool(rows)
+
+        next_cursor = encode_cursor(self._position(rows[-1])) if has_next else None
+        previous_cursor = encode_cursor(self._position(rows[0]), reverse=True) if has_previous else None
+        count, is_estimate = self._count()
+        return CursorPage(rows, next_cursor, previous_cursor, count, is_estimate)
+
+
+def _query_string(request, **params):
+    query = request.GET.copy()
+    query.pop('page', None)
+    query.pop('cursor', None)
+    for key, value in params.items():
+        if value is not None:
+            query[key] = value
+    encoded = query.urlencode()
+    return f'?{encoded}' if encoded else '?'
+
+
+def paginate_listing(request, queryset, per_page, ordering, count='approximate'):
+    """Keyset page for `request`; legacy `?page=N` links still get an OFFSET page.
+
+    Cursor pages carry ready-made query strings (next_query, previous_query,
+    first_query) that keep the request's other filters.
+    """
+    if request.GET.get('page') and 'cursor' not in request.GET:
+        return Paginator(queryset.order_by(*ordering), per_page).get_page(request.GET.get('page'))
+
+    page = KeysetPaginator(queryset, per_page, ordering, count=count).page(request.GET.get('cursor'))
+    page.next_query = _query_string(request, cursor=page.next_cursor)
+    page.previous_query = _query_string(request, cursor=page.previous_cursor)
+    page.first_query = _query_string(request)
+    return page
@@ -0,0 +1,196 @@
+"""
+Full-text search over events, artists and reels.
+
+Every searchable object has one SearchDocument row (title + body text)
+kept in sync by the signal handlers in core/signals.py. The text is
+indexed by the database: a weighted tsvector column with a GIN index on
+PostgreSQL, an FTS5 virtual table on SQLite (both created in
+core/migrations/0002_searchdocument.py). Other backends, or SQLite builds
+without FTS5, fall back to LIKE matching on the document table.
+
+`search_documents` returns a ranked SearchDocument queryset, so callers
+can paginate it and count matches without loading every row.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from events.models import Event, EventCategory
+from artists.models import ArtistProfile, Reel
+from .models import SearchDocument
+
+FTS_TABLE = 'core_searchdocument_fts'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERMS = 8
+
+_backend = {}
+
+
+def _event_document(event):
+    parts = [
+        event.short_description, event.description,
+        event.venue_name, event.city, event.state,
+        event.category.name if event.category_id else '',
+    ]
+    return event.title, parts, event.status == 'published'
+
+
+def _artist_document(artist):
+    return artist.stage_name, [artist.genre, artist.bio], True
+
+
+def _reel_document(reel):
+    return reel.title, [reel.description, reel.artist.stage_name], reel.status == 'published'
+
+
+DOCUMENT_BUILDERS = {
+    Event: ('event', _event_document),
+    ArtistProfile: ('artist', _artist_document),
+    Reel: ('reel', _reel_document),
+}
+
+RESULT_MODELS = {
+    'event': Event.objects.select_related('category', 'host'),
+    'artist': ArtistProfile.objects.all(),
+    'reel': Reel.objects.select_related('artist'),
+}
+
+
+def document_fields(instance):
+    """(doc_type, title, body, is_public) for a searchable model instance."""
+    doc_type, build = DOCUMENT_BUILDERS[type(instance)]
+    title, parts, is_public = build(instance)
+    body = '\n'.join(part for part in parts if part)
+    return doc_type, title[:255], body, is_public
+
+
+def index_instance(instance):
+    """Create or refresh the search document for `instance`."""
+    doc_type, title, body, is_public = document_fields(instance)
+    SearchDocument.objects.update_or_create(
+        doc_type=doc_type,
+        object_id=instance.pk,
+        defaults={'title': title, 'body': body, 'is_public': is_public},
+    )
+
+
+def remove_instance(instance):
+    doc_type, _ = DOCUMENT_BUILDERS[type(instance)]
+    SearchDocument.objects.filter(doc_type=doc_type, object_id=instance.pk).delete()
+
+
+def reindex_related(instance):
+    """Refresh documents that embed text from `instance` (category or artist names)."""
+    if isinstance(instance, EventCategory):
+        related = Event.objects.filter(category=instance).select_related('category')
+    elif isinstance(instance, ArtistProfile):
+        related = Reel.objects.filter(artist=instance).select_related('artist')
+    else:
+        return
+    for obj in related.iterator():
+        index_instance(obj)
+
+
+def rebuild_index(chunk_size=500):
+    """Drop and rebuild every search document. Returns the number indexed."""
+    sources = [
+        Event.objects.select_related('category'),
+        ArtistProfile.objects.all(),
+        Reel.objects.select_related('artist'),
+    ]
+    indexed = 0
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        for queryset in sources:
+            batch = []
+            for instance in queryset.iterator(chunk_size=chunk_size):
+                doc_type, title, body, is_public = document_fields(instance)
+                batch.append(SearchDocument(
+                    doc_type=doc_type, object_id=instance.pk,
+                    title=title, body=body, is_public=is_public,
+                ))
+            SearchDocument.objects.bulk_create(batch, batch_size=chunk_size)
+            indexed += len(batch)
+    return indexed
+
+
+def search_backend():
+    """'postgresql', 'fts5' or 'like', depending on what the database supports."""
+    alias = connection.alias
+    if alias not in _backend:
+        if connection.vendor == 'postgresql':
+            _backend[alias] = 'postgresql'
+        elif connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names():
+            _backend[alias] = 'fts5'
+        else:
+            _backend[alias] = 'like'
+    return _backend[alias]
+
+
+def query_terms(query):
+    return TOKEN_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def _match_postgresql(documents, terms):
+    # Every term must match; the last one as a prefix so partial words still hit
+    tsquery = ' & '.join(f'{term}:*' if i == len(terms) - 1 else term for i, term in enumerate(terms))
+    return documents.alias(
+        matched=RawSQL(
+            "core_searchdocument.search_vector @@ to_tsquery('english', %s)",
+            [tsquery], output_field=BooleanField(),
+        ),
+    ).filter(matched=True).annotate(
+        rank=RawSQL(
+            "ts_rank(core_searchdocument.search_vector, to_tsquery('english', %s))",
+            [tsquery], output_field=FloatField(),
+        ),
+    )
+
+
+def _match_fts5(documents, terms):
+    match = ' '.join(f'"{term}"' for term in terms[:-1])
+    match = f'{match} "{terms[-1]}"*'.strip()
+    # bm25() is lower-is-better; title hits weigh ten times body hits
+    return documents.filter(
+        id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]),
+    ).annotate(
+        rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = core_searchdocument.id',
+            [match], output_field=FloatField(),
+        ),
+    )
+
+
+def _match_like(documents, terms):
+    for term in terms:
+        documents = documents.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    return documents.annotate(rank=Value(0.0, output_field=FloatField()))
+
+
+MATCHERS = {
+    'postgresql': _match_postgresql,
+    'fts5': _match_fts5,
+    'like': _match_like,
+}
+
+
+def search_documents(query, doc_type):
+    """Public documents of `doc_type` matching `query`, best match first."""
+    terms = query_terms(query)
+    if not terms:
+        return SearchDocument.objects.none()
+    documents = SearchDocument.objects.filter(doc_type=doc_type, is_public=True)
+    return MATCHERS[search_backend()](documents, terms).order_by('-rank', 'id')
+
+
+def load_results(documents):
+    """Fetch the objects behind a page of documents, keeping rank order."""
+    documents = list(documents)
+    if not documents:
+        return []
+    queryset = RESULT_MODELS[documents[0].doc_type]
+    found = queryset.in_bulk([doc.object_id for doc in documents])
+    return [found[doc.object_id] for doc in documents if doc.object_id in found]
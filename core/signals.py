@@ -0,0 +1,181 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from events.models import Event, EventCategory, EventFavorite, Booking
+from artists.models import ArtistProfile, Follow, Reel
+from artists.social import refresh_reel_count
+from .cache import bump_namespace
+from .fragments import bump_user
+from .images import generate_derivatives, load_manifest
+from .models import Notification
+from .notifications import forget_unread
+from . import search, stats
+from .typeahead import typeahead_index
+
+# Saves that only touch these fields don't change what listings show
+COUNTER_FIELDS = {
+    'view_count', 'favorite_count', 'share_count',
+    'follower_count', 'reel_count', 'total_views', 'total_likes',
+    'like_count', 'download_count', 'sold_tickets', 'reserved_tickets',
+}
+
+# Image fields that get responsive renditions (core/images.py)
+IMAGE_FIELDS = {
+    Event: ('image', 'featured_image'),
+    ArtistProfile: ('profile_image', 'cover_image'),
+    Reel: ('thumbnail',),
+}
+
+LISTING_NAMESPACES = {
+    Event: 'events',
+    EventCategory: 'events',
+    ArtistProfile: 'artists',
+    Reel: 'reels',
+}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_listing_cache(sender, **kwargs):
+    namespace = LISTING_NAMESPACES.get(sender)
+    if namespace is None:
+        return
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    bump_namespace(namespace)
+
+
+@receiver(post_save)
+def update_search_index(sender, instance, **kwargs):
+    if sender not in search.DOCUMENT_BUILDERS and sender is not EventCategory:
+        return
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    if sender in search.DOCUMENT_BUILDERS:
+        search.index_instance(instance)
+    search.reindex_related(instance)
+
+
+@receiver(post_delete)
+def remove_from_search_index(sender, instance, **kwargs):
+    if sender in search.DOCUMENT_BUILDERS:
+        search.remove_instance(instance)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=ArtistProfile)
+@receiver(post_save, sender=Reel)
+def queue_image_derivatives(sender, instance, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    for field in IMAGE_FIELDS[sender]:
+        image = getattr(instance, field)
+        if image and not load_manifest(image.name):
+            generate_derivatives.delay(image.name)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=ArtistProfile)
+def update_typeahead_index(sender, instance, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    typeahead_index.update(instance)
+
+
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=ArtistProfile)
+def remove_from_typeahead_index(sender, instance, **kwargs):
+    typeahead_index.remove(instance)
+
+
+@receiver(post_save, sender=Booking)
+def count_new_booking(sender, instance, created, **kwargs):
+    # Confirmations are counted by events.inventory.confirm_booking
+    if created:
+        stats.booking_created(instance)
+
+
+@receiver(post_delete, sender=Booking)
+def uncount_booking(sender, instance, **kwargs):
+    stats.booking_deleted(instance)
+
+
+@receiver(pre_save, sender=Event)
+def remember_event_state(sender, instance, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    instance._stats_before = stats.event_state(instance.pk)
+
+
+@receiver(post_save, sender=Event)
+def count_event(sender, instance, **kwargs):
+    if hasattr(instance, '_stats_before'):
+        before = instance._stats_before
+        del instance._stats_before
+        stats.event_saved(instance, before)
+
+
+@receiver(post_delete, sender=Event)
+def uncount_event(sender, instance, **kwargs):
+    stats.event_deleted(instance)
+
+
+# Logins save last_login only; that doesn't change any count
+@receiver(pre_save, sender=get_user_model())
+def remember_user_state(sender, instance, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    instance._stats_before = stats.user_state(instance.pk)
+
+
+@receiver(post_save, sender=get_user_model())
+def count_user(sender, instance, **kwargs):
+    if hasattr(instance, '_stats_before'):
+        before = instance._stats_before
+        del instance._stats_before
+        stats.user_saved(instance, before)
+
+
+@receiver(post_delete, sender=get_user_model())
+def uncount_user(sender, instance, **kwargs):
+    stats.user_deleted(instance)
+
+
+@receiver(post_save, sender=Reel)
+@receiver(post_delete, sender=Reel)
+def recount_reels(sender, instance, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    refresh_reel_count(instance.artist_id)
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def forget_unread_count(sender, instance, **kwargs):
+    forget_unread([instance.recipient_id])
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=EventFavorite)
+@receiver(post_delete, sender=EventFavorite)
+def forget_user_fragments(sender, instance, **kwargs):
+    # Seat counter updates on a booking don't change the owner's dashboard
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    bump_user(instance.user_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def forget_follower_fragments(sender, instance, **kwargs):
+    bump_user(instance.follower_id)
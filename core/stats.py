@@ -0,0 +1,227 @@
+"""
+Materialized dashboard statistics.
+
+EventStats, HostStats and PlatformStats hold the counts and revenue the
+host, event and admin dashboards show, so those pages read one row each
+instead of counting and summing bookings on every load.
+
+Every counter is adjusted with F() expressions: booking counters as
+bookings are created, confirmed and deleted, event counters as events are
+created, deleted or change host or status, and user counters as users are
+created, deleted or gain or lose the artist and host roles. The signal
+handlers in core/signals.py read an event's or user's stored state before
+a save so only the difference is applied. Anything that changes rows
+behind these hooks (admin edits of booking status, queryset updates, raw
+SQL) leaves the counters stale until `manage.py rebuild_stats`.
+"""
+from collections import Counter
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from events.models import Booking, Event
+from .models import EventStats, HostStats, PlatformStats
+
+User = get_user_model()
+
+PLATFORM_PK = 1
+
+
+def _bump(model, lookup, create=True, **deltas):
+    """Add `deltas` to the stats row matching `lookup`, creating it first if `create`."""
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    updates['updated_at'] = timezone.now()
+    if model.objects.filter(**lookup).update(**updates) or not create:
+        return
+    _ensure(model, lookup)
+    model.objects.filter(**lookup).update(**updates)
+
+
+def _bump_booking(event_id, create=True, tickets_sold=0, **deltas):
+    """Apply booking deltas to the event's, its host's and the platform's rows (only events count tickets)."""
+    _bump(EventStats, {'event_id': event_id}, create=create, tickets_sold=tickets_sold, **deltas)
+    host_id = Event.objects.filter(pk=event_id).values_list('host_id', flat=True).first()
+    if host_id is not None:
+        _bump(HostStats, {'host_id': host_id}, create=create, **deltas)
+    _bump(PlatformStats, {'pk': PLATFORM_PK}, create=create, **deltas)
+
+
+def booking_created(booking):
+    _bump_booking(booking.event_id, bookings=1)
+
+
+def booking_confirmed(booking):
+    """Count a booking that just became confirmed (called by events.inventory.confirm_booking)."""
+    _bump_booking(booking.event_id, confirmed_bookings=1, tickets_sold=booking.quantity, revenue=booking.total_price)
+
+
+def booking_deleted(booking):
+    deltas = {'bookings': -1}
+    if booking.status == 'confirmed':
+        deltas.update(confirmed_bookings=-1, tickets_sold=-booking.quantity, revenue=-booking.total_price)
+    # Never create rows here: the event may be part of the same cascade delete
+    _bump_booking(booking.event_id, create=False, **deltas)
+
+
+def _event_counts(events):
+    return events.aggregate(
+        events=Count('pk'),
+        published_events=Count('pk', filter=Q(status='published')),
+    )
+
+
+def _ensure(model, lookup):
+    model.objects.bulk_create([model(**lookup)], ignore_conflicts=True)
+
+
+def _nonzero(deltas):
+    return {field: value for field, value in deltas.items() if value}
+
+
+def event_state(event_id):
+    """The stored (host_id, status) of an event, or None if it isn't saved yet."""
+    if event_id is None:
+        return None
+    return Event.objects.filter(pk=event_id).values_list('host_id', 'status').first()
+
+
+def _count_events(changes, create=True):
+    """Apply (state, +1/-1) changes, where a state is (host_id, status), to the host and platform rows."""
+    by_host = {}
+    for state, sign in changes:
+        if state is None:
+            continue
+        host_id, status = state
+        deltas = by_host.setdefault(host_id, Counter())
+        deltas['events'] += sign
+        deltas['published_events'] += sign if status == 'published' else 0
+    platform = Counter()
+    for host_id, deltas in by_host.items():
+        deltas = _nonzero(deltas)
+        if deltas and host_id is not None:
+            _bump(HostStats, {'host_id': host_id}, create=create, **deltas)
+        platform.update(deltas)
+    if _nonzero(platform):
+        _bump(PlatformStats, {'pk': PLATFORM_PK}, create=create, **_nonzero(platform))
+
+
+def event_saved(event, before):
+    """Count a saved event, given its event_state() `before` the save."""
+    _count_events([(before, -1), ((event.host_id, event.status), 1)])
+
+
+def event_deleted(event):
+    # Never create rows here: the host may be part of the same cascade delete
+    _count_events([((event.host_id, event.status), -1)], create=False)
+
+
+def _user_counts():
+    return User.objects.aggregate(
+        users=Count('pk'),
+        artists=Count('pk', filter=Q(is_artist=True)),
+        hosts=Count('pk', filter=Q(is_host=True)),
+    )
+
+
+def user_state(user_id):
+    """The stored (is_artist, is_host) of a user, or None if they aren't saved yet."""
+    if user_id is None:
+        return None
+    return User.objects.filter(pk=user_id).values_list('is_artist', 'is_host').first()
+
+
+def _count_users(changes, create=True):
+    deltas = Counter()
+    for state, sign in changes:
+        if state is None:
+            continue
+        is_artist, is_host = state
+        deltas['users'] += sign
+        deltas['artists'] += sign if is_artist else 0
+        deltas['hosts'] += sign if is_host else 0
+    if _nonzero(deltas):
+        _bump(PlatformStats, {'pk': PLATFORM_PK}, create=create, **_nonzero(deltas))
+
+
+def user_saved(user, before):
+    """Count a saved user, given their user_state() `before` the save."""
+    _count_users([(before, -1), ((user.is_artist, user.is_host), 1)])
+
+
+def user_deleted(user):
+    _count_users([((user.is_artist, user.is_host), -1)], create=False)
+
+
+def _booking_totals(queryset, key):
+    return {
+        row[key]: row for row in queryset.values(key).annotate(
+            bookings=Count('pk'),
+            confirmed_bookings=Count('pk', filter=Q(status='confirmed')),
+            tickets_sold=Sum('quantity', filter=Q(status='confirmed')),
+            revenue=Sum('total_price', filter=Q(status='confirmed')),
+        )
+    }
+
+
+def _totals(row, fields):
+    return {field: (row or {}).get(field) or 0 for field in fields}
+
+
+def rebuild_stats():
+    """Recompute every stats row from the underlying tables. Returns (events, hosts)."""
+    booking_fields = ('bookings', 'confirmed_bookings', 'revenue')
+    by_event = _booking_totals(Booking.objects.all(), 'event_id')
+    by_host = _booking_totals(Booking.objects.all(), 'event__host_id')
+    events_by_host = {
+        row['host_id']: row for row in Event.objects.values('host_id').annotate(
+            events=Count('pk'), published_events=Count('pk', filter=Q(status='published')),
+        )
+    }
+
+    event_ids = list(Event.objects.values_list('pk', flat=True))
+    hosts = set(by_host) | set(events_by_host)
+    platform = Booking.objects.aggregate(
+        bookings=Count('pk'),
+        confirmed_bookings=Count('pk', filter=Q(status='confirmed')),
+        revenue=Sum('total_price', filter=Q(status='confirmed')),
+    )
+    platform['revenue'] = platform['revenue'] or Decimal('0.00')
+
+    with transaction.atomic():
+        EventStats.objects.all().delete()
+        EventStats.objects.bulk_create([
+            EventStats(event_id=event_id, **_totals(by_event.get(event_id), booking_fields + ('tickets_sold',)))
+            for event_id in event_ids
+        ], batch_size=500)
+
+        HostStats.objects.all().delete()
+        HostStats.objects.bulk_create([
+            HostStats(
+                host_id=host_id,
+                **_totals(by_host.get(host_id), booking_fields),
+                **_totals(events_by_host.get(host_id), ('events', 'published_events')),
+            )
+            for host_id in hosts
+        ], batch_size=500)
+
+        PlatformStats.objects.update_or_create(
+            pk=PLATFORM_PK,
+            defaults={**platform, **_user_counts(), **_event_counts(Event.objects.all())},
+        )
+    return len(event_ids), len(hosts)
+
+
+def host_stats(host):
+    """The host's stats row (unsaved and zeroed if they have none yet)."""
+    return HostStats.objects.filter(host=host).first() or HostStats(host=host)
+
+
+def event_stats(event):
+    return EventStats.objects.filter(event=event).first() or EventStats(event=event)
+
+
+def platform_stats():
+    return PlatformStats.objects.filter(pk=PLATFORM_PK).first() or PlatformStats(pk=PLATFORM_PK)
@@ -0,0 +1,50 @@
+from django import template
+from django.core.cache import cache
+
+from core.fragments import fragment_key, fragment_timeout
+
+register = template.Library()
+
+
+class CacheFragmentNode(template.Node):
+    def __init__(self, nodelist, name, per_user, namespaces):
+        self.nodelist = nodelist
+        self.name = name
+        self.per_user = per_user
+        self.namespaces = namespaces
+
+    def render(self, context):
+        user = context.get('user')
+        key = fragment_key(self.name.resolve(context), user, self.per_user, self.namespaces)
+        content = cache.get(key)
+        if content is None:
+            content = self.nodelist.render(context)
+            cache.set(key, content, fragment_timeout())
+        return content
+
+
+@register.tag
+def cachefragment(parser, token):
+    """
+    Cache the enclosed template for the current user's role, and per user
+    with `per_user`. Extra quoted arguments are listing namespaces the
+    fragment depends on:
+
+        {% cachefragment "dashboard_favorites" per_user "events" %}...{% endcachefragment %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' needs a fragment name")
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+
+    per_user = False
+    namespaces = []
+    for bit in bits[2:]:
+        if bit == 'per_user':
+            per_user = True
+        elif bit[0] == bit[-1] and bit[0] in ('"', "'"):
+            namespaces.append(bit[1:-1])
+        else:
+            raise template.TemplateSyntaxError(f"'{bits[0]}' got an unknown argument: {bit}")
+    return CacheFragmentNode(nodelist, parser.compile_filter(bits[1]), per_user, namespaces)
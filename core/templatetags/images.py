@@ -0,0 +1,31 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from core.images import load_manifest, srcset
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw', **attrs):
+    """
+    An <img> for an image field, wrapped in a <picture> with WebP and JPEG
+    srcsets once its renditions exist (see core/images.py). Other keyword
+    arguments become attributes of the <img>:
+
+        {% responsive_image artist.profile_image alt=artist.stage_name sizes="150px" class="avatar" %}
+    """
+    if not image:
+        return ''
+    extra = format_html_join('', ' {}="{}"', attrs.items())
+    manifest = load_manifest(image.name)
+    webp, jpeg = srcset(manifest, 'webp'), srcset(manifest, 'jpeg')
+    if not webp:
+        return format_html('<img src="{}" alt="{}"{}>', image.url, alt, extra)
+    return format_html(
+        '<picture class="responsive-image">'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}"{}>'
+        '</picture>',
+        webp, sizes, image.url, jpeg, sizes, alt, extra,
+    )
@@ -0,0 +1,40 @@
+"""
+Test helpers for catching N+1 queries.
+
+    class MyTests(QueryScalingMixin, TestCase):
+        def test_event_list(self):
+            self.assertQueriesDoNotScale(
+                lambda: self.client.get(url),
+                lambda n: [make_event(host) for _ in range(n)],
+            )
+
+The page is requested once, `add_rows(n)` adds more rows, and the page is
+requested again; the test fails if the second request ran more queries.
+The listing cache is cleared before each request so both hit the database.
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryScalingMixin:
+    scaling_rows = 3
+
+    def _count_queries(self, fetch):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = fetch()
+        status = getattr(response, 'status_code', 200)
+        self.assertLess(status, 400, f'Request failed with status {status}')
+        return context.captured_queries
+
+    def assertQueriesDoNotScale(self, fetch, add_rows, rows=None):
+        """Fail if `fetch` runs more queries after `add_rows(rows)` than before."""
+        before = self._count_queries(fetch)
+        add_rows(rows or self.scaling_rows)
+        after = self._count_queries(fetch)
+        if len(after) > len(before):
+            queries = '\n'.join(f'{i}. {q["sql"]}' for i, q in enumerate(after, 1))
+            self.fail(
+                f'Query count grew from {len(before)} to {len(after)} with more rows:\n{queries}'
+            )
@@ -1,3 +1,603 @@
-from django.test import TestCase
+import io
+import json
+import shutil
+import tempfile
+import threading
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.template import Context, Template
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from events.models import Event, EventCategory, Booking, EventFavorite
+from events.inventory import confirm_booking, create_held_booking, reserve_seats
+from artists.models import ArtistProfile, Follow, Reel
+from PIL import Image
+from .counters import CounterBuffer
+from .fragments import fragment_key, user_version
+from .images import load_manifest
+from .jobs import claim, job, requeue_stale, run_pending, run_worker, worker_name
+from .live import LiveFeed, stream
+from .models import EventStats, HostStats, Job, Notification, PlatformStats, SearchDocument
+from .notifications import mark_read, notify_followers, unread_count
+from .pagination import KeysetPaginator
+from .testing import QueryScalingMixin
+from .search import rebuild_index, search_documents
+from .stats import rebuild_stats
+from .typeahead import PrefixIndex, typeahead_index
+
+User = get_user_model()
+
+
+def make_event(host, **kwargs):
+    start = timezone.now() + timezone.timedelta(days=7)
+    defaults = {
+        'title': 'Lagos Live',
+        'description': 'A night of music',
+        'short_description': 'Music',
+        'host': host,
+        'venue_name': 'Eko Hall',
+        'venue_address': '1 Marina',
+        'city': 'Lagos',
+        'state': 'Lagos',
+        'start_date': start,
+        'end_date': start + timezone.timedelta(hours=4),
+        'ticket_price': 5000,
+        'available_tickets': 100,
+        'status': 'published',
+    }
+    defaults.update(kwargs)
+    return Event.objects.create(**defaults)
+
+
+class CounterBufferTests(TestCase):
+    def setUp(self):
+        host = User.objects.create_user(username='host', email='host@example.com', password='pass')
+        self.event = make_event(host)
+
+    def test_increments_are_buffered_until_flush(self):
+        buffer = CounterBuffer(flush_interval=3600, flush_threshold=1000)
+        for _ in range(3):
+            buffer.incr(self.event)
+        self.assertEqual(buffer.current(self.event), 3)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.view_count, 0)
+
+        with self.assertNumQueries(1):
+            buffer.flush()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.view_count, 3)
+        self.assertEqual(buffer.pending(self.event), 0)
+
+    def test_threshold_triggers_flush(self):
+        buffer = CounterBuffer(flush_interval=3600, flush_threshold=2)
+        buffer.incr(self.event)
+        buffer.incr(self.event)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.view_count, 2)
+
+    def test_timer_flushes_without_more_traffic(self):
+        buffer = CounterBuffer(flush_interval=0.05, flush_threshold=1000)
+        flushed = threading.Event()
+        with mock.patch.object(buffer, 'flush', side_effect=lambda: flushed.set()):
+            buffer.incr(self.event)
+            self.assertTrue(flushed.wait(2))
+        # Write the count here, so the timer finds the buffer empty and stops
+        timer = buffer._timer
+        buffer.flush()
+        timer.join(2)
+        self.assertFalse(timer.is_alive())
+
+
+class ListingCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.host = User.objects.create_user(username='host', email='host@example.com', password='pass')
+        self.event = make_event(self.host, is_featured=True)
+
+    def test_listing_served_from_cache_until_model_changes(self):
+        url = reverse('events:featured_events')
+        first = self.client.get(url)
+        self.assertContains(first, 'Lagos Live')
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        self.event.title = 'Abuja Live'
+        self.event.save()
+        self.assertContains(self.client.get(url), 'Abuja Live')
+
+    def test_counter_only_saves_keep_cache(self):
+        url = reverse('core:home')
+        self.client.get(url)
+        self.event.share_count += 1
+        self.event.save(update_fields=['share_count'])
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_anonymous_and_authenticated_variants_are_separate(self):
+        url = reverse('events:event_list')
+        self.client.get(url)
+        self.client.login(email='host@example.com', password='pass')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj'].object_list), 1)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username='host', email='host@example.com', password='pass')
+        self.match = make_event(self.host, title='Afrobeats Festival', description='Live bands')
+        self.body_match = make_event(self.host, title='Sunday Jam', description='Afrobeats all night')
+        make_event(self.host, title='Comedy Night', description='Stand-up')
+        make_event(self.host, title='Afrobeats Draft', status='draft')
+
+    def test_index_follows_saves_and_deletes(self):
+        self.assertEqual(SearchDocument.objects.filter(doc_type='event').count(), 4)
+        self.match.title = 'Highlife Festival'
+        self.match.save()
+        self.assertEqual(list(search_documents('highlife', 'event').values_list('object_id', flat=True)), [self.match.pk])
+        self.match.delete()
+        self.assertFalse(search_documents('highlife', 'event').exists())
+
+    def test_title_matches_rank_first_and_drafts_are_hidden(self):
+        ids = list(search_documents('afrobeat', 'event').values_list('object_id', flat=True))
+        self.assertEqual(ids, [self.match.pk, self.body_match.pk])
+
+    def test_search_view_paginates_each_type(self):
+        user = User.objects.create_user(username='dj', email='dj@example.com', password='pass')
+        ArtistProfile.objects.create(user=user, stage_name='Afrobeats DJ', bio='', genre='Afrobeats')
+        response = self.client.get(reverse('core:search'), {'q': 'afrobeats'})
+        self.assertEqual(response.context['total_results'], 3)
+        self.assertEqual(response.context['events_page'].paginator.count, 2)
+        self.assertEqual([a.stage_name for a in response.context['artists']], ['Afrobeats DJ'])
+
+    def test_rebuild_index(self):
+        SearchDocument.objects.all().delete()
+        self.assertEqual(rebuild_index(), 4)
+        self.assertEqual(search_documents('comedy', 'event').count(), 1)
+
+
+class TypeaheadTests(TestCase):
+    def setUp(self):
+        host = User.objects.create_user(username='host', email='host@example.com', password='pass')
+        self.event = make_event(host, title='Lagos Jazz Festival', view_count=50)
+        make_event(host, title='Jazz Brunch', city='Abuja', view_count=5)
+        user = User.objects.create_user(username='dj', email='dj@example.com', password='pass')
+        ArtistProfile.objects.create(user=user, stage_name='Jazzy Joe', bio='', genre='Jazz', follower_count=20)
+
+    def test_matches_word_starts_ranked_by_weight(self):
+        index = PrefixIndex(rebuild_seconds=3600)
+        labels = [s['label'] for s in index.suggest('jaz')]
+        self.assertEqual(labels, ['Lagos Jazz Festival', 'Jazzy Joe', 'Jazz Brunch', 'Jazz'])
+        self.assertEqual([s['type'] for s in index.suggest('abu')], ['city'])
+        with self.assertNumQueries(0):
+            index.suggest('fest')
+
+    def test_incremental_updates(self):
+        index = PrefixIndex(rebuild_seconds=3600)
+        index.build()
+        self.event.title = 'Highlife Night'
+        self.event.city = 'Ibadan'
+        index.update(self.event)
+        self.assertEqual(index.suggest('lagos jazz'), [])
+        self.assertEqual([s['label'] for s in index.suggest('ibad')], ['Ibadan'])
+        index.remove(self.event)
+        self.assertEqual(index.suggest('high'), [])
+        self.assertEqual(index.suggest('ibad'), [])
+
+    def test_best_match_found_past_many_weaker_ones(self):
+        index = PrefixIndex(rebuild_seconds=3600)
+        index.build()
+        with index._lock:
+            for i in range(600):
+                index._add_suggestion(('filler', i), 'event', f'Ja {i:03d}', '/', 0)
+            index._add_suggestion(('filler', 'top'), 'event', 'Jazzzz', '/', 10_000)
+        self.assertEqual(index.suggest('ja', 1)[0]['label'], 'Jazzzz')
+        self.assertEqual(index.suggest('jazz', 1)[0]['label'], 'Jazzzz')
+
+    def test_stale_index_rebuilds_off_the_request(self):
+        index = PrefixIndex(rebuild_seconds=0)
+        index.build()
+        with mock.patch('core.typeahead.threading.Thread') as thread, self.assertNumQueries(0):
+            self.assertEqual(index.suggest('jazzy')[0]['label'], 'Jazzy Joe')
+            index.suggest('jazzy')
+        thread.assert_called_once_with(target=index._rebuild_in_background, name='typeahead-rebuild', daemon=True)
+
+    def test_autocomplete_endpoint(self):
+        typeahead_index.build()
+        response = self.client.get(reverse('autocomplete'), {'q': 'jazzy', 'limit': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['url'], '/artists/jazzy-joe/')
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        host = User.objects.create_user(username='host', email='host@example.com', password='pass')
+        start = timezone.now() + timezone.timedelta(days=3)
+        # Shared start dates force the id tiebreak
+        self.events = [
+            make_event(host, title=f'Show {i}', start_date=start + timezone.timedelta(days=i // 2))
+            for i in range(7)
+        ]
+
+    def test_walks_forward_and_back_without_gaps(self):
+        paginator = KeysetPaginator(Event.objects.all(), 3, ('start_date', 'id'), count='approximate')
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        third = paginator.page(second.next_cursor)
+        seen = [e.pk for page in (first, second, third) for e in page]
+        self.assertEqual(seen, [e.pk for e in self.events])
+        self.assertFalse(third.has_next())
+        self.assertEqual(first.count, 7)
+
+        back = paginator.page(third.previous_cursor)
+        self.assertEqual([e.pk for e in back], [e.pk for e in second])
+        self.assertTrue(back.has_next() and back.has_previous())
+        self.assertFalse(paginator.page(back.previous_cursor).has_previous())
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        paginator = KeysetPaginator(Event.objects.all(), 3, ('start_date', 'id'))
+        self.assertEqual(len(paginator.page('not-a-cursor')), 3)
+
+    def test_listing_view_follows_cursor_and_keeps_filters(self):
+        for i in range(6):
+            make_event(self.events[0].host, title=f'Encore {i}')
+        url = reverse('events:event_list')
+        first = self.client.get(url, {'price': 'paid'}).context['page_obj']
+        self.assertEqual(len(first), 12)
+        self.assertIn('price=paid', first.next_query)
+        last = self.client.get(url + first.next_query).context['page_obj']
+        self.assertEqual(len(last), 1)
+        self.assertFalse(last.has_next())
+
+
+class QueryScalingTests(QueryScalingMixin, TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username='host', email='host@example.com', password='pass')
+        self.category = EventCategory.objects.create(name='Concerts', slug='concerts')
+        self.artist = ArtistProfile.objects.create(user=self.host, stage_name='Host Band', genre='Jazz')
+        self.created = 0
+
+    def add_events(self, n):
+        for _ in range(n):
+            self.created += 1
+            user = User.objects.create_user(
+                username=f'user{self.created}', email=f'user{self.created}@example.com', password='pass'
+            )
+            event = make_event(user, title=f'Show {self.created}', category=self.category, is_featured=True)
+            Booking.objects.create(event=event, user=self.host, quantity=1, unit_price=event.ticket_price)
+            EventFavorite.objects.create(event=event, user=self.host)
+            artist = ArtistProfile.objects.create(user=user, stage_name=f'Artist {self.created}', genre='Jazz')
+            Reel.objects.create(artist=artist, title=f'Reel {self.created}', status='published')
+            Reel.objects.create(artist=self.artist, title=f'Jam {self.created}', status='published')
+
+    def test_public_listings(self):
+        self.add_events(1)
+        for url in [
+            reverse('core:home'),
+            reverse('events:event_list'),
+            reverse('events:featured_events'),
+            reverse('artists:artist_list'),
+            reverse('artists:artist_reels', args=[self.artist.slug]),
+            reverse('core:search') + '?q=show',
+            reverse('events-list'),
+        ]:
+            with self.subTest(url=url):
+                self.assertQueriesDoNotScale(lambda: self.client.get(url), self.add_events)
+
+    def test_account_pages(self):
+        self.client.login(email='host@example.com', password='pass')
+        self.add_events(1)
+        for url in [reverse('accounts:my_bookings'), reverse('bookings-list')]:
+            with self.subTest(url=url):
+                self.assertQueriesDoNotScale(lambda: self.client.get(url), self.add_events)
+
+
+class StatsTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username='host', email='host@example.com', password='pass', is_host=True)
+        self.buyer = User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+        self.event = make_event(self.host)
+        make_event(self.host, title='Draft', status='draft')
+
+    def snapshot(self):
+        event = EventStats.objects.get(event=self.event)
+        host = HostStats.objects.get(host=self.host)
+        platform = PlatformStats.objects.get()
+        return (
+            (event.bookings, event.confirmed_bookings, event.tickets_sold, event.revenue),
+            (host.events, host.published_events, host.bookings, host.confirmed_bookings, host.revenue),
+            (platform.users, platform.hosts, platform.events, platform.bookings, platform.revenue),
+        )
+
+    def test_counters_follow_bookings(self):
+        confirm_booking(create_held_booking(self.event, self.buyer, 2))
+        create_held_booking(self.event, self.buyer, 1)
+        expected = ((2, 1, 2, 10000), (2, 1, 2, 1, 10000), (2, 1, 2, 2, 10000))
+        self.assertEqual(self.snapshot(), expected)
+
+        Booking.objects.filter(status='pending').delete()
+        self.assertEqual(self.snapshot()[1], (2, 1, 1, 1, 10000))
+
+    def test_event_and_user_changes_apply_deltas(self):
+        draft = Event.objects.get(title='Draft')
+        draft.status = 'published'
+        draft.save()
+        self.buyer.is_artist = True
+        self.buyer.save()
+        host = HostStats.objects.get(host=self.host)
+        platform = PlatformStats.objects.get()
+        self.assertEqual((host.events, host.published_events), (2, 2))
+        self.assertEqual((platform.users, platform.artists, platform.events, platform.published_events), (2, 1, 2, 2))
+
+        self.event.delete()
+        self.buyer.delete()
+        host.refresh_from_db()
+        platform.refresh_from_db()
+        self.assertEqual((host.events, host.published_events), (1, 1))
+        self.assertEqual((platform.users, platform.artists, platform.events, platform.published_events), (1, 0, 1, 1))
+
+    def test_saves_do_not_recount_tables(self):
+        self.event.title = 'Renamed'
+        with CaptureQueriesContext(connection) as queries:
+            self.event.save()
+            self.buyer.save()
+        self.assertFalse([q['sql'] for q in queries if 'COUNT(' in q['sql']])
+
+    def test_rebuild_repairs_drift(self):
+        confirm_booking(create_held_booking(self.event, self.buyer, 2))
+        expected = self.snapshot()
+        HostStats.objects.update(bookings=99, revenue=0)
+        EventStats.objects.all().delete()
+        rebuild_stats()
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_host_dashboard_reads_stats(self):
+        confirm_booking(create_held_booking(self.event, self.buyer, 2))
+        self.client.force_login(self.host)
+        response = self.client.get(reverse('accounts:host_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [response.context[key] for key in ('total_events', 'published_events', 'total_bookings', 'total_revenue')],
+            [2, 1, 1, 10000],
+        )
+
+
+calls = []
+
+
+@job(queue='email', max_attempts=2)
+def record_call(user, note):
+    calls.append((user, note))
+
+
+@job()
+def always_fails():
+    raise ConnectionError('SMTP down')
+
+
+class JobTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.user = User.objects.create_user(username='fan', email='fan@example.com', password='pass')
+
+    def test_job_runs_with_model_arguments(self):
+        record_call.delay(self.user, {'owner': self.user})
+        self.assertEqual(calls, [])
+        self.assertEqual(run_pending(), {'done': 1})
+        self.assertEqual(calls, [(self.user, {'owner': self.user})])
+
+    def test_failures_back_off_then_dead_letter(self):
+        queued = always_fails.delay()
+        self.assertEqual(run_pending(), {'retry': 1})
+        queued.refresh_from_db()
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertEqual(run_pending(), {})  # not due yet
+
+        Job.objects.update(run_at=timezone.now(), attempts=4)
+        self.assertEqual(run_pending(), {'dead': 1})
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.last_error), ('dead', 'ConnectionError: SMTP down'))
+
+    def test_stale_jobs_of_other_workers_are_requeued(self):
+        ours, theirs = record_call.delay(self.user, 'a'), record_call.delay(self.user, 'b')
+        long_ago = timezone.now() - timezone.timedelta(hours=1)
+        Job.objects.filter(pk=ours.pk).update(status='running', locked_by='w1', locked_at=long_ago, attempts=1)
+        Job.objects.filter(pk=theirs.pk).update(status='running', locked_by='w2', locked_at=long_ago, attempts=1)
+        self.assertEqual(requeue_stale(exclude_worker='w1'), 1)
+        self.assertEqual(Job.objects.get(pk=ours.pk).status, 'running')
+        self.assertEqual(Job.objects.get(pk=theirs.pk).status, 'queued')
+
+    def test_worker_requeues_stale_jobs_while_running(self):
+        stop = threading.Event()
+        with mock.patch('core.jobs.requeue_stale', side_effect=lambda **kwargs: stop.set() or 0) as requeue:
+            run_worker(concurrency=1, interval=0, stop=stop, requeue_every=0)
+        requeue.assert_called_once_with(exclude_worker=worker_name())
+
+    @override_settings(JOB_QUEUE_CONCURRENCY={'email': 1})
+    def test_queue_concurrency_limit(self):
+        for note in ('a', 'b'):
+            record_call.delay(self.user, note)
+        self.assertEqual(len(claim('w1', limit=5)), 1)
+        self.assertEqual(claim('w2', limit=5), [])
+
+
+class NotificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        singer = User.objects.create_user(username='singer', email='singer@example.com', password='pass')
+        self.artist = ArtistProfile.objects.create(user=singer, stage_name='Singer', genre='Afrobeats')
+        self.fans = [
+            User.objects.create_user(username=f'fan{i}', email=f'fan{i}@example.com', password='pass')
+            for i in range(5)
+        ]
+        Follow.objects.bulk_create([Follow(artist=self.artist, follower=fan) for fan in self.fans])
+
+    @override_settings(NOTIFICATION_FANOUT_CHUNK=2)
+    def test_publishing_fans_out_to_followers_in_chunks(self):
+        fan = self.fans[0]
+        self.assertEqual(unread_count(fan), 0)
+        reel = Reel.objects.create(artist=self.artist, title='New single', status='published')
+        reel = Reel.objects.select_related('artist__user').get(pk=reel.pk)
+
+        with self.assertNumQueries(4):  # follower ids, then one INSERT per chunk of two
+            self.assertEqual(notify_followers(reel), 5)
+        self.assertEqual(Notification.objects.filter(object_id=reel.pk, object_type='reel').count(), 5)
+        self.assertEqual(unread_count(fan), 1)  # cached 0 was dropped by the fan-out
+
+    def test_unread_count_is_cached_until_read(self):
+        fan = self.fans[0]
+        notes = Notification.objects.bulk_create([
+            Notification(recipient=fan, notification_type='system', title=f'Note {i}', message='')
+            for i in range(3)
+        ])
+        self.assertEqual(unread_count(fan), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(fan), 3)
+
+        self.assertEqual(mark_read(fan, [notes[0].pk]), 1)
+        self.assertEqual(unread_count(fan), 2)
+
+        self.client.force_login(fan)
+        response = self.client.post(reverse('core:notifications_mark_read'))
+        self.assertEqual(response.json(), {'success': True, 'updated': 2, 'unread': 0})
+
+
+class LiveUpdateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.host = User.objects.create_user(username='host', email='host@example.com', password='pass')
+        self.event = make_event(self.host)
+
+    def reserve(self, times):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(times):
+                reserve_seats(self.event, 1)
+
+    @override_settings(SSE_MAX_UPDATES_PER_SECOND=20)
+    def test_changes_within_a_tick_are_coalesced(self):
+        feed = LiveFeed(user_id=self.host.pk, event_ids=[self.event.pk])
+
+        async def scenario():
+            messages = stream(feed, max_seconds=5)
+            retry, snapshot = await anext(messages), await anext(messages)
+            await sync_to_async(self.reserve)(5)
+            update = await anext(messages)
+            await messages.aclose()
+            return retry, snapshot, update
+
+        retry, snapshot, update = async_to_sync(scenario)()
+        self.assertTrue(retry.startswith('retry:'))
+        self.assertIn('"tickets":{"%d":100}' % self.event.pk, snapshot)
+        self.assertIn('"unread":0', snapshot)
+        # Five reservations, one message carrying only the latest count
+        self.assertEqual(update, 'event: update\ndata: {"tickets":{"%d":95}}\n\n' % self.event.pk)
+
+    def test_poll_sends_only_what_changed(self):
+        feed = LiveFeed(user_id=self.host.pk, event_ids=[self.event.pk])
+        feed.poll()
+        self.assertEqual(feed.poll(), {})
+        Notification.objects.create(recipient=self.host, notification_type='system', title='Hello', message='')
+        changes = feed.poll()
+        self.assertEqual(list(changes), ['notifications'])
+        self.assertEqual((changes['notifications']['unread'], changes['notifications']['latest'][0]['title']), (1, 'Hello'))
+
+    def test_unpublished_events_are_not_streamed(self):
+        draft = make_event(self.host, title='Draft', status='draft')
+        feed = LiveFeed(event_ids=[self.event.pk, draft.pk])
+        self.assertEqual(list(feed.poll()['tickets']), [str(self.event.pk)])
+
+    def test_wsgi_requests_get_one_snapshot(self):
+        response = self.client.get(reverse('core:live_updates'), {'event': self.event.pk})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        retry, message = response.content.decode().strip().split('\n\n')
+        self.assertEqual(retry, 'retry: 5000')
+        self.assertEqual(json.loads(message.split('data: ')[1]), {'tickets': {str(self.event.pk): 100}})
+        self.assertEqual(self.client.get(reverse('core:live_updates')).status_code, 400)
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.fan = User.objects.create_user(username='fan', email='fan@example.com', password='pass')
+        self.event = make_event(self.fan)
+        self.client.force_login(self.fan)
+        self.url = reverse('accounts:user_dashboard')
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        return len(queries)
+
+    def test_repeat_dashboard_skips_cached_sections(self):
+        first = self.count_queries()
+        self.assertLess(self.count_queries(), first)
+
+    def test_favoriting_rebuilds_the_users_fragments(self):
+        self.client.get(self.url)
+        version = user_version(self.fan.pk)
+        EventFavorite.objects.create(event=self.event, user=self.fan)
+        self.assertGreater(user_version(self.fan.pk), version)
+        self.assertContains(self.client.get(self.url), self.event.title)
+
+    def test_users_with_the_same_role_share_navigation(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='pass')
+        self.assertEqual(fragment_key('nav_user_menu', self.fan), fragment_key('nav_user_menu', other))
+        self.assertNotEqual(
+            fragment_key('dashboard_settings', self.fan, per_user=True),
+            fragment_key('dashboard_settings', other, per_user=True),
+        )
+        self.assertNotEqual(fragment_key('nav_user_menu', self.fan), fragment_key('nav_user_menu', None))
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        overrides = override_settings(MEDIA_ROOT=self.media, IMAGE_DERIVATIVE_WIDTHS=[320, 640, 1600])
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        host = User.objects.create_user(username='host', email='host@example.com', password='pass')
+        self.event = make_event(host)
+
+    def upload(self, size, mode='RGB'):
+        buffer = io.BytesIO()
+        Image.new(mode, size, (200, 40, 40, 128) if mode == 'RGBA' else (200, 40, 40)).save(buffer, 'PNG')
+        self.event.image = SimpleUploadedFile('poster.png', buffer.getvalue(), content_type='image/png')
+        self.event.save()
+        return self.event.image.name
+
+    def render(self):
+        template = Template('{% load images %}{% responsive_image event.image alt=event.title class="hero" %}')
+        return template.render(Context({'event': self.event}))
+
+    def test_upload_queues_renditions_and_tag_emits_srcset(self):
+        name = self.upload((1200, 800), mode='RGBA')
+        self.assertEqual(self.render(), f'<img src="/media/{name}" alt="Lagos Live" class="hero">')
+
+        self.assertEqual(run_pending(queues=['images']), {'done': 1})
+        manifest = load_manifest(name)
+        self.assertEqual(sorted(manifest['renditions']['webp'], key=int), ['320', '640', '1200'])
+        with Image.open(f"{self.media}/{manifest['renditions']['jpeg']['320']}") as small:
+            self.assertEqual((small.format, small.size), ('JPEG', (320, 213)))
+
+        html = self.render()
+        self.assertIn('<source type="image/webp" srcset="/media/event_images/poster.renditions/320.webp 320w, ', html)
+        self.assertIn('1200.jpg 1200w" sizes="100vw" alt="Lagos Live" class="hero"></picture>', html)
+
+    def test_counter_saves_and_existing_renditions_queue_nothing(self):
+        self.upload((500, 500))
+        run_pending(queues=['images'])
+        self.event.view_count = 5
+        self.event.save(update_fields=['view_count'])
+        self.event.save()
+        self.assertFalse(Job.objects.filter(queue='images', status='queued').exists())
@@ -0,0 +1,250 @@
+"""
+In-memory prefix index for search-as-you-type suggestions.
+
+Suggestions (event titles, artist stage names, genres and cities) are
+indexed under the start of every word in their label and kept in one
+sorted list, so a lookup bisects to both ends of the typed prefix's range
+and ranks everything in it. Short prefixes match most of the index, so
+their top results are kept until the index next changes. No database query
+is made per keystroke.
+
+The index is built on first use, updated in place by the signal handlers
+in core/signals.py when an Event or ArtistProfile changes, and rebuilt
+every TYPEAHEAD_REBUILD_SECONDS to pick up changes made by other
+processes. Those rebuilds run in a background thread; requests keep using
+the current index until the new one is swapped in.
+"""
+import heapq
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from events.models import Event
+from artists.models import ArtistProfile
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+# Sorts after any character in a key, so (prefix + RANGE_END,) bounds a prefix's range
+RANGE_END = '\U0010ffff'
+# Top results are remembered for prefixes up to this long; longer ones match few keys
+TOP_PREFIX_LENGTH = 3
+
+
+def normalize(text):
+    return ' '.join(WORD_RE.findall((text or '').lower()))
+
+
+def prefix_keys(label):
+    """Index keys for `label`: the label from the start of each of its words."""
+    words = normalize(label).split(' ')
+    return {' '.join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+def search_url(term):
+    return f"{reverse('core:search')}?{urlencode({'q': term})}"
+
+
+def rank(suggestion):
+    return -suggestion['weight'], suggestion['label'].lower()
+
+
+class PrefixIndex:
+    """Sorted-array prefix index over weighted suggestions."""
+
+    def __init__(self, rebuild_seconds=None):
+        self._rebuild_seconds = rebuild_seconds
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._built_at = None
+        self._rebuilding = False
+        self._replay = None       # changes made while a build was loading, to apply after the swap
+        self._reset()
+
+    def _reset(self):
+        self._keys = []           # sorted (key, suggestion_id)
+        self._suggestions = {}    # suggestion_id -> dict(type, label, url, weight)
+        self._sources = {}        # ('event', pk) -> (suggestion_id, facet)
+        self._facets = Counter()  # ('city', 'lagos') -> number of sources using it
+        self._top = {}            # short prefix -> (top ranked suggestions, whether that is all of them)
+
+    @property
+    def rebuild_seconds(self):
+        if self._rebuild_seconds is not None:
+            return self._rebuild_seconds
+        return getattr(settings, 'TYPEAHEAD_REBUILD_SECONDS', 300)
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+    def _add_suggestion(self, suggestion_id, kind, label, url, weight):
+        self._suggestions[suggestion_id] = {'type': kind, 'label': label, 'url': url, 'weight': weight}
+        for key in prefix_keys(label):
+            insort(self._keys, (key, suggestion_id))
+
+    def _remove_suggestion(self, suggestion_id):
+        suggestion = self._suggestions.pop(suggestion_id, None)
+        if suggestion is None:
+            return
+        for key in prefix_keys(suggestion['label']):
+            i = bisect_left(self._keys, (key, suggestion_id))
+            if i < len(self._keys) and self._keys[i] == (key, suggestion_id):
+                del self._keys[i]
+
+    def _add_facet(self, kind, label):
+        facet = (kind, normalize(label))
+        if not facet[1]:
+            return None
+        self._facets[facet] += 1
+        if self._facets[facet] == 1:
+            self._add_suggestion(facet, kind, label.strip(), search_url(label.strip()), 1)
+        else:
+            self._suggestions[facet]['weight'] = self._facets[facet]
+        return facet
+
+    def _drop_facet(self, facet):
+        if facet is None:
+            return
+        self._facets[facet] -= 1
+        if self._facets[facet] <= 0:
+            del self._facets[facet]
+            self._remove_suggestion(facet)
+        else:
+            self._suggestions[facet]['weight'] = self._facets[facet]
+
+    @staticmethod
+    def _describe(instance):
+        """(source key, kind, label, weight, facet kind, facet label) or None if not suggestable."""
+        if isinstance(instance, Event):
+            if instance.status != 'published':
+                return None
+            return ('event', instance.pk), 'event', instance.title, instance.view_count, 'city', instance.city
+        if isinstance(instance, ArtistProfile):
+            return ('artist', instance.pk), 'artist', instance.stage_name, instance.follower_count, 'genre', instance.genre
+        return None
+
+    def _add_source(self, instance):
+        described = self._describe(instance)
+        if described is None:
+            return
+        source, kind, label, weight, facet_kind, facet_label = described
+        self._add_suggestion(source, kind, label, instance.get_absolute_url(), weight)
+        self._sources[source] = self._add_facet(facet_kind, facet_label)
+
+    def _remove_source(self, source):
+        if source in self._sources:
+            self._drop_facet(self._sources.pop(source))
+            self._remove_suggestion(source)
+
+    def build(self):
+        """Load every published event and artist profile from the database.
+
+        The new index is loaded without holding the lock and swapped in, so
+        lookups carry on against the old one meanwhile.
+        """
+        events = Event.objects.filter(status='published').only('pk', 'title', 'slug', 'status', 'view_count', 'city')
+        artists = ArtistProfile.objects.only('pk', 'stage_name', 'slug', 'follower_count', 'genre')
+        with self._build_lock:
+            with self._lock:
+                self._replay = []
+            fresh = PrefixIndex()
+            try:
+                for instance in list(events.iterator()) + list(artists.iterator()):
+                    fresh._add_source(instance)
+            except Exception:
+                with self._lock:
+                    self._replay = None
+                raise
+            with self._lock:
+                self._keys, self._suggestions = fresh._keys, fresh._suggestions
+                self._sources, self._facets, self._top = fresh._sources, fresh._facets, {}
+                # Signals that fired while loading may not be in what was read
+                for change, instance in self._replay:
+                    self._apply(change, instance)
+                self._replay = None
+                self._built_at = time.monotonic()
+
+    def _apply(self, change, instance):
+        kind = 'event' if isinstance(instance, Event) else 'artist'
+        self._remove_source((kind, instance.pk))
+        if change == 'update':
+            self._add_source(instance)
+        self._top = {}
+
+    def _change(self, change, instance):
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((change, instance))
+            if self.is_built:
+                self._apply(change, instance)
+
+    def update(self, instance):
+        """Re-index a saved Event or ArtistProfile. No-op until the index is built."""
+        self._change('update', instance)
+
+    def remove(self, instance):
+        self._change('remove', instance)
+
+    def _rebuild_in_background(self):
+        try:
+            self.build()
+        except Exception:
+            logger.exception('Typeahead index rebuild failed')
+        finally:
+            close_old_connections()
+            with self._lock:
+                self._rebuilding = False
+
+    def ensure_fresh(self):
+        """Build the index if it never was; start a background rebuild if it is stale."""
+        if self._built_at is None:
+            # Nothing to serve yet, so the first lookup in a process waits for the build
+            with self._build_lock:
+                built = self.is_built
+            if not built:
+                self.build()
+            return
+        if time.monotonic() - self._built_at < self.rebuild_seconds:
+            return
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild_in_background, name='typeahead-rebuild', daemon=True).start()
+
+    def _matches(self, prefix, limit):
+        """(top `limit` matches, whether there are no others), best first."""
+        start = bisect_left(self._keys, (prefix,))
+        end = bisect_left(self._keys, (prefix + RANGE_END,), start)
+        ids = {suggestion_id for _, suggestion_id in self._keys[start:end]}
+        top = heapq.nsmallest(limit, (self._suggestions[sid] for sid in ids), key=rank)
+        return top, len(top) == len(ids)
+
+    def suggest(self, prefix, limit=8):
+        """Top `limit` suggestions whose label has a word starting with `prefix`."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        self.ensure_fresh()
+        with self._lock:
+            if len(prefix) > TOP_PREFIX_LENGTH:
+                matches, _ = self._matches(prefix, limit)
+            else:
+                cached = self._top.get(prefix)
+                if cached is None or (len(cached[0]) < limit and not cached[1]):
+                    cached = self._matches(prefix, max(limit, getattr(settings, 'TYPEAHEAD_MAX_RESULTS', 10)))
+                    self._top[prefix] = cached
+                matches = cached[0][:limit]
+            return [dict(s) for s in matches]
+
+
+typeahead_index = PrefixIndex()
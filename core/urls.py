@@ -10,5 +10,8 @@ urlpatterns = [
     path('faq/', views.faq, name='faq'),
     path('search/', views.search, name='search'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('notifications/unread/', views.notifications_unread, name='notifications_unread'),
+    path('notifications/mark-read/', views.notifications_mark_read, name='notifications_mark_read'),
+    path('live/', views.live_updates, name='live_updates'),
     path('accounts/', include('accounts.urls')),
 ]
\ No newline at end of file
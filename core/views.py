@@ -1,15 +1,27 @@
 from django.shortcuts import render, redirect
+from django.template.response import TemplateResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
+from django.core.paginator import Paginator
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from django.views.decorators.http import require_POST
 from django.views.generic import ListView
 from django.utils.decorators import method_decorator
 from events.models import Event
 from artists.models import ArtistProfile, Reel
 from .models import FAQ, ContactMessage, SiteConfiguration
+from .aio import gather_queries
+from .cache import cache_listing
+from .live import LiveFeed, format_message, stream
+from .notifications import mark_read, unread_count
+from .search import load_results, search_documents
 
-def home(request):
-    """Home page with featured events and artists"""
+@cache_listing('events', 'artists', 'reels')
+async def home(request):
+    """Home page with featured events and artists (its three queries run concurrently)"""
     featured_events = Event.objects.filter(
         status='published',
         is_featured=True,
@@ -22,14 +34,14 @@ def home(request):
     
     popular_reels = Reel.objects.filter(
         status='published'
-    ).order_by('-view_count')[:8]
+    ).select_related('artist').order_by('-view_count')[:8]
     
-    context = {
-        'featured_events': featured_events,
-        'featured_artists': featured_artists,
-        'popular_reels': popular_reels,
-    }
-    return render(request, 'core/home.html', context)
+    context = await gather_queries(
+        featured_events=featured_events,
+        featured_artists=featured_artists,
+        popular_reels=popular_reels,
+    )
+    return TemplateResponse(request, 'core/home.html', context)
 
 def about(request):
     """About page"""
@@ -74,47 +86,31 @@ def faq(request):
     }
     return render(request, 'core/faq.html', context)
 
+SEARCH_RESULTS_PER_PAGE = 10
+SEARCH_TYPES = [('events', 'event'), ('artists', 'artist'), ('reels', 'reel')]
+
 def search(request):
     """Global search functionality"""
-    query = request.GET.get('q', '')
+    query = request.GET.get('q', '').strip()
     search_type = request.GET.get('type', 'all')
     
-    events = []
-    artists = []
-    reels = []
-    
-    if query:
-        if search_type in ['all', 'events']:
-            events = Event.objects.filter(
-                Q(title__icontains=query) |
-                Q(description__icontains=query) |
-                Q(short_description__icontains=query) |
-                Q(venue_name__icontains=query) |
-                Q(category__name__icontains=query)
-            ).filter(status='published').distinct()
-        
-        if search_type in ['all', 'artists']:
-            artists = ArtistProfile.objects.filter(
-                Q(stage_name__icontains=query) |
-                Q(bio__icontains=query) |
-                Q(genre__icontains=query)
-            ).distinct()
-        
-        if search_type in ['all', 'reels']:
-            reels = Reel.objects.filter(
-                Q(title__icontains=query) |
-                Q(description__icontains=query) |
-                Q(artist__stage_name__icontains=query)
-            ).filter(status='published').distinct()
-    
     context = {
         'query': query,
         'search_type': search_type,
-        'events': events,
-        'artists': artists,
-        'reels': reels,
-        'total_results': len(events) + len(artists) + len(reels),
+        'total_results': 0,
     }
+    
+    for name, doc_type in SEARCH_TYPES:
+        context[name] = []
+        if not query or search_type not in ['all', name]:
+            continue
+        # Paginator counts with COUNT(*) and only loads the requested page
+        paginator = Paginator(search_documents(query, doc_type), SEARCH_RESULTS_PER_PAGE)
+        page = paginator.get_page(request.GET.get(f'{name}_page'))
+        context[name] = load_results(page.object_list)
+        context[f'{name}_page'] = page
+        context['total_results'] += paginator.count
+    
     return render(request, 'core/search.html', context)
 
 @login_required
@@ -131,4 +127,50 @@ def dashboard(request):
     else:
         # Regular user dashboard
         from accounts.views import user_dashboard
-        return user_dashboard(request)
\ No newline at end of file
+        return user_dashboard(request)
+
+@login_required
+def notifications_unread(request):
+    """Unread notification count for the navbar badge (cached per user)."""
+    return JsonResponse({'unread': unread_count(request.user)})
+
+@login_required
+@require_POST
+def notifications_mark_read(request):
+    """Mark the posted notification ids (or, with none posted, all) as read."""
+    ids = request.POST.getlist('ids')
+    try:
+        ids = [int(pk) for pk in ids] if ids else None
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid notification id'}, status=400)
+    updated = mark_read(request.user, ids)
+    return JsonResponse({'success': True, 'updated': updated, 'unread': unread_count(request.user)})
+
+def _live_ids(request, name):
+    try:
+        ids = [int(pk) for pk in request.GET.getlist(name)]
+    except ValueError:
+        return []
+    return ids[:getattr(settings, 'SSE_MAX_TOPICS', 50)]
+
+async def live_updates(request):
+    """Server-sent event stream of ticket, reel and notification changes (see core/live.py)."""
+    user = await request.auser()
+    feed = LiveFeed(
+        user_id=user.pk if user.is_authenticated else None,
+        event_ids=_live_ids(request, 'event'),
+        reel_ids=_live_ids(request, 'reel'),
+    )
+    if not feed.topics():
+        return JsonResponse({'success': False, 'message': 'Nothing to follow'}, status=400)
+
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(stream(feed), content_type='text/event-stream')
+    else:
+        # A WSGI worker can't be held open: send one snapshot and let EventSource reconnect
+        changes = await sync_to_async(feed.poll)()
+        retry = getattr(settings, 'SSE_WSGI_RETRY_MS', 5000)
+        response = HttpResponse(f'retry: {retry}\n\n' + format_message('update', changes), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+    return response
@@ -1,5 +1,9 @@
 """
 ASGI config for entertainment_project.
+
+Serve with an ASGI server (e.g. `gunicorn entertainment_project.asgi:application
+-k uvicorn.workers.UvicornWorker`) to stream live updates from /live/
+(core/live.py); everything else behaves as under wsgi.py.
 """
 
 import os
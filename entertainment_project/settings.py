@@ -103,6 +103,23 @@ else:
         }
     }
 
+# Cache (e.g. locmemcache://, dbcache://entertainment_cache, redis://127.0.0.1:6379/1). Invalidation
+# bumps versions in this cache, so production needs one shared by web and worker processes, not locmem
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Listing page cache lifetimes in seconds (see core/cache.py)
+LISTING_CACHE_TIMEOUT = env.int('LISTING_CACHE_TIMEOUT', default=300)
+LISTING_CACHE_TIMEOUT_AUTHENTICATED = env.int('LISTING_CACHE_TIMEOUT_AUTHENTICATED', default=60)
+
+# Responsive image renditions, built in the background on upload (see core/images.py)
+IMAGE_DERIVATIVE_WIDTHS = env.list('IMAGE_DERIVATIVE_WIDTHS', cast=int, default=[320, 640, 1024, 1600])  # pixels
+IMAGE_DERIVATIVE_QUALITY = env.int('IMAGE_DERIVATIVE_QUALITY', default=80)  # WebP/JPEG quality, 1-100
+
+# Template fragment cache lifetime in seconds (see core/fragments.py)
+FRAGMENT_CACHE_TIMEOUT = env.int('FRAGMENT_CACHE_TIMEOUT', default=600)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -203,6 +220,93 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 # Paystack Configuration
 PAYSTACK_PUBLIC_KEY = env('PAYSTACK_PUBLIC_KEY', default='')
 PAYSTACK_SECRET_KEY = env('PAYSTACK_SECRET_KEY', default='')
+# Webhooks are stored and applied by `manage.py process_webhooks` (see payments/webhooks.py)
+PAYSTACK_WEBHOOK_MAX_ATTEMPTS = env.int('PAYSTACK_WEBHOOK_MAX_ATTEMPTS', default=5)
+# API client: pooled keep-alive session, timeouts, GET retries, circuit breaker (see payments/services.py)
+PAYSTACK_BASE_URL = env('PAYSTACK_BASE_URL', default='https://api.paystack.co')
+PAYSTACK_CONNECT_TIMEOUT = env.float('PAYSTACK_CONNECT_TIMEOUT', default=3.05)  # seconds
+PAYSTACK_READ_TIMEOUT = env.float('PAYSTACK_READ_TIMEOUT', default=10)  # seconds
+PAYSTACK_POOL_SIZE = env.int('PAYSTACK_POOL_SIZE', default=10)  # connections kept alive per worker
+PAYSTACK_MAX_RETRIES = env.int('PAYSTACK_MAX_RETRIES', default=2)  # GETs only; POSTs are never retried
+PAYSTACK_RETRY_BACKOFF = env.float('PAYSTACK_RETRY_BACKOFF', default=0.3)  # seconds, doubled per retry
+PAYSTACK_RETRY_JITTER = env.float('PAYSTACK_RETRY_JITTER', default=0.2)  # seconds of random jitter
+PAYSTACK_BREAKER_THRESHOLD = env.int('PAYSTACK_BREAKER_THRESHOLD', default=5)  # consecutive failures
+PAYSTACK_BREAKER_RESET_SECONDS = env.int('PAYSTACK_BREAKER_RESET_SECONDS', default=30)
+# True: payment callbacks queue a check for the `verify_payments --loop` worker (Procfile/render.yaml).
+# Only turn it on where that worker runs, or paid bookings stay pending (see payments/verification.py)
+PAYMENT_VERIFY_ASYNC = env.bool('PAYMENT_VERIFY_ASYNC', default=False)
+PAYMENT_VERIFY_MAX_ATTEMPTS = env.int('PAYMENT_VERIFY_MAX_ATTEMPTS', default=8)
+PAYMENT_VERIFY_RETRY_SECONDS = env.int('PAYMENT_VERIFY_RETRY_SECONDS', default=5)  # doubled per attempt
+# `manage.py reconcile_payments` re-checks transactions pending this long, within this window
+PAYMENT_RECONCILE_AFTER_MINUTES = env.int('PAYMENT_RECONCILE_AFTER_MINUTES', default=30)
+PAYMENT_RECONCILE_WINDOW_HOURS = env.int('PAYMENT_RECONCILE_WINDOW_HOURS', default=48)
+# Host payouts, sent by `manage.py run_payouts` (see payments/payouts.py)
+PAYOUT_RELEASE_DELAY_HOURS = env.int('PAYOUT_RELEASE_DELAY_HOURS', default=24)  # after the event ends
+PAYOUT_MIN_AMOUNT = env.int('PAYOUT_MIN_AMOUNT', default=1000)  # smaller balances roll over to the next run
+PAYOUT_TRANSFER_WORKERS = env.int('PAYOUT_TRANSFER_WORKERS', default=4)  # concurrent Paystack transfer calls
+
+# Ticket holds: pending bookings keep their seats for this long (see events/inventory.py)
+BOOKING_HOLD_MINUTES = env.int('BOOKING_HOLD_MINUTES', default=15)
+
+# View counters (per-process write-behind buffer, flushed by a timer thread; see core/counters.py)
+VIEW_COUNTER_FLUSH_INTERVAL = env.int('VIEW_COUNTER_FLUSH_INTERVAL', default=10)  # seconds
+VIEW_COUNTER_FLUSH_THRESHOLD = env.int('VIEW_COUNTER_FLUSH_THRESHOLD', default=500)  # buffered increments
+
+# Reel view ingestion (batched inserts + rollups, flushed by a timer thread; see artists/ingest.py)
+REEL_VIEW_BATCH_SIZE = env.int('REEL_VIEW_BATCH_SIZE', default=200)
+REEL_VIEW_FLUSH_INTERVAL = env.int('REEL_VIEW_FLUSH_INTERVAL', default=10)  # seconds
+REEL_VIEW_RETENTION_DAYS = env.int('REEL_VIEW_RETENTION_DAYS', default=90)
+
+# Resumable reel video uploads (see artists/uploads.py)
+REEL_VIDEO_MAX_SIZE = env.int('REEL_VIDEO_MAX_SIZE', default=50 * 1024 * 1024)  # bytes
+REEL_UPLOAD_CHUNK_SIZE = env.int('REEL_UPLOAD_CHUNK_SIZE', default=5 * 1024 * 1024)  # max bytes per chunk
+REEL_UPLOAD_EXPIRY_HOURS = env.int('REEL_UPLOAD_EXPIRY_HOURS', default=24)  # idle uploads are pruned after this
+# Partial files live here until attached to a reel; every web process must see the same directory
+REEL_UPLOAD_DIR = env('REEL_UPLOAD_DIR', default=os.path.join(BASE_DIR, 'tmp', 'reel_uploads'))
+
+# Reel video delivery (see artists/media.py)
+REEL_VIDEO_CACHE_SECONDS = env.int('REEL_VIDEO_CACHE_SECONDS', default=3600)  # browser/CDN max-age
+# 'X-Accel-Redirect' (nginx) or 'X-Sendfile' (Apache, Caddy) hands file transfer to the front server
+REEL_VIDEO_SENDFILE_HEADER = env('REEL_VIDEO_SENDFILE_HEADER', default='')
+REEL_VIDEO_ACCEL_PREFIX = env('REEL_VIDEO_ACCEL_PREFIX', default='/protected-media/')  # nginx internal location
+
+# Autocomplete prefix index (see core/typeahead.py)
+TYPEAHEAD_REBUILD_SECONDS = env.int('TYPEAHEAD_REBUILD_SECONDS', default=300)
+TYPEAHEAD_MAX_RESULTS = env.int('TYPEAHEAD_MAX_RESULTS', default=10)
+
+# Background jobs, run by the `manage.py run_jobs` worker in Procfile/render.yaml (see core/jobs.py)
+JOBS_EAGER = env.bool('JOBS_EAGER', default=False)  # run jobs inline when queued (development only)
+JOB_WORKER_CONCURRENCY = env.int('JOB_WORKER_CONCURRENCY', default=4)  # threads per worker
+JOB_QUEUE_CONCURRENCY = {  # max jobs of a queue running at once across all workers
+    'email': env.int('JOB_EMAIL_CONCURRENCY', default=4),
+    'webhooks': env.int('JOB_WEBHOOK_CONCURRENCY', default=2),
+    'images': env.int('JOB_IMAGE_CONCURRENCY', default=2),  # CPU-bound resizing
+}
+JOB_MAX_ATTEMPTS = env.int('JOB_MAX_ATTEMPTS', default=5)  # then the job is dead-lettered
+JOB_RETRY_BASE_SECONDS = env.int('JOB_RETRY_BASE_SECONDS', default=10)  # doubled per attempt, plus jitter
+JOB_TIMEOUT_SECONDS = env.int('JOB_TIMEOUT_SECONDS', default=300)  # running longer = worker died
+JOB_RETENTION_DAYS = env.int('JOB_RETENTION_DAYS', default=7)  # finished jobs are pruned after this
+
+# KYC / role decisions are posted here (by a background job) if set
+KYC_WEBHOOK_URL = env('KYC_WEBHOOK_URL', default='')
+
+# Notifications (see core/notifications.py)
+NOTIFICATION_FANOUT_CHUNK = env.int('NOTIFICATION_FANOUT_CHUNK', default=1000)  # rows per bulk_create
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = env.int('NOTIFICATION_UNREAD_CACHE_TIMEOUT', default=300)  # seconds
+
+# Async views run a page's independent queries on separate threads/connections (see core/aio.py)
+ASYNC_PARALLEL_QUERIES = env.bool('ASYNC_PARALLEL_QUERIES', default=True)  # never on SQLite
+ASYNC_QUERY_WORKERS = env.int('ASYNC_QUERY_WORKERS', default=16)  # threads (and DB connections) per process
+
+# Server-sent live updates (see core/live.py); streaming needs the ASGI server
+SSE_MAX_UPDATES_PER_SECOND = env.float('SSE_MAX_UPDATES_PER_SECOND', default=2)  # per client, changes are coalesced
+SSE_KEEPALIVE_SECONDS = env.int('SSE_KEEPALIVE_SECONDS', default=15)
+SSE_RESYNC_SECONDS = env.int('SSE_RESYNC_SECONDS', default=30)  # full re-read in case a publish was missed
+SSE_STREAM_SECONDS = env.int('SSE_STREAM_SECONDS', default=600)  # then the browser reconnects
+SSE_RETRY_MS = env.int('SSE_RETRY_MS', default=3000)  # reconnect delay sent to EventSource
+SSE_WSGI_RETRY_MS = env.int('SSE_WSGI_RETRY_MS', default=5000)  # polling interval when served over WSGI
+SSE_MAX_TOPICS = env.int('SSE_MAX_TOPICS', default=50)  # events or reels one stream may follow
+SSE_NOTIFICATION_BATCH = env.int('SSE_NOTIFICATION_BATCH', default=10)  # new notifications per message
 
 # Commission Settings
 ADMIN_COMMISSION_RATE = env.float('ADMIN_COMMISSION_RATE', default=0.10)  # 10%
@@ -214,6 +318,8 @@ EMAIL_PORT = env.int('EMAIL_PORT', default=587)
 EMAIL_USE_TLS = env.bool('EMAIL_USE_TLS', default=True)
 EMAIL_HOST_USER = env('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD', default='')
+EMAIL_TIMEOUT = env.int('EMAIL_TIMEOUT', default=30)  # seconds before an SMTP call gives up
+EMAIL_BATCH_SIZE = env.int('EMAIL_BATCH_SIZE', default=500)  # bulk emails per SMTP connection / job
 
 # Site Configuration
 SITE_NAME = env('SITE_NAME', default='ktune')
@@ -232,5 +338,6 @@ if not DEBUG:
     SECURE_HSTS_PRELOAD = True
 
 # File Upload Settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = 52428800  # 50MB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 52428800  # 50MB
\ No newline at end of file
+# Uploads larger than this are streamed to a temporary file instead of held in memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = env.int('FILE_UPLOAD_MAX_MEMORY_SIZE', default=2621440)  # 2.5MB
+DATA_UPLOAD_MAX_MEMORY_SIZE = env.int('DATA_UPLOAD_MAX_MEMORY_SIZE', default=2621440)  # 2.5MB, excludes files
\ No newline at end of file
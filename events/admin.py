@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
+from accounts.mailer import queue_bulk_email
+from core.notifications import notify_bookers
 from .models import EventCategory, Event, Booking, EventFavorite, EventShare
 
 @admin.register(EventCategory)
@@ -17,7 +19,8 @@ class EventAdmin(admin.ModelAdmin):
     list_filter = ['status', 'is_featured', 'is_free', 'category', 'start_date']
     search_fields = ['title', 'description', 'venue_name', 'host__email']
     prepopulated_fields = {'slug': ('title',)}
-    readonly_fields = ['created_at', 'updated_at', 'view_count', 'favorite_count', 'share_count', 'sold_tickets']
+    readonly_fields = ['created_at', 'updated_at', 'view_count', 'favorite_count', 'share_count', 'sold_tickets', 'reserved_tickets']
+    actions = ['cancel_events']
     
     fieldsets = (
         ('Basic Information', {
@@ -39,7 +42,7 @@ class EventAdmin(admin.ModelAdmin):
             'fields': ('is_featured', 'status')
         }),
         ('Analytics', {
-            'fields': ('view_count', 'favorite_count', 'share_count', 'sold_tickets'),
+            'fields': ('view_count', 'favorite_count', 'share_count', 'sold_tickets', 'reserved_tickets'),
             'classes': ('collapse',)
         }),
         ('Timestamps', {
@@ -62,12 +65,30 @@ class EventAdmin(admin.ModelAdmin):
             return self.readonly_fields
         return []
 
+    def cancel_events(self, request, queryset):
+        events = list(queryset.exclude(status='cancelled'))
+        queued = 0
+        for event in events:
+            recipients = [
+                (email, {'name': name, 'booking_reference': reference, 'quantity': quantity})
+                for email, name, reference, quantity in event.bookings.filter(status='confirmed').values_list(
+                    'customer_email', 'customer_name', 'booking_reference', 'quantity'
+                ).iterator()
+            ]
+            event.status = 'cancelled'
+            event.save(update_fields=['status', 'updated_at'])
+            queue_bulk_email(f'Cancelled: {event.title}', 'event_cancelled', recipients, context={'event': event})
+            notify_bookers.delay(event, f'Cancelled: {event.title}', 'This event has been cancelled.')
+            queued += len(recipients)
+        self.message_user(request, f'{len(events)} events cancelled; {queued} bookers will be emailed.')
+    cancel_events.short_description = 'Cancel selected events and email their bookers'
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ['booking_reference', 'event', 'user', 'quantity', 'total_price', 'status', 'booked_at']
     list_filter = ['status', 'booked_at', 'event__category']
     search_fields = ['booking_reference', 'event__title', 'user__email', 'customer_name']
-    readonly_fields = ['booking_reference', 'booked_at', 'updated_at']
+    readonly_fields = ['booking_reference', 'hold_expires_at', 'booked_at', 'updated_at']
     
     fieldsets = (
         ('Booking Details', {
@@ -77,7 +98,7 @@ class BookingAdmin(admin.ModelAdmin):
             'fields': ('customer_name', 'customer_email', 'customer_phone')
         }),
         ('Payment', {
-            'fields': ('payment_reference', 'status')
+            'fields': ('payment_reference', 'status', 'hold_expires_at')
         }),
         ('Additional', {
             'fields': ('notes', 'booked_at', 'updated_at'),
@@ -0,0 +1,167 @@
+"""
+Ticket inventory reservation.
+
+Seats move through three counters on Event: free seats
+(available_tickets - sold_tickets - reserved_tickets), reserved_tickets
+(held by pending bookings) and sold_tickets. Every transition is a single
+conditional UPDATE, so concurrent buyers can never oversell an event and
+no row locks are held across requests.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core import stats
+from core.fragments import bump_user
+from core.live import publish
+from .models import Event, Booking
+
+
+class SoldOut(Exception):
+    """Raised when an event cannot cover the requested quantity."""
+
+    def __init__(self, event, remaining):
+        self.event = event
+        self.remaining = remaining
+        super().__init__(f'Only {remaining} tickets available')
+
+
+def hold_duration():
+    return timezone.timedelta(minutes=getattr(settings, 'BOOKING_HOLD_MINUTES', 15))
+
+
+def _has_free_seats(quantity):
+    return {'available_tickets__gte': F('sold_tickets') + F('reserved_tickets') + quantity}
+
+
+def remaining_tickets(event):
+    """Read the current number of free seats straight from the database."""
+    event.refresh_from_db(fields=['available_tickets', 'sold_tickets', 'reserved_tickets'])
+    return event.available_tickets_count
+
+
+def reserve_seats(event, quantity):
+    """Atomically hold `quantity` seats on `event`. Returns True on success."""
+    reserved = Event.objects.filter(pk=event.pk, **_has_free_seats(quantity)).update(
+        reserved_tickets=F('reserved_tickets') + quantity
+    ) == 1
+    if reserved:
+        publish('event', event.pk)
+    return reserved
+
+
+def _held_booking(event, user, quantity, fields):
+    return Booking.objects.create(
+        event=event,
+        user=user,
+        quantity=quantity,
+        unit_price=event.ticket_price,
+        hold_expires_at=timezone.now() + hold_duration(),
+        **fields
+    )
+
+
+def create_held_booking(event, user, quantity, **fields):
+    """Reserve seats and create a pending booking that holds them until it expires.
+
+    Raises SoldOut if the seats cannot be reserved.
+    """
+    if quantity < 1:
+        raise ValueError('Quantity must be at least 1')
+
+    with transaction.atomic():
+        if reserve_seats(event, quantity):
+            return _held_booking(event, user, quantity, fields)
+
+    # Seats held by expired bookings are still counted until swept
+    if release_expired_holds(event=event):
+        with transaction.atomic():
+            if reserve_seats(event, quantity):
+                return _held_booking(event, user, quantity, fields)
+
+    raise SoldOut(event, remaining_tickets(event))
+
+
+def confirm_booking(booking, **fields):
+    """Convert a booking's seats to sold tickets and mark it confirmed.
+
+    Held seats are moved from reserved to sold. Bookings whose hold has
+    expired (or that never held seats) take free seats instead, raising
+    SoldOut if there are none left. Returns False if the booking was already
+    confirmed by someone else.
+    """
+    updates = dict(status='confirmed', hold_expires_at=None, updated_at=timezone.now(), **fields)
+    quantity = booking.quantity
+
+    with transaction.atomic():
+        held = Booking.objects.filter(
+            pk=booking.pk, status='pending', hold_expires_at__isnull=False
+        ).update(**updates)
+        if held:
+            Event.objects.filter(pk=booking.event_id).update(
+                reserved_tickets=F('reserved_tickets') - quantity,
+                sold_tickets=F('sold_tickets') + quantity,
+            )
+        else:
+            claimed = Booking.objects.filter(
+                pk=booking.pk, status__in=['pending', 'expired']
+            ).update(**updates)
+            if not claimed:
+                return False
+            sold = Event.objects.filter(pk=booking.event_id, **_has_free_seats(quantity)).update(
+                sold_tickets=F('sold_tickets') + quantity
+            )
+            if not sold:
+                raise SoldOut(booking.event, remaining_tickets(booking.event))
+
+        stats.booking_confirmed(booking)
+        publish('event', booking.event_id)
+        bump_user(booking.user_id)
+
+    for field, value in updates.items():
+        setattr(booking, field, value)
+    return True
+
+
+def release_hold(booking, status='cancelled'):
+    """Give a pending booking's held seats back. Returns True if seats were released."""
+    with transaction.atomic():
+        released = Booking.objects.filter(
+            pk=booking.pk, status='pending', hold_expires_at__isnull=False
+        ).update(status=status, hold_expires_at=None, updated_at=timezone.now())
+        if released:
+            Event.objects.filter(pk=booking.event_id).update(
+                reserved_tickets=F('reserved_tickets') - booking.quantity
+            )
+            publish('event', booking.event_id)
+            bump_user(booking.user_id)
+    if released:
+        booking.status = status
+        booking.hold_expires_at = None
+    return bool(released)
+
+
+def release_expired_holds(event=None, now=None):
+    """Expire pending bookings whose hold has lapsed and free their seats.
+
+    Each booking is claimed with its own conditional UPDATE, so concurrent
+    sweepers never release the same seats twice. Returns bookings expired.
+    """
+    now = now or timezone.now()
+    stale = Booking.objects.filter(status='pending', hold_expires_at__lt=now)
+    if event is not None:
+        stale = stale.filter(event=event)
+
+    expired = 0
+    for pk, event_id, user_id, quantity in stale.values_list('pk', 'event_id', 'user_id', 'quantity'):
+        with transaction.atomic():
+            claimed = Booking.objects.filter(pk=pk, status='pending', hold_expires_at__lt=now).update(
+                status='expired', hold_expires_at=None, updated_at=now
+            )
+            if claimed:
+                Event.objects.filter(pk=event_id).update(reserved_tickets=F('reserved_tickets') - quantity)
+                publish('event', event_id)
+                bump_user(user_id)
+                expired += 1
+    return expired
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from events.inventory import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Expire pending bookings whose ticket hold has lapsed and release their seats'
+
+    def handle(self, *args, **options):
+        expired = release_expired_holds()
+        self.stdout.write(self.style.SUCCESS(f'Expired {expired} stale booking holds'))
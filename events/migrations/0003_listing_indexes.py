@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_ticket_reservations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'booked_at'], name='events_book_user_id_3c1cc4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['event', 'status'], name='events_book_event_i_0190a3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'hold_expires_at'], name='events_book_status_12f4d2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['status', 'start_date'], name='events_even_status_dfba18_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['status', 'is_featured', 'start_date'], name='events_even_status_a778d3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['status', 'is_free', 'start_date'], name='events_even_status_41c310_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['status', 'city', 'start_date'], name='events_even_status_3ab1fd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['category', 'status', 'start_date'], name='events_even_categor_608e9c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['host', 'created_at'], name='events_even_host_id_939eb4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventfavorite',
+            index=models.Index(fields=['user', 'created_at'], name='events_even_user_id_cd8efd_idx'),
+        ),
+    ]
@@ -51,6 +51,7 @@ class Event(models.Model):
     ticket_price = models.DecimalField(max_digits=10, decimal_places=2)
     available_tickets = models.PositiveIntegerField(default=0)
     sold_tickets = models.PositiveIntegerField(default=0)
+    reserved_tickets = models.PositiveIntegerField(default=0, help_text="Seats held by pending bookings")
     
     image = models.ImageField(upload_to='event_images/', blank=True, null=True)
     featured_image = models.ImageField(upload_to='event_featured/', blank=True, null=True)
@@ -70,6 +71,16 @@ class Event(models.Model):
 
     class Meta:
         ordering = ['-start_date', '-created_at']
+        indexes = [
+            # Public listings: published events by date, optionally narrowed by flag, city or category
+            models.Index(fields=['status', 'start_date']),
+            models.Index(fields=['status', 'is_featured', 'start_date']),
+            models.Index(fields=['status', 'is_free', 'start_date']),
+            models.Index(fields=['status', 'city', 'start_date']),
+            models.Index(fields=['category', 'status', 'start_date']),
+            # Host dashboards
+            models.Index(fields=['host', 'created_at']),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -80,7 +91,7 @@ class Event(models.Model):
 
     @property
     def available_tickets_count(self):
-        return max(0, self.available_tickets - self.sold_tickets)
+        return max(0, self.available_tickets - self.sold_tickets - self.reserved_tickets)
 
     @property
     def is_sold_out(self):
@@ -108,6 +119,7 @@ class Booking(models.Model):
         ('confirmed', 'Confirmed'),
         ('cancelled', 'Cancelled'),
         ('refunded', 'Refunded'),
+        ('expired', 'Expired'),
     ]
 
     booking_reference = models.CharField(max_length=20, unique=True)
@@ -127,12 +139,20 @@ class Booking(models.Model):
     
     notes = models.TextField(blank=True)
     
+    # Seats are held for pending bookings until this time (see events/inventory.py)
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
+    
     booked_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-booked_at']
         unique_together = ['event', 'user', 'booking_reference']
+        indexes = [
+            models.Index(fields=['user', 'booked_at']),
+            models.Index(fields=['event', 'status']),
+            models.Index(fields=['status', 'hold_expires_at']),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.booking_reference:
@@ -151,6 +171,9 @@ class EventFavorite(models.Model):
 
     class Meta:
         unique_together = ['event', 'user']
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.event.title}"
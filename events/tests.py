@@ -1,3 +1,89 @@
 from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
+from .models import Event, Booking
+from .inventory import SoldOut, confirm_booking, create_held_booking, release_expired_holds
+
+User = get_user_model()
+
+
+def make_event(host, **kwargs):
+    start = timezone.now() + timezone.timedelta(days=7)
+    defaults = {
+        'title': 'Lagos Live',
+        'description': 'A night of music',
+        'short_description': 'Music',
+        'host': host,
+        'venue_name': 'Eko Hall',
+        'venue_address': '1 Marina',
+        'city': 'Lagos',
+        'state': 'Lagos',
+        'start_date': start,
+        'end_date': start + timezone.timedelta(hours=4),
+        'ticket_price': 5000,
+        'available_tickets': 100,
+        'status': 'published',
+    }
+    defaults.update(kwargs)
+    return Event.objects.create(**defaults)
+
+
+class TicketReservationTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username='host', email='host@example.com', password='pass')
+        self.buyer = User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+        self.event = make_event(self.host, available_tickets=5)
+
+    def test_holds_never_oversell(self):
+        create_held_booking(self.event, self.buyer, 3)
+        with self.assertRaises(SoldOut) as ctx:
+            create_held_booking(self.event, self.buyer, 3)
+        self.assertEqual(ctx.exception.remaining, 2)
+        create_held_booking(self.event, self.buyer, 2)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.reserved_tickets, 5)
+        self.assertTrue(self.event.is_sold_out)
+
+    def test_confirm_moves_held_seats_to_sold(self):
+        booking = create_held_booking(self.event, self.buyer, 2)
+        self.assertTrue(confirm_booking(booking, payment_reference='ref'))
+        self.assertFalse(confirm_booking(booking, payment_reference='ref'))
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.sold_tickets, self.event.reserved_tickets), (2, 0))
+        self.assertEqual(Booking.objects.get(pk=booking.pk).status, 'confirmed')
+
+    def test_expired_holds_release_their_seats(self):
+        booking = create_held_booking(self.event, self.buyer, 5)
+        Booking.objects.filter(pk=booking.pk).update(hold_expires_at=timezone.now() - timezone.timedelta(minutes=1))
+
+        # A new buyer sweeps the stale hold instead of seeing a sold-out event
+        create_held_booking(self.event, self.buyer, 4)
+        self.assertEqual(Booking.objects.get(pk=booking.pk).status, 'expired')
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.reserved_tickets, 4)
+        self.assertEqual(release_expired_holds(), 0)
+
+    def test_buyer_can_cancel_an_unpaid_booking(self):
+        booking = create_held_booking(self.event, self.buyer, 3)
+        self.client.force_login(self.buyer)
+        url = reverse('accounts:cancel_booking', args=[booking.booking_reference])
+        self.assertRedirects(self.client.post(url), reverse('accounts:my_bookings'), fetch_redirect_response=False)
+        booking.refresh_from_db()
+        self.event.refresh_from_db()
+        self.assertEqual((booking.status, self.event.reserved_tickets), ('cancelled', 0))
+
+        # Confirmed bookings need a refund, not this
+        confirmed = create_held_booking(self.event, self.buyer, 1)
+        confirm_booking(confirmed)
+        self.client.post(reverse('accounts:cancel_booking', args=[confirmed.booking_reference]))
+        self.assertEqual(Booking.objects.get(pk=confirmed.pk).status, 'confirmed')
+
+    def test_book_event_view_reports_remaining_seats(self):
+        self.client.login(email='buyer@example.com', password='pass')
+        url = reverse('events:ajax_book_event', args=[self.event.pk])
+        self.assertTrue(self.client.post(url, {'quantity': 4}).json()['success'])
+        response = self.client.post(url, {'quantity': 4}).json()
+        self.assertFalse(response['success'])
+        self.assertEqual(response['message'], 'Only 1 tickets available')
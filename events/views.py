@@ -1,21 +1,31 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.response import TemplateResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q, Count, Avg
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
-from django.core.paginator import Paginator
 from django.utils import timezone
 from django.urls import reverse
 import json
 
 from .models import Event, EventCategory, Booking, EventFavorite, EventShare
 from .forms import EventForm, BookingForm
+from .inventory import create_held_booking, SoldOut
+from core.cache import cache_listing
+from core.pagination import paginate_listing
+from core.counters import view_counter
+from core.stats import event_stats
+from core.notifications import notify_bookers
 import logging
 
+# Changes to these fields are announced to the event's bookers
+BOOKER_VISIBLE_FIELDS = ['start_date', 'end_date', 'venue_name', 'venue_address', 'city', 'status']
+
+@cache_listing('events')
 def event_list(request):
     """List all published events with filtering and search"""
-    events = Event.objects.filter(status='published').order_by('start_date')
+    events = Event.objects.filter(status='published').select_related('category')
     
     # Search functionality
     search_query = request.GET.get('search', '')
@@ -56,9 +66,7 @@ def event_list(request):
         events = events.filter(is_free=False, ticket_price__gt=0)
     
     # Pagination
-    paginator = Paginator(events, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate_listing(request, events, 12, ('start_date', 'id'))
     
     # Get categories for filter sidebar
     categories = EventCategory.objects.all()
@@ -71,103 +79,98 @@ def event_list(request):
         'selected_date': date_filter,
         'selected_price': price_filter,
     }
-    return render(request, 'events/event_list.html', context)
+    return TemplateResponse(request, 'events/event_list.html', context)
 
+@cache_listing('events')
 def event_list_by_category(request, category_slug):
     """List events by category"""
     category = get_object_or_404(EventCategory, slug=category_slug)
     events = Event.objects.filter(
         status='published',
         category=category
-    ).order_by('start_date')
+    ).select_related('category')
     
-    paginator = Paginator(events, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate_listing(request, events, 12, ('start_date', 'id'))
     
     context = {
         'page_obj': page_obj,
         'category': category,
     }
-    return render(request, 'events/event_list_by_category.html', context)
+    return TemplateResponse(request, 'events/event_list_by_category.html', context)
 
+@cache_listing('events')
 def upcoming_events(request):
     """List upcoming events"""
     events = Event.objects.filter(
         status='published',
         start_date__gt=timezone.now()
-    ).order_by('start_date')
+    ).select_related('category')
     
-    paginator = Paginator(events, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate_listing(request, events, 12, ('start_date', 'id'))
     
     context = {
         'page_obj': page_obj,
         'title': 'Upcoming Events',
     }
-    return render(request, 'events/event_list.html', context)
+    return TemplateResponse(request, 'events/event_list.html', context)
 
+@cache_listing('events')
 def past_events(request):
     """List past events"""
     events = Event.objects.filter(
         status='published',
         end_date__lt=timezone.now()
-    ).order_by('-start_date')
+    ).select_related('category')
     
-    paginator = Paginator(events, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate_listing(request, events, 12, ('-start_date', '-id'))
     
     context = {
         'page_obj': page_obj,
         'title': 'Past Events',
     }
-    return render(request, 'events/event_list.html', context)
+    return TemplateResponse(request, 'events/event_list.html', context)
 
+@cache_listing('events')
 def featured_events(request):
     """List featured events"""
     events = Event.objects.filter(
         status='published',
         is_featured=True,
         start_date__gt=timezone.now()
-    ).order_by('start_date')
+    ).select_related('category')
     
-    paginator = Paginator(events, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate_listing(request, events, 12, ('start_date', 'id'))
     
     context = {
         'page_obj': page_obj,
         'title': 'Featured Events',
     }
-    return render(request, 'events/event_list.html', context)
+    return TemplateResponse(request, 'events/event_list.html', context)
 
+@cache_listing('events')
 def free_events(request):
     """List free events"""
     events = Event.objects.filter(
         status='published',
         is_free=True,
         start_date__gt=timezone.now()
-    ).order_by('start_date')
+    ).select_related('category')
     
-    paginator = Paginator(events, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate_listing(request, events, 12, ('start_date', 'id'))
     
     context = {
         'page_obj': page_obj,
         'title': 'Free Events',
     }
-    return render(request, 'events/event_list.html', context)
+    return TemplateResponse(request, 'events/event_list.html', context)
 
 def event_detail(request, slug):
     """Event detail page"""
-    event = get_object_or_404(Event, slug=slug, status='published')
+    event = get_object_or_404(Event.objects.select_related('host', 'category'), slug=slug, status='published')
     
-    # Increment view count
-    event.view_count += 1
-    event.save(update_fields=['view_count'])
+    # Buffer the view; counts are written back in batches
+    view_counter.incr(event)
+    event.view_count = view_counter.current(event)
     
     # Check if user has favorited this event
     is_favorited = False
@@ -217,22 +220,20 @@ def book_event(request, slug):
         if form.is_valid():
             quantity = form.cleaned_data['quantity']
             
-            # Check availability
-            if quantity > event.available_tickets_count:
-                messages.error(request, f'Only {event.available_tickets_count} tickets available!')
+            # Reserve seats and create a pending booking that holds them until payment
+            try:
+                booking = create_held_booking(
+                    event,
+                    request.user,
+                    quantity,
+                    customer_name=request.user.get_full_name() or request.user.username,
+                    customer_email=request.user.email,
+                    customer_phone=request.user.phone_number or '',
+                )
+            except SoldOut as e:
+                messages.error(request, f'Only {e.remaining} tickets available!')
                 return redirect('events:event_detail', slug=slug)
             
-            # Create booking (pending payment)
-            booking = Booking.objects.create(
-                event=event,
-                user=request.user,
-                quantity=quantity,
-                unit_price=event.ticket_price,
-                customer_name=request.user.get_full_name() or request.user.username,
-                customer_email=request.user.email,
-                customer_phone=request.user.phone_number or '',
-            )
-            
             # Redirect to payment page
             return redirect('payments:process_payment', booking_reference=booking.booking_reference)
     
@@ -360,7 +361,14 @@ def edit_event(request, pk):
     if request.method == 'POST':
         form = EventForm(request.POST, request.FILES, instance=event)
         if form.is_valid():
-            form.save()
+            event = form.save()
+            changed = [form.fields[name].label or name for name in form.changed_data if name in BOOKER_VISIBLE_FIELDS]
+            if changed:
+                notify_bookers.delay(
+                    event,
+                    f'Update: {event.title}',
+                    f'The host changed the {", ".join(changed).lower()} of an event you booked.',
+                )
             messages.success(request, 'Event updated successfully!')
             return redirect('events:event_detail', slug=event.slug)
     else:
@@ -392,21 +400,18 @@ def delete_event(request, pk):
 def event_bookings(request, pk):
     """View event bookings (for hosts)"""
     event = get_object_or_404(Event, pk=pk, host=request.user)
-    bookings = event.bookings.all().order_by('-booked_at')
+    bookings = event.bookings.select_related('user').order_by('-booked_at')
     
-    # Calculate statistics
-    total_bookings = bookings.count()
-    confirmed_bookings = bookings.filter(status='confirmed').count()
-    total_revenue = bookings.filter(status='confirmed').aggregate(
-        total=models.Sum('total_price')
-    )['total'] or 0
+    # Counters are maintained as bookings change (see core/stats.py)
+    stats = event_stats(event)
     
     context = {
         'event': event,
         'bookings': bookings,
-        'total_bookings': total_bookings,
-        'confirmed_bookings': confirmed_bookings,
-        'total_revenue': total_revenue,
+        'total_bookings': stats.bookings,
+        'confirmed_bookings': stats.confirmed_bookings,
+        'total_revenue': stats.revenue,
+        'tickets_sold': stats.tickets_sold,
     }
     return render(request, 'events/event_bookings.html', context)
 
@@ -423,25 +428,30 @@ def ajax_book_event(request, event_id):
     if not event.is_upcoming:
         return JsonResponse({'success': False, 'message': 'Event has already passed'})
     
-    quantity = int(request.POST.get('quantity', 1))
+    try:
+        quantity = int(request.POST.get('quantity', 1))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid quantity'})
+    
+    if quantity < 1:
+        return JsonResponse({'success': False, 'message': 'Invalid quantity'})
     
-    if quantity > event.available_tickets_count:
+    # Reserve seats and create booking (held until payment or expiry)
+    try:
+        booking = create_held_booking(
+            event,
+            request.user,
+            quantity,
+            customer_name=request.user.get_full_name() or request.user.username,
+            customer_email=request.user.email,
+            customer_phone=request.user.phone_number or '',
+        )
+    except SoldOut as e:
         return JsonResponse({
             'success': False, 
-            'message': f'Only {event.available_tickets_count} tickets available'
+            'message': f'Only {e.remaining} tickets available'
         })
     
-    # Create booking
-    booking = Booking.objects.create(
-        event=event,
-        user=request.user,
-        quantity=quantity,
-        unit_price=event.ticket_price,
-        customer_name=request.user.get_full_name() or request.user.username,
-        customer_email=request.user.email,
-        customer_phone=request.user.phone_number or '',
-    )
-    
     return JsonResponse({
         'success': True,
         'booking_reference': booking.booking_reference,
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
-from .models import Transaction, Commission, Payout, PayoutItem
+from .models import Transaction, Commission, Payout, PayoutItem, WebhookEvent, PaymentVerification, PayoutAccount, HostBalance
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
@@ -97,4 +97,30 @@ class PayoutItemAdmin(admin.ModelAdmin):
     
     def commission_booking(self, obj):
         return obj.commission.booking.reference
-    commission_booking.short_description = 'Booking Ref'
\ No newline at end of file
+    commission_booking.short_description = 'Booking Ref'
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['event_id', 'event_type', 'status', 'attempts', 'received_at', 'processed_at']
+    list_filter = ['status', 'event_type', 'received_at']
+    search_fields = ['event_id']
+    readonly_fields = ['event_id', 'event_type', 'payload', 'attempts', 'last_error', 'received_at', 'locked_at', 'processed_at']
+
+@admin.register(PaymentVerification)
+class PaymentVerificationAdmin(admin.ModelAdmin):
+    list_display = ['transaction', 'status', 'attempts', 'next_attempt_at', 'created_at', 'completed_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['transaction__reference', 'transaction__paystack_reference']
+    raw_id_fields = ['transaction']
+    readonly_fields = ['attempts', 'last_error', 'created_at', 'locked_at', 'completed_at']
+
+@admin.register(PayoutAccount)
+class PayoutAccountAdmin(admin.ModelAdmin):
+    list_display = ['host', 'bank_name', 'account_name', 'account_number', 'recipient_code', 'updated_at']
+    search_fields = ['host__email', 'account_name', 'account_number']
+    raw_id_fields = ['host']
+
+@admin.register(HostBalance)
+class HostBalanceAdmin(admin.ModelAdmin):
+    list_display = ['host', 'pending', 'available', 'in_transit', 'paid_out', 'commission', 'updated_at']
+    search_fields = ['host__email', 'host__username']
+    readonly_fields = ['host', 'pending', 'available', 'in_transit', 'paid_out', 'commission', 'updated_at']
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from payments.payouts import rebuild_balances
+
+
+class Command(BaseCommand):
+    help = 'Recompute every host balance from commissions and payouts'
+
+    def handle(self, *args, **options):
+        hosts = rebuild_balances()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt balances for {hosts} hosts'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from payments.verification import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Queue verification for Paystack transactions that were never confirmed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=None,
+                            help='Minutes a transaction must have been pending (default PAYMENT_RECONCILE_AFTER_MINUTES)')
+        parser.add_argument('--window', type=int, default=None,
+                            help='Hours to look back (default PAYMENT_RECONCILE_WINDOW_HOURS)')
+
+    def handle(self, *args, **options):
+        queued = reconcile(older_than_minutes=options['older_than'], window_hours=options['window'])
+        self.stdout.write(self.style.SUCCESS(f'Queued {queued} unconfirmed transactions for verification'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from payments.payouts import run_payouts
+
+
+class Command(BaseCommand):
+    help = 'Release payable commissions, batch them into host payouts and send the transfers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-amount', type=float, default=None,
+                            help='Smallest payout to send (default PAYOUT_MIN_AMOUNT)')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Concurrent transfer requests (default PAYOUT_TRANSFER_WORKERS)')
+
+    def handle(self, *args, **options):
+        summary = run_payouts(min_amount=options['min_amount'], max_workers=options['workers'])
+        sent = ', '.join(f'{count} {status}' for status, count in sorted(summary['sent'].items())) or 'none'
+        self.stdout.write(self.style.SUCCESS(
+            f"Released {summary['released']} commissions, created {summary['created']} payouts; transfers: {sent}"
+        ))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.verification import process_due, requeue_stuck
+
+
+class Command(BaseCommand):
+    help = 'Verify queued payments with Paystack and confirm their bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Verifications to run per batch')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for due verifications')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to sleep between polls when nothing is due (with --loop)')
+        parser.add_argument('--requeue-every', type=float, default=60.0,
+                            help='Seconds between sweeps for checks left processing by a crashed worker (with --loop)')
+
+    def requeue(self):
+        requeued = requeue_stuck()
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} verifications left processing by a stopped worker')
+
+    def handle(self, *args, **options):
+        self.requeue()
+        last_requeue = time.monotonic()
+
+        while True:
+            if time.monotonic() - last_requeue >= options['requeue_every']:
+                self.requeue()
+                last_requeue = time.monotonic()
+            results = process_due(batch_size=options['batch_size'])
+            if results:
+                summary = ', '.join(f'{count} {status}' for status, count in sorted(results.items()))
+                self.stdout.write(self.style.SUCCESS(f'Payments: {summary}'))
+            if not options['loop']:
+                break
+            if not results:
+                time.sleep(options['interval'])
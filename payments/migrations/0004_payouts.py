@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:38
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_paymentverification'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HostBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pending', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Earnings from events that have not ended yet', max_digits=12)),
+                ('available', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Earnings ready to be paid out', max_digits=12)),
+                ('in_transit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Included in payouts not completed yet', max_digits=12)),
+                ('paid_out', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('commission', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Platform commission deducted', max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('host', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='balance', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PayoutAccount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bank_name', models.CharField(max_length=100)),
+                ('bank_code', models.CharField(help_text='Paystack bank code', max_length=20)),
+                ('account_name', models.CharField(max_length=100)),
+                ('account_number', models.CharField(max_length=20)),
+                ('recipient_code', models.CharField(blank=True, help_text='Paystack transfer recipient', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('host', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='payout_account', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
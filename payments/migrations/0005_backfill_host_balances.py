@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:07
+
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Q, Sum
+
+BALANCE_FIELDS = ('pending', 'available', 'in_transit', 'paid_out', 'commission')
+
+
+def backfill_balances(apps, schema_editor):
+    """Compute HostBalance rows from commissions and payouts, as payouts.rebuild_balances does.
+
+    Balances are only adjusted as commissions and payouts change, so without
+    this existing hosts show nothing earned.
+    """
+    Commission = apps.get_model('payments', 'Commission')
+    Payout = apps.get_model('payments', 'Payout')
+    HostBalance = apps.get_model('payments', 'HostBalance')
+    totals = {}
+
+    def add(host_id, field, amount):
+        totals.setdefault(host_id, dict.fromkeys(BALANCE_FIELDS, Decimal('0.00')))[field] += amount or Decimal('0.00')
+
+    commissions = Commission.objects.exclude(status='cancelled').values('host_id').annotate(
+        pending=Sum('host_earnings', filter=Q(status='pending')),
+        available=Sum('host_earnings', filter=Q(status='calculated')),
+        commission=Sum('commission_amount'),
+    )
+    for row in commissions:
+        for field in ('pending', 'available', 'commission'):
+            add(row['host_id'], field, row[field])
+    payouts = Payout.objects.values('host_id').annotate(
+        in_transit=Sum('net_amount', filter=Q(status__in=('pending', 'processing'))),
+        paid_out=Sum('net_amount', filter=Q(status='completed')),
+    )
+    for row in payouts:
+        for field in ('in_transit', 'paid_out'):
+            add(row['host_id'], field, row[field])
+
+    HostBalance.objects.all().delete()
+    HostBalance.objects.bulk_create(
+        [HostBalance(host_id=host_id, **fields) for host_id, fields in totals.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_payouts'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
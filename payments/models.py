@@ -168,4 +168,101 @@ class PayoutItem(models.Model):
         unique_together = ['payout', 'commission']
 
     def __str__(self):
-        return f"{self.payout.reference} - {self.commission.booking.reference}"
\ No newline at end of file
+        return f"{self.payout.reference} - {self.commission.booking.reference}"
+
+class PayoutAccount(models.Model):
+    """Where a host's payouts are sent; `recipient_code` is created with Paystack on first payout"""
+    host = models.OneToOneField(User, on_delete=models.CASCADE, related_name='payout_account')
+
+    bank_name = models.CharField(max_length=100)
+    bank_code = models.CharField(max_length=20, help_text="Paystack bank code")
+    account_name = models.CharField(max_length=100)
+    account_number = models.CharField(max_length=20)
+    recipient_code = models.CharField(max_length=100, blank=True, help_text="Paystack transfer recipient")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.host.username} - {self.bank_name} {self.account_number}"
+
+class HostBalance(models.Model):
+    """Running totals of a host's earnings, kept up to date by payments/payouts.py"""
+    host = models.OneToOneField(User, on_delete=models.CASCADE, related_name='balance')
+
+    pending = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), help_text="Earnings from events that have not ended yet")
+    available = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), help_text="Earnings ready to be paid out")
+    in_transit = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), help_text="Included in payouts not completed yet")
+    paid_out = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    commission = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), help_text="Platform commission deducted")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def total_earnings(self):
+        return self.available + self.in_transit + self.paid_out
+
+    def __str__(self):
+        return f"{self.host.username} - available {self.available}"
+
+class WebhookEvent(models.Model):
+    """Verified Paystack webhook waiting for (or done with) processing (see payments/webhooks.py)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    ]
+
+    event_id = models.CharField(max_length=150, unique=True, help_text="Event type + Paystack object id, used to drop redeliveries")
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    received_at = models.DateTimeField(auto_now_add=True)
+    locked_at = models.DateTimeField(null=True, blank=True, help_text="When a worker claimed the event")
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['received_at']
+        indexes = [
+            models.Index(fields=['status', 'received_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} ({self.event_id}) - {self.status}"
+
+
+class PaymentVerification(models.Model):
+    """Queued check of a transaction with Paystack, run by `verify_payments` (see payments/verification.py)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('verified', 'Verified'),
+        ('failed', 'Failed'),
+        ('expired', 'Expired'),
+    ]
+
+    transaction = models.OneToOneField(Transaction, on_delete=models.CASCADE, related_name='verification')
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    locked_at = models.DateTimeField(null=True, blank=True, help_text="When a worker claimed the check")
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.transaction.reference} - {self.status}"
@@ -0,0 +1,313 @@
+"""
+Host payouts and running balances.
+
+A commission's host earnings move through the host's HostBalance row as
+the money does:
+
+    pending    - paid booking, event not over yet   (complete_payment)
+    available  - event over, commission payable      (release_commissions)
+    in_transit - in a payout being transferred        (create_payout_batch)
+    paid_out   - transfer confirmed                   (settle_payout)
+
+Every move is one UPDATE with F() expressions, so the earnings page
+reads a single row instead of aggregating all commissions.
+
+`run_payouts` (the `run_payouts` command) releases commissions, groups
+all `calculated` commissions per host into Payouts and PayoutItems with
+bulk_create, and sends the transfers through Paystack on a bounded
+thread pool. The payout reference doubles as the Paystack transfer
+reference, so resending a payout whose request failed cannot pay twice.
+Transfers are settled by the transfer.* webhooks.
+"""
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from decimal import Decimal
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import Commission, HostBalance, Payout, PayoutAccount, PayoutItem
+from .services import PaystackService
+
+logger = logging.getLogger(__name__)
+
+BALANCE_FIELDS = ('pending', 'available', 'in_transit', 'paid_out', 'commission')
+
+# Paystack transfer statuses that mean the transfer was accepted but has not landed yet
+TRANSFER_IN_FLIGHT = ('pending', 'otp', 'received', 'queued', 'processing')
+
+
+class ConcurrentPayoutRun(Exception):
+    """Another payout run took some of the same commissions; this batch was rolled back."""
+
+
+def adjust_balances(**deltas):
+    """Add amounts to host balances in one UPDATE: adjust_balances(available={host_id: -amount}, ...)."""
+    host_ids = {host_id for amounts in deltas.values() for host_id in amounts}
+    if not host_ids:
+        return
+    HostBalance.objects.bulk_create(
+        [HostBalance(host_id=host_id) for host_id in host_ids], ignore_conflicts=True
+    )
+    updates = {'updated_at': timezone.now()}
+    for field, amounts in deltas.items():
+        if field not in BALANCE_FIELDS:
+            raise ValueError(f'Unknown balance field {field!r}')
+        change = Case(
+            *[When(host_id=host_id, then=Value(Decimal(amount))) for host_id, amount in amounts.items()],
+            default=Value(Decimal('0.00')),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )
+        updates[field] = F(field) + change
+    HostBalance.objects.filter(host_id__in=host_ids).update(**updates)
+
+
+def record_commission(commission):
+    """Count a new commission's earnings as pending for its host."""
+    adjust_balances(
+        pending={commission.host_id: commission.host_earnings},
+        commission={commission.host_id: commission.commission_amount},
+    )
+
+
+def release_delay():
+    return timezone.timedelta(hours=getattr(settings, 'PAYOUT_RELEASE_DELAY_HOURS', 24))
+
+
+def release_commissions(now=None):
+    """Make commissions payable once their event has been over for PAYOUT_RELEASE_DELAY_HOURS. Returns count."""
+    cutoff = (now or timezone.now()) - release_delay()
+    with db_transaction.atomic():
+        rows = list(
+            Commission.objects.select_for_update()
+            .filter(status='pending', event__end_date__lt=cutoff, booking__status='confirmed')
+            .values_list('pk', 'host_id', 'host_earnings')
+        )
+        if not rows:
+            return 0
+        Commission.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(status='calculated', updated_at=timezone.now())
+        earnings = {}
+        for _, host_id, amount in rows:
+            earnings[host_id] = earnings.get(host_id, Decimal('0.00')) + amount
+        adjust_balances(pending={h: -a for h, a in earnings.items()}, available=earnings)
+    return len(rows)
+
+
+def minimum_payout():
+    return Decimal(str(getattr(settings, 'PAYOUT_MIN_AMOUNT', 1000)))
+
+
+def create_payout_batch(min_amount=None):
+    """Turn every host's `calculated` commissions into one pending Payout. Returns the new payouts.
+
+    Hosts without a PayoutAccount, or owed less than `min_amount`, are left for a later run.
+    """
+    min_amount = minimum_payout() if min_amount is None else Decimal(str(min_amount))
+    accounts = {account.host_id: account for account in PayoutAccount.objects.all()}
+    if not accounts:
+        return []
+
+    with db_transaction.atomic():
+        rows = list(
+            Commission.objects.select_for_update()
+            .filter(status='calculated', host_id__in=accounts)
+            .order_by('host_id', 'pk')
+            .values('pk', 'host_id', 'booking_amount', 'commission_amount', 'host_earnings')
+        )
+        payouts, grouped = [], []
+        for host_id, group in groupby(rows, key=lambda row: row['host_id']):
+            group = list(group)
+            net = sum((row['host_earnings'] for row in group), Decimal('0.00'))
+            if net < min_amount:
+                continue
+            account = accounts[host_id]
+            payouts.append(Payout(
+                reference=f"PAYOUT{uuid.uuid4().hex[:12].upper()}",
+                host_id=host_id,
+                total_amount=sum((row['booking_amount'] for row in group), Decimal('0.00')),
+                commission_deducted=sum((row['commission_amount'] for row in group), Decimal('0.00')),
+                net_amount=net,
+                payment_method='paystack',
+                bank_name=account.bank_name,
+                account_name=account.account_name,
+                account_number=account.account_number,
+                description=f"Earnings from {len(group)} booking(s)",
+            ))
+            grouped.append(group)
+        if not payouts:
+            return []
+
+        Payout.objects.bulk_create(payouts)
+        PayoutItem.objects.bulk_create([
+            PayoutItem(payout=payout, commission_id=row['pk'], amount=row['host_earnings'])
+            for payout, group in zip(payouts, grouped)
+            for row in group
+        ])
+        commission_ids = [row['pk'] for group in grouped for row in group]
+        updated = Commission.objects.filter(pk__in=commission_ids, status='calculated').update(
+            status='paid', updated_at=timezone.now()
+        )
+        if updated != len(commission_ids):
+            raise ConcurrentPayoutRun(f'Expected to claim {len(commission_ids)} commissions, claimed {updated}')
+        totals = {payout.host_id: payout.net_amount for payout in payouts}
+        adjust_balances(available={h: -a for h, a in totals.items()}, in_transit=totals)
+    return payouts
+
+
+def _transfer(paystack, payout, account):
+    """Runs on a pool thread: HTTP only, no database access. Returns (recipient_code, response)."""
+    recipient_code = account.recipient_code
+    if not recipient_code:
+        response = paystack.transfer_recipient({
+            'type': 'nuban',
+            'name': account.account_name,
+            'account_number': account.account_number,
+            'bank_code': account.bank_code,
+            'currency': 'NGN',
+        })
+        if not response.get('status'):
+            return None, response
+        recipient_code = response['data']['recipient_code']
+    response = paystack.initiate_transfer({
+        'source': 'balance',
+        'amount': int(payout.net_amount * 100),
+        'recipient': recipient_code,
+        'reference': payout.reference,
+        'reason': payout.description or f'Payout {payout.reference}',
+    })
+    return recipient_code, response
+
+
+def send_payouts(payouts=None, max_workers=None):
+    """Start Paystack transfers for pending payouts, `max_workers` at a time. Returns a status -> count dict.
+
+    Payouts whose request failed stay pending and are resent (with the same reference) on the next run.
+    """
+    if payouts is None:
+        payouts = list(Payout.objects.filter(status='pending', payment_method='paystack').order_by('created_at'))
+    if not payouts:
+        return {}
+    max_workers = max_workers or getattr(settings, 'PAYOUT_TRANSFER_WORKERS', 4)
+    accounts = PayoutAccount.objects.in_bulk([payout.host_id for payout in payouts], field_name='host_id')
+    paystack = PaystackService()
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(_transfer, paystack, payout, accounts[payout.host_id]): payout
+            for payout in payouts if payout.host_id in accounts
+        }
+        for future in as_completed(futures):
+            payout = futures[future]
+            try:
+                recipient_code, response = future.result()
+            except Exception as e:
+                logger.exception('Transfer for payout %s failed', payout.reference)
+                recipient_code, response = None, {'status': False, 'message': str(e)}
+            account = accounts[payout.host_id]
+            if recipient_code and recipient_code != account.recipient_code:
+                PayoutAccount.objects.filter(pk=account.pk).update(recipient_code=recipient_code)
+                account.recipient_code = recipient_code
+            outcome = _apply_transfer_response(payout, response)
+            results[outcome] = results.get(outcome, 0) + 1
+    return results
+
+
+def _apply_transfer_response(payout, response):
+    data = response.get('data') if response.get('status') else None
+    if not isinstance(data, dict):
+        logger.warning('Transfer for payout %s not started: %s', payout.reference, response.get('message'))
+        Payout.objects.filter(pk=payout.pk, status='pending').update(
+            processor_response=response, updated_at=timezone.now()
+        )
+        return 'pending'
+    Payout.objects.filter(pk=payout.pk, status='pending').update(
+        status='processing',
+        processor_reference=data.get('transfer_code'),
+        processor_response=data,
+        processed_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    if data.get('status') == 'success':
+        settle_payout(payout.reference, True, data)
+        return 'completed'
+    if data.get('status') in TRANSFER_IN_FLIGHT:
+        return 'processing'
+    settle_payout(payout.reference, False, data)
+    return 'failed'
+
+
+def settle_payout(reference, succeeded, data=None):
+    """Finish a payout once Paystack reports the transfer. Idempotent; returns True if this call settled it.
+
+    A failed or reversed transfer (even one reversed after completing)
+    returns its commissions to the host's available balance.
+    """
+    now = timezone.now()
+    with db_transaction.atomic():
+        payout = Payout.objects.filter(reference=reference).first()
+        if payout is None:
+            return False
+        settles = ('pending', 'processing') if succeeded else ('pending', 'processing', 'completed')
+        if payout.status not in settles:
+            return False
+        fields = {'status': 'completed' if succeeded else 'failed', 'processor_response': data or {}, 'updated_at': now}
+        if succeeded:
+            fields['completed_at'] = now
+        # Conditional on the status we read, so concurrent reports settle the payout once
+        if not Payout.objects.filter(pk=payout.pk, status=payout.status).update(**fields):
+            return False
+        source = 'paid_out' if payout.status == 'completed' else 'in_transit'
+        if succeeded:
+            adjust_balances(in_transit={payout.host_id: -payout.net_amount}, paid_out={payout.host_id: payout.net_amount})
+        else:
+            Commission.objects.filter(payout_items__payout=payout, status='paid').update(
+                status='calculated', updated_at=now
+            )
+            adjust_balances(**{source: {payout.host_id: -payout.net_amount}, 'available': {payout.host_id: payout.net_amount}})
+    return True
+
+
+def run_payouts(min_amount=None, max_workers=None):
+    """Release, batch and send payouts. Returns a summary dict."""
+    released = release_commissions()
+    created = create_payout_batch(min_amount=min_amount)
+    sent = send_payouts(max_workers=max_workers)
+    return {'released': released, 'created': len(created), 'sent': sent}
+
+
+def rebuild_balances():
+    """Recompute every HostBalance from commissions and payouts. Returns the number of hosts."""
+    totals = {}
+
+    def add(host_id, field, amount):
+        totals.setdefault(host_id, dict.fromkeys(BALANCE_FIELDS, Decimal('0.00')))[field] += amount or Decimal('0.00')
+
+    commissions = Commission.objects.exclude(status='cancelled').values('host_id').annotate(
+        pending=Sum('host_earnings', filter=Q(status='pending')),
+        available=Sum('host_earnings', filter=Q(status='calculated')),
+        commission=Sum('commission_amount'),
+    )
+    for row in commissions:
+        for field in ('pending', 'available', 'commission'):
+            add(row['host_id'], field, row[field])
+    payouts = Payout.objects.values('host_id').annotate(
+        in_transit=Sum('net_amount', filter=Q(status__in=('pending', 'processing'))),
+        paid_out=Sum('net_amount', filter=Q(status='completed')),
+    )
+    for row in payouts:
+        for field in ('in_transit', 'paid_out'):
+            add(row['host_id'], field, row[field])
+
+    HostBalance.objects.bulk_create(
+        [HostBalance(host_id=host_id, **fields) for host_id, fields in totals.items()],
+        update_conflicts=True,
+        unique_fields=['host'],
+        update_fields=list(BALANCE_FIELDS),
+    )
+    HostBalance.objects.exclude(host_id__in=totals).update(**dict.fromkeys(BALANCE_FIELDS, Decimal('0.00')))
+    return len(totals)
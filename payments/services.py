@@ -1,114 +1,306 @@
+"""
+Paystack API client.
+
+All calls share one pooled requests.Session per process (keep-alive, so
+repeat calls skip the TCP/TLS handshake), carry a connect/read timeout,
+and go through a circuit breaker that fails fast while the gateway is
+down. Idempotent GETs are retried on connection errors and 429/5xx with
+jittered exponential backoff; POSTs are never retried. Per-endpoint
+latency is kept in `paystack_metrics`.
+
+Every method returns the decoded Paystack response, or
+{'status': False, 'message': ...} on failure. Async views use the `a`
+prefixed variants. They make the same call on one of PAYSTACK_POOL_SIZE
+threads, so the event loop keeps serving other requests while Paystack
+answers.
+"""
+import asyncio
+import hashlib
+import hmac
+import inspect
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
-from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class CircuitBreaker:
+    """Open after `failure_threshold` consecutive failures; allow one trial call after `reset_timeout` seconds."""
+
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def failure_threshold(self):
+        if self._failure_threshold is not None:
+            return self._failure_threshold
+        return _setting('PAYSTACK_BREAKER_THRESHOLD', 5)
+
+    @property
+    def reset_timeout(self):
+        if self._reset_timeout is not None:
+            return self._reset_timeout
+        return _setting('PAYSTACK_BREAKER_RESET_SECONDS', 30)
+
+    def reset(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning('Paystack circuit breaker opened after %d failures', self.failures)
+                self.opened_at = time.monotonic()
+
+
+class EndpointMetrics:
+    """Call count, error count and latency percentiles per Paystack endpoint."""
+
+    def __init__(self, window=500):
+        self._window = window
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, endpoint, seconds, ok):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {
+                'calls': 0, 'errors': 0, 'total': 0.0, 'max': 0.0, 'recent': deque(maxlen=self._window),
+            })
+            stats['calls'] += 1
+            stats['errors'] += 0 if ok else 1
+            stats['total'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+            stats['recent'].append(seconds)
+
+    def snapshot(self):
+        """{endpoint: {calls, errors, avg_ms, p50_ms, p95_ms, max_ms}}"""
+        result = {}
+        with self._lock:
+            for endpoint, stats in self._stats.items():
+                recent = sorted(stats['recent'])
+                pick = lambda q: recent[min(len(recent) - 1, int(q * len(recent)))] * 1000  # noqa: E731
+                result[endpoint] = {
+                    'calls': stats['calls'],
+                    'errors': stats['errors'],
+                    'avg_ms': stats['total'] / stats['calls'] * 1000,
+                    'p50_ms': pick(0.50),
+                    'p95_ms': pick(0.95),
+                    'max_ms': stats['max'] * 1000,
+                }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def _retry_policy():
+    options = dict(
+        total=_setting('PAYSTACK_MAX_RETRIES', 2),
+        backoff_factor=_setting('PAYSTACK_RETRY_BACKOFF', 0.3),
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    if 'backoff_jitter' in inspect.signature(Retry.__init__).parameters:
+        options['backoff_jitter'] = _setting('PAYSTACK_RETRY_JITTER', 0.2)
+    return Retry(**options)
+
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """The process-wide pooled session (rebuilt after a fork)."""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=_setting('PAYSTACK_POOL_SIZE', 10),
+                max_retries=_retry_policy(),
+            )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session, _session_pid = session, os.getpid()
+        return _session
+
+
+_executor = None
+_executor_pid = None
+
+
+def get_executor():
+    """Threads that run Paystack calls for async views, one per pooled connection (rebuilt after a fork)."""
+    global _executor, _executor_pid
+    with _session_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=_setting('PAYSTACK_POOL_SIZE', 10), thread_name_prefix='paystack')
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def reset_session():
+    """Drop the pooled session and breaker state (after settings change, and in tests)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+    circuit_breaker.reset()
+
+
+circuit_breaker = CircuitBreaker()
+paystack_metrics = EndpointMetrics()
+
 
 class PaystackService:
     """Service class for interacting with Paystack API"""
-    
+
     BASE_URL = 'https://api.paystack.co'
-    
+
     def __init__(self):
         self.secret_key = getattr(settings, 'PAYSTACK_SECRET_KEY', '')
         self.public_key = getattr(settings, 'PAYSTACK_PUBLIC_KEY', '')
         self.test_mode = getattr(settings, 'PAYSTACK_TEST_MODE', True)
-    
+        self.base_url = _setting('PAYSTACK_BASE_URL', self.BASE_URL).rstrip('/')
+        self.timeout = (_setting('PAYSTACK_CONNECT_TIMEOUT', 3.05), _setting('PAYSTACK_READ_TIMEOUT', 10))
+
     def get_headers(self):
         """Get request headers with authorization"""
         return {
             'Authorization': f'Bearer {self.secret_key}',
             'Content-Type': 'application/json',
         }
-    
-    def initialize_transaction(self, payment_data):
-        """Initialize a Paystack transaction"""
-        url = f'{self.BASE_URL}/transaction/initialize'
-        
+
+    def _request(self, method, path, endpoint, **kwargs):
+        """Call Paystack through the pooled session, breaker and metrics"""
+        if not circuit_breaker.allow():
+            paystack_metrics.record(endpoint, 0.0, False)
+            return {'status': False, 'message': 'Payment gateway temporarily unavailable, please try again shortly'}
+
+        start = time.perf_counter()
+        ok = False
         try:
-            response = requests.post(url, json=payment_data, headers=self.get_headers())
+            response = get_session().request(
+                method, f'{self.base_url}{path}', headers=self.get_headers(), timeout=self.timeout, **kwargs
+            )
+            # Client errors are our problem, not the gateway's; only 5xx/429 count against it
+            if response.status_code in RETRY_STATUSES:
+                circuit_breaker.record_failure()
+            else:
+                circuit_breaker.record_success()
             response.raise_for_status()
+            ok = True
             return response.json()
+        except requests.exceptions.HTTPError as e:
+            return {'status': False, 'message': str(e)}
         except requests.exceptions.RequestException as e:
+            circuit_breaker.record_failure()
             return {'status': False, 'message': str(e)}
-    
+        except ValueError as e:
+            return {'status': False, 'message': f'Invalid response from Paystack: {e}'}
+        finally:
+            paystack_metrics.record(endpoint, time.perf_counter() - start, ok)
+
+    async def _arequest(self, method, path, endpoint, **kwargs):
+        """`_request` for async views, run off the event loop"""
+        call = partial(self._request, method, path, endpoint, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(get_executor(), call)
+
+    def initialize_transaction(self, payment_data):
+        """Initialize a Paystack transaction"""
+        return self._request('POST', '/transaction/initialize', 'transaction.initialize', json=payment_data)
+
+    async def ainitialize_transaction(self, payment_data):
+        return await self._arequest('POST', '/transaction/initialize', 'transaction.initialize', json=payment_data)
+
     def verify_transaction(self, reference):
         """Verify a Paystack transaction"""
-        url = f'{self.BASE_URL}/transaction/verify/{reference}'
-        
-        try:
-            response = requests.get(url, headers=self.get_headers())
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {'status': False, 'message': str(e)}
-    
+        return self._request('GET', f'/transaction/verify/{reference}', 'transaction.verify')
+
+    async def averify_transaction(self, reference):
+        return await self._arequest('GET', f'/transaction/verify/{reference}', 'transaction.verify')
+
     def transfer_recipient(self, recipient_data):
         """Create a transfer recipient"""
-        url = f'{self.BASE_URL}/transferrecipient'
-        
-        try:
-            response = requests.post(url, json=recipient_data, headers=self.get_headers())
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {'status': False, 'message': str(e)}
-    
+        return self._request('POST', '/transferrecipient', 'transferrecipient.create', json=recipient_data)
+
     def initiate_transfer(self, transfer_data):
         """Initiate a transfer"""
-        url = f'{self.BASE_URL}/transfer'
-        
-        try:
-            response = requests.post(url, json=transfer_data, headers=self.get_headers())
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {'status': False, 'message': str(e)}
-    
+        return self._request('POST', '/transfer', 'transfer.initiate', json=transfer_data)
+
     def verify_transfer(self, transfer_code):
         """Verify a transfer"""
-        url = f'{self.BASE_URL}/transfer/verify/{transfer_code}'
-        
-        try:
-            response = requests.get(url, headers=self.get_headers())
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {'status': False, 'message': str(e)}
-    
+        return self._request('GET', f'/transfer/verify/{transfer_code}', 'transfer.verify')
+
     def get_transaction(self, transaction_id):
         """Get transaction details"""
-        url = f'{self.BASE_URL}/transaction/{transaction_id}'
-        
-        try:
-            response = requests.get(url, headers=self.get_headers())
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {'status': False, 'message': str(e)}
-    
+        return self._request('GET', f'/transaction/{transaction_id}', 'transaction.fetch')
+
     def list_transactions(self, params=None):
         """List transactions"""
-        url = f'{self.BASE_URL}/transaction'
-        
-        try:
-            response = requests.get(url, params=params, headers=self.get_headers())
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {'status': False, 'message': str(e)}
-    
+        return self._request('GET', '/transaction', 'transaction.list', params=params)
+
     def get_balance(self):
         """Get account balance"""
-        url = f'{self.BASE_URL}/balance'
-        
-        try:
-            response = requests.get(url, headers=self.get_headers())
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {'status': False, 'message': str(e)}
-    
+        return self._request('GET', '/balance', 'balance')
+
     def verify_webhook_signature(self, payload, signature):
-        """Verify webhook signature"""
-        # You need to implement this based on Paystack's webhook verification
-        # This is a placeholder implementation
-        return True
\ No newline at end of file
+        """Check the x-paystack-signature header: HMAC-SHA512 of the raw body keyed with the secret key"""
+        if not self.secret_key or not signature:
+            return False
+        expected = hmac.new(self.secret_key.encode(), payload, hashlib.sha512).hexdigest()
+        return hmac.compare_digest(expected, signature)
@@ -1,3 +1,357 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from events.models import Event, Booking
+from events.inventory import create_held_booking
+from .models import (
+    Commission, HostBalance, PaymentVerification, Payout, PayoutAccount, Transaction, WebhookEvent,
+)
+from .payouts import rebuild_balances, run_payouts, settle_payout
+from .transitions import complete_payment
+from .services import PaystackService, circuit_breaker, paystack_metrics, reset_session
+from .verification import process_due, reconcile
+from .webhooks import process_pending
+
+User = get_user_model()
+
+SECRET = 'sk_test_secret'
+
+
+def make_paid_booking(quantity=2):
+    host = User.objects.create_user(username='host', email='host@example.com', password='pass')
+    buyer = User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+    start = timezone.now() + timezone.timedelta(days=7)
+    event = Event.objects.create(
+        title='Lagos Live', description='', short_description='', host=host,
+        venue_name='Eko Hall', venue_address='', city='Lagos', state='Lagos',
+        start_date=start, end_date=start + timezone.timedelta(hours=4),
+        ticket_price=5000, available_tickets=10, status='published',
+    )
+    booking = create_held_booking(event, buyer, quantity)
+    txn = Transaction.objects.create(
+        reference=booking.booking_reference, transaction_type='booking', user=buyer,
+        amount=booking.total_price, paystack_reference=booking.booking_reference, booking=booking,
+    )
+    return booking, txn
+
+
+@override_settings(PAYSTACK_SECRET_KEY=SECRET)
+class WebhookInboxTests(TestCase):
+    def setUp(self):
+        self.booking, self.txn = make_paid_booking()
+        self.url = reverse('payments:paystack_webhook')
+
+    def post(self, body, secret=SECRET):
+        raw = json.dumps(body).encode()
+        signature = hmac.new(secret.encode(), raw, hashlib.sha512).hexdigest()
+        return self.client.post(self.url, raw, content_type='application/json',
+                                HTTP_X_PAYSTACK_SIGNATURE=signature)
+
+    def charge(self, event='charge.success', amount=None, currency='NGN'):
+        amount = int(self.txn.amount * 100) if amount is None else amount
+        return {'event': event, 'data': {'id': 42, 'reference': self.txn.paystack_reference, 'status': 'success',
+                                         'amount': amount, 'currency': currency}}
+
+    def test_bad_signature_is_rejected(self):
+        self.assertEqual(self.post(self.charge(), secret='wrong').status_code, 401)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_webhook_is_stored_not_applied(self):
+        with self.assertNumQueries(3):  # savepoint, insert, release
+            self.assertEqual(self.post(self.charge()).status_code, 200)
+        self.txn.refresh_from_db()
+        self.assertEqual(self.txn.status, 'pending')
+
+    def test_redeliveries_are_applied_once(self):
+        for _ in range(3):
+            self.assertEqual(self.post(self.charge()).status_code, 200)
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+        self.assertEqual(process_pending(), {'processed': 1})
+        self.assertEqual(process_pending(), {})
+        self.txn.refresh_from_db()
+        self.booking.refresh_from_db()
+        self.assertEqual((self.txn.status, self.booking.status), ('success', 'confirmed'))
+        self.assertEqual(Commission.objects.get(transaction=self.txn).commission_amount, 1000)
+        self.assertEqual(Event.objects.get(pk=self.booking.event_id).sold_tickets, 2)
+
+    def test_late_failure_does_not_undo_success(self):
+        self.post(self.charge())
+        self.post(self.charge('charge.failed'))
+        process_pending()
+        self.txn.refresh_from_db()
+        self.assertEqual(self.txn.status, 'success')
+        self.assertEqual(Booking.objects.get(pk=self.booking.pk).status, 'confirmed')
+
+    def test_underpayment_is_not_applied(self):
+        self.post(self.charge(amount=100))
+        self.assertEqual(process_pending(), {'failed': 1})
+        self.txn.refresh_from_db()
+        self.assertEqual(self.txn.status, 'failed')
+        self.assertEqual(Booking.objects.get(pk=self.booking.pk).status, 'cancelled')
+        self.assertFalse(Commission.objects.exists())
+
+    def test_wrong_currency_is_not_applied(self):
+        self.post(self.charge(currency='USD'))
+        self.assertEqual(process_pending(), {'failed': 1})
+        self.assertIn('USD', WebhookEvent.objects.get().last_error)
+        self.assertFalse(Commission.objects.exists())
+
+    def test_late_success_after_cancellation_is_not_credited(self):
+        self.post(self.charge('charge.failed'))
+        process_pending()
+        self.assertEqual(Booking.objects.get(pk=self.booking.pk).status, 'cancelled')
+
+        self.post(self.charge())
+        self.assertEqual(process_pending(), {'failed': 1})
+        self.txn.refresh_from_db()
+        self.assertEqual(self.txn.status, 'failed')
+        self.assertFalse(Commission.objects.exists())
+        self.assertFalse(HostBalance.objects.filter(pending__gt=0).exists())
+
+    def test_unknown_reference_is_ignored(self):
+        self.post({'event': 'charge.success', 'data': {'id': 7, 'reference': 'nope'}})
+        self.assertEqual(process_pending(), {'ignored': 1})
+
+
+class StubPaystack(BaseHTTPRequestHandler):
+    """Local Paystack stand-in: replies from `server.script` (status codes, or 'slow'), then 200."""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        self.server.requests.append((self.command, self.path, self.client_address[1]))
+        step = self.server.script.pop(0) if self.server.script else 200
+        if step == 'slow':
+            time.sleep(0.5)
+            step = 200
+        body = json.dumps({'status': step == 200, 'data': {'path': self.path}}).encode()
+        self.send_response(step)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except BrokenPipeError:  # the client already timed out
+            pass
+
+    do_GET = do_POST = reply
+
+
+@override_settings(PAYSTACK_SECRET_KEY=SECRET, PAYSTACK_RETRY_BACKOFF=0, PAYSTACK_RETRY_JITTER=0,
+                   PAYSTACK_READ_TIMEOUT=0.2, PAYSTACK_BREAKER_THRESHOLD=3)
+class PaystackClientTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubPaystack)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        reset_session()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests, self.server.script = [], []
+        reset_session()
+        paystack_metrics.reset()
+        with self.settings(PAYSTACK_BASE_URL=f'http://127.0.0.1:{self.server.server_port}'):
+            self.paystack = PaystackService()
+
+    def test_connections_are_reused(self):
+        for _ in range(3):
+            self.assertTrue(self.paystack.verify_transaction('ref')['status'])
+        self.assertEqual(len({port for _, _, port in self.server.requests}), 1)
+        self.assertEqual(paystack_metrics.snapshot()['transaction.verify']['calls'], 3)
+
+    def test_get_is_retried_on_server_errors(self):
+        self.server.script = [503, 502]
+        self.assertTrue(self.paystack.verify_transaction('ref')['status'])
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_post_is_not_retried(self):
+        self.server.script = [503]
+        self.assertFalse(self.paystack.initialize_transaction({'amount': 100})['status'])
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_slow_response_times_out(self):
+        self.server.script = ['slow']
+        result = self.paystack.initialize_transaction({'amount': 100})
+        self.assertFalse(result['status'])
+        self.assertEqual(paystack_metrics.snapshot()['transaction.initialize']['errors'], 1)
+
+    def test_breaker_fails_fast_then_recovers(self):
+        self.server.script = [500] * 3
+        for _ in range(3):
+            self.paystack.initialize_transaction({})
+        self.assertEqual(circuit_breaker.state, 'open')
+        self.assertIn('unavailable', self.paystack.get_balance()['message'])
+        self.assertEqual(len(self.server.requests), 3)
+
+        circuit_breaker.opened_at -= 60
+        self.assertTrue(self.paystack.get_balance()['status'])
+        self.assertEqual(circuit_breaker.state, 'closed')
+
+    def test_async_calls_share_the_client(self):
+        async def verify_three():
+            return await asyncio.gather(*(self.paystack.averify_transaction(f'ref{i}') for i in range(3)))
+
+        self.assertTrue(all(result['status'] for result in async_to_sync(verify_three)()))
+        self.assertEqual(paystack_metrics.snapshot()['transaction.verify']['calls'], 3)
+
+    def test_async_process_payment_view(self):
+        booking, txn = make_paid_booking()
+        txn.delete()
+        self.client.force_login(booking.user)
+        initialized = {'status': True, 'data': {'reference': 'ps_ref', 'authorization_url': 'https://checkout.test/x'}}
+        with mock.patch.object(PaystackService, 'ainitialize_transaction', mock.AsyncMock(return_value=initialized)):
+            response = self.client.get(reverse('payments:process_payment', args=[booking.booking_reference]))
+        self.assertRedirects(response, 'https://checkout.test/x', fetch_redirect_response=False)
+        self.assertEqual(Transaction.objects.get(booking=booking).paystack_reference, 'ps_ref')
+
+
+def paystack_says(status, amount=1000000):
+    return mock.patch(
+        'payments.verification.PaystackService.verify_transaction',
+        return_value={'status': True, 'data': {'status': status, 'amount': amount, 'reference': 'ref'}},
+    )
+
+
+@override_settings(PAYMENT_VERIFY_ASYNC=True, PAYMENT_VERIFY_MAX_ATTEMPTS=2)
+class PaymentVerificationTests(TestCase):
+    def setUp(self):
+        self.booking, self.txn = make_paid_booking()
+        self.client.force_login(self.booking.user)
+        self.status_url = reverse('payments:payment_status', args=[self.txn.reference])
+
+    def callback(self):
+        return self.client.get(reverse('payments:payment_success', args=[self.txn.reference]), {'trxref': 'ref'})
+
+    def test_callback_queues_verification_without_calling_paystack(self):
+        with mock.patch('payments.verification.PaystackService.verify_transaction') as verify:
+            self.assertRedirects(self.callback(), self.status_url, fetch_redirect_response=False)
+        verify.assert_not_called()
+        self.assertEqual(PaymentVerification.objects.get().status, 'pending')
+        self.assertEqual(self.client.get(self.status_url, {'format': 'json'}).json(), {'status': 'pending'})
+
+    def test_worker_confirms_booking(self):
+        self.callback()
+        with paystack_says('success'):
+            self.assertEqual(process_due(), {'verified': 1})
+        self.txn.refresh_from_db()
+        self.booking.refresh_from_db()
+        self.assertEqual((self.txn.status, self.booking.status), ('success', 'confirmed'))
+        self.assertTrue(Commission.objects.filter(transaction=self.txn).exists())
+        self.assertRedirects(self.client.get(self.status_url),
+                             reverse('payments:transaction_detail', args=[self.txn.reference]),
+                             fetch_redirect_response=False)
+
+    def test_underpayment_is_not_confirmed(self):
+        self.callback()
+        with paystack_says('success', amount=100):
+            self.assertEqual(process_due(), {'failed': 1})
+        # The failed payment gives the held seats back
+        self.assertEqual(Booking.objects.get(pk=self.booking.pk).status, 'cancelled')
+        self.assertEqual(Event.objects.get(pk=self.booking.event_id).reserved_tickets, 0)
+
+    def test_inconclusive_checks_back_off_then_expire(self):
+        self.callback()
+        with paystack_says('ongoing'):
+            self.assertEqual(process_due(), {'pending': 1})
+            self.assertEqual(process_due(), {})  # not due yet
+            PaymentVerification.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(process_due(), {'expired': 1})
+        self.assertEqual(self.client.get(self.status_url, {'format': 'json'}).json(), {'status': 'unconfirmed'})
+
+    def test_reconcile_queues_unverified_transactions(self):
+        self.assertEqual(reconcile(), 0)  # too recent
+        Transaction.objects.filter(pk=self.txn.pk).update(created_at=timezone.now() - timezone.timedelta(hours=1))
+        self.assertEqual(reconcile(), 1)
+        self.assertEqual(reconcile(), 0)  # already queued
+        with paystack_says('abandoned'):
+            self.assertEqual(process_due(), {'failed': 1})
+        self.assertEqual(Transaction.objects.get(pk=self.txn.pk).status, 'failed')
+
+
+def transfer_says(status):
+    return mock.patch(
+        'payments.payouts.PaystackService.initiate_transfer',
+        return_value={'status': True, 'data': {'status': status, 'transfer_code': 'TRF_1'}},
+    )
+
+
+class PayoutTests(TestCase):
+    def setUp(self):
+        self.booking, self.txn = make_paid_booking()
+        self.host = self.booking.event.host
+        complete_payment(self.txn)
+        PayoutAccount.objects.create(host=self.host, bank_name='Eko Bank', bank_code='058',
+                                     account_name='Host', account_number='0123456789', recipient_code='RCP_1')
+
+    def balance(self):
+        row = HostBalance.objects.get(host=self.host)
+        return row.pending, row.available, row.in_transit, row.paid_out
+
+    def end_event(self):
+        Event.objects.filter(pk=self.booking.event_id).update(end_date=timezone.now() - timezone.timedelta(days=2))
+
+    def test_earnings_wait_for_the_event_to_end(self):
+        self.assertEqual(self.balance(), (9000, 0, 0, 0))
+        with transfer_says('pending') as transfer:
+            self.assertEqual(run_payouts()['created'], 0)
+        transfer.assert_not_called()
+
+    def test_payout_is_batched_sent_and_settled(self):
+        self.end_event()
+        with transfer_says('pending') as transfer:
+            summary = run_payouts()
+        self.assertEqual((summary['released'], summary['created'], summary['sent']), (1, 1, {'processing': 1}))
+        payout = Payout.objects.get()
+        self.assertEqual(transfer.call_args[0][0]['reference'], payout.reference)
+        self.assertEqual(transfer.call_args[0][0]['amount'], 900000)
+        self.assertEqual(Commission.objects.get().status, 'paid')
+        self.assertEqual(self.balance(), (0, 0, 9000, 0))
+
+        self.assertTrue(settle_payout(payout.reference, True))
+        self.assertFalse(settle_payout(payout.reference, True))
+        self.assertEqual(self.balance(), (0, 0, 0, 9000))
+        self.assertEqual(HostBalance.objects.get(host=self.host).commission, 1000)
+
+    def test_failed_transfer_returns_earnings(self):
+        self.end_event()
+        with transfer_says('failed'):
+            self.assertEqual(run_payouts()['sent'], {'failed': 1})
+        self.assertEqual(Payout.objects.get().status, 'failed')
+        self.assertEqual(Commission.objects.get().status, 'calculated')
+        self.assertEqual(self.balance(), (0, 9000, 0, 0))
+
+    def test_rebuild_matches_running_balance(self):
+        self.end_event()
+        with transfer_says('pending'):
+            run_payouts()
+        running = self.balance()
+        HostBalance.objects.update(in_transit=0, commission=0)
+        rebuild_balances()
+        self.assertEqual(self.balance(), running)
+        self.assertEqual(HostBalance.objects.get(host=self.host).commission, 1000)
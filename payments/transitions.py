@@ -0,0 +1,118 @@
+"""
+Idempotent payment state transitions.
+
+Webhooks, the payment callback and reconciliation can all report the
+same charge, in any order and any number of times. Each transition is a
+conditional UPDATE on the current status, so only the first report does
+the work and repeats are no-ops.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from events.inventory import confirm_booking, release_hold
+from .models import Commission, Transaction
+from .payouts import record_commission
+
+
+# Bookings are charged in naira
+CURRENCY = 'NGN'
+
+
+class PaymentNotApplied(Exception):
+    """A charge succeeded but cannot pay for its booking; it needs a refund or manual review."""
+
+
+def charge_problem(txn, data):
+    """Why a successful Paystack charge `data` doesn't pay for `txn`, or '' if it does."""
+    expected = int(txn.amount * 100)
+    if int(data.get('amount') or 0) < expected:
+        return f"Paystack reports {data.get('amount')} kobo, expected {expected}"
+    currency = (data.get('currency') or CURRENCY).upper()
+    if currency != CURRENCY:
+        return f'Paid in {currency}, expected {CURRENCY}'
+    return ''
+
+
+def commission_rate():
+    """Platform commission as a percentage (ADMIN_COMMISSION_RATE is a fraction)."""
+    return Decimal(str(getattr(settings, 'ADMIN_COMMISSION_RATE', 0.10))) * 100
+
+
+def complete_payment(txn, gateway_data=None, payment_reference=None):
+    """Mark `txn` successful, confirm its booking and record the commission.
+
+    Returns True if this call made the transition, False if the transaction
+    was already successful. Raises SoldOut if the booking's seats are gone,
+    and PaymentNotApplied if the booking was cancelled or refunded (say a
+    late charge.success after the payment was failed); the transaction is
+    then left as it was and no commission is recorded.
+    """
+    now = timezone.now()
+    with db_transaction.atomic():
+        updated = Transaction.objects.filter(pk=txn.pk).exclude(status='success').update(
+            status='success',
+            gateway_response=gateway_data or {},
+            processed_at=now,
+            updated_at=now,
+        )
+        if not updated:
+            return False
+
+        booking = txn.booking
+        if booking is not None:
+            confirmed = confirm_booking(
+                booking, payment_reference=payment_reference or txn.paystack_reference or txn.reference
+            )
+            if not confirmed:
+                booking.refresh_from_db(fields=['status'])
+                if booking.status != 'confirmed':
+                    raise PaymentNotApplied(f'Booking {booking.booking_reference} is {booking.status}')
+            commission, created = Commission.objects.get_or_create(
+                transaction=txn,
+                defaults={
+                    'booking': booking,
+                    'event': booking.event,
+                    'host': booking.event.host,
+                    'booking_amount': booking.total_price,
+                    'commission_rate': commission_rate(),
+                },
+            )
+            if created:
+                record_commission(commission)
+
+    txn.status = 'success'
+    txn.gateway_response = gateway_data or {}
+    txn.processed_at = now
+    return True
+
+
+def fail_payment(txn, gateway_data=None):
+    """Mark a pending transaction failed and give its booking's held seats back.
+
+    A successful transaction is never downgraded.
+    """
+    with db_transaction.atomic():
+        updated = Transaction.objects.filter(pk=txn.pk, status='pending').update(
+            status='failed',
+            gateway_response=gateway_data or {},
+            updated_at=timezone.now(),
+        )
+        if updated and txn.booking is not None:
+            release_hold(txn.booking)
+    if updated:
+        txn.status = 'failed'
+    return bool(updated)
+
+
+def transaction_for_reference(reference):
+    """The transaction Paystack knows by `reference`, or None."""
+    return (
+        Transaction.objects.select_related('booking__event__host')
+        .filter(paystack_reference=reference)
+        .first()
+        or Transaction.objects.select_related('booking__event__host').filter(reference=reference).first()
+    )
+
@@ -7,6 +7,7 @@ urlpatterns = [
     # Payment processing
     path('process/<str:booking_reference>/', views.process_payment, name='process_payment'),
     path('success/<str:booking_reference>/', views.payment_success, name='payment_success'),
+    path('status/<str:booking_reference>/', views.payment_status, name='payment_status'),
     path('failed/<str:booking_reference>/', views.payment_failed, name='payment_failed'),
     path('webhook/paystack/', views.paystack_webhook, name='paystack_webhook'),
     
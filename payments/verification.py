@@ -0,0 +1,193 @@
+"""
+Queued payment verification.
+
+The Paystack callback no longer calls the API while the buyer waits: it
+queues a PaymentVerification and sends the buyer to a status page that
+polls until the payment is settled. `process_due`, run by the
+`verify_payments` command, asks Paystack about each queued transaction
+and applies the outcome in one database transaction. Checks that stay
+inconclusive are retried with backoff and eventually expire.
+
+`reconcile` (the `reconcile_payments` command) queues pending
+transactions that nobody verified: the buyer closed the tab before the
+callback and no webhook arrived.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
+
+from events.inventory import SoldOut
+from .models import PaymentVerification, Transaction
+from .services import PaystackService
+from .transitions import PaymentNotApplied, charge_problem, complete_payment, fail_payment
+
+logger = logging.getLogger(__name__)
+
+# Paystack statuses that settle a transaction; anything else (ongoing, pending, ...) is checked again later
+FAILED_STATUSES = ('failed', 'abandoned', 'reversed')
+
+
+def max_attempts():
+    return getattr(settings, 'PAYMENT_VERIFY_MAX_ATTEMPTS', 8)
+
+
+def retry_delay(attempts):
+    """Exponential backoff from PAYMENT_VERIFY_RETRY_SECONDS, capped at ten minutes."""
+    base = getattr(settings, 'PAYMENT_VERIFY_RETRY_SECONDS', 5)
+    return timezone.timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), 600))
+
+
+def enqueue_verification(txn):
+    """Queue (or re-arm) a check of `txn` to run as soon as a worker is free.
+
+    Returns the PaymentVerification, or None if the transaction already succeeded.
+    """
+    if txn.status == 'success':
+        return None
+    item, created = PaymentVerification.objects.get_or_create(transaction=txn)
+    if not created:
+        PaymentVerification.objects.filter(pk=item.pk, status__in=('pending', 'expired')).update(
+            status='pending', attempts=0, next_attempt_at=timezone.now()
+        )
+    return item
+
+
+def payment_state(txn):
+    """What to tell the buyer: 'confirmed', 'failed', 'unconfirmed' (we gave up waiting) or 'pending'."""
+    if txn.status == 'success':
+        return 'confirmed'
+    if txn.status == 'failed':
+        return 'failed'
+    status = PaymentVerification.objects.filter(transaction=txn).values_list('status', flat=True).first()
+    if status == 'failed':
+        return 'failed'
+    if status == 'expired':
+        return 'unconfirmed'
+    return 'pending'
+
+
+def _finish(item, status, error=''):
+    PaymentVerification.objects.filter(pk=item.pk).update(
+        status=status, last_error=error, completed_at=timezone.now()
+    )
+
+
+def _retry(item, error):
+    if item.attempts >= max_attempts():
+        logger.warning('Giving up verifying %s after %d attempts: %s',
+                       item.transaction.reference, item.attempts, error)
+        _finish(item, 'expired', error)
+        return 'expired'
+    PaymentVerification.objects.filter(pk=item.pk).update(
+        status='pending', last_error=error, next_attempt_at=timezone.now() + retry_delay(item.attempts)
+    )
+    return 'pending'
+
+
+def check(item):
+    """Ask Paystack about a claimed verification and apply the outcome. Returns the new status."""
+    txn = item.transaction
+    response = PaystackService().verify_transaction(txn.paystack_reference or txn.reference)
+    data = response.get('data') if response.get('status') else None
+    if not isinstance(data, dict):
+        return _retry(item, response.get('message') or 'No transaction data in Paystack response')
+
+    gateway_status = data.get('status')
+    if gateway_status == 'success':
+        problem = charge_problem(txn, data)
+        if problem:
+            logger.error('Payment %s not accepted: %s', txn.reference, problem)
+            fail_payment(txn, gateway_data=data)
+            _finish(item, 'failed', problem)
+            return 'failed'
+        try:
+            with db_transaction.atomic():
+                complete_payment(txn, gateway_data=data, payment_reference=data.get('reference'))
+                _finish(item, 'verified')
+        except (SoldOut, PaymentNotApplied) as e:
+            # Paid but not for a booking we can confirm: needs a refund or review, not another check
+            logger.error('Payment %s verified but not applied: %s', txn.reference, e)
+            _finish(item, 'failed', str(e))
+            return 'failed'
+        return 'verified'
+
+    if gateway_status in FAILED_STATUSES:
+        with db_transaction.atomic():
+            fail_payment(txn, gateway_data=data)
+            _finish(item, 'failed', data.get('gateway_response') or gateway_status)
+        return 'failed'
+
+    return _retry(item, f'Paystack status is {gateway_status!r}')
+
+
+def claim(pk):
+    """Take a due verification for this worker. Returns it or None if another worker has it."""
+    claimed = PaymentVerification.objects.filter(pk=pk, status='pending').update(
+        status='processing', attempts=F('attempts') + 1, locked_at=timezone.now()
+    )
+    if claimed:
+        return PaymentVerification.objects.select_related('transaction__booking__event__host').get(pk=pk)
+    return None
+
+
+def run_verification(pk):
+    """Claim and check one verification now. Returns its new status, or None if it was already taken."""
+    item = claim(pk)
+    if item is None:
+        return None
+    try:
+        return check(item)
+    except Exception as e:
+        logger.exception('Verifying %s failed', item.transaction.reference)
+        return _retry(item, str(e))
+
+
+def process_due(batch_size=50):
+    """Check up to `batch_size` due verifications. Returns a status -> count dict."""
+    results = {}
+    pks = list(
+        PaymentVerification.objects.filter(status='pending', next_attempt_at__lte=timezone.now())
+        .order_by('next_attempt_at', 'pk')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    for pk in pks:
+        outcome = run_verification(pk)
+        if outcome is not None:
+            results[outcome] = results.get(outcome, 0) + 1
+    return results
+
+
+def requeue_stuck(older_than_minutes=10):
+    """Return checks left 'processing' by a crashed worker to the queue. Returns checks requeued."""
+    cutoff = timezone.now() - timezone.timedelta(minutes=older_than_minutes)
+    return PaymentVerification.objects.filter(status='processing', locked_at__lt=cutoff).update(status='pending')
+
+
+def reconcile(older_than_minutes=None, window_hours=None):
+    """Queue checks for Paystack transactions still pending after `older_than_minutes`. Returns checks queued.
+
+    Transactions older than `window_hours` are left alone, and so are ones
+    whose check is queued or already settled; expired checks are re-armed.
+    """
+    if older_than_minutes is None:
+        older_than_minutes = getattr(settings, 'PAYMENT_RECONCILE_AFTER_MINUTES', 30)
+    if window_hours is None:
+        window_hours = getattr(settings, 'PAYMENT_RECONCILE_WINDOW_HOURS', 48)
+    now = timezone.now()
+    stale = (
+        Transaction.objects.filter(
+            status='pending',
+            payment_method='paystack',
+            created_at__lt=now - timezone.timedelta(minutes=older_than_minutes),
+            created_at__gte=now - timezone.timedelta(hours=window_hours),
+        )
+        .exclude(verification__status__in=('pending', 'processing', 'verified', 'failed'))
+    )
+    queued = 0
+    for txn in stale.iterator():
+        enqueue_verification(txn)
+        queued += 1
+    return queued
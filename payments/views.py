@@ -1,23 +1,31 @@
 import json
 import hashlib
-from django.shortcuts import render, redirect, get_object_or_404
+import logging
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.conf import settings
-from django.utils import timezone
 from django.urls import reverse
-from decimal import Decimal
 
 from events.models import Booking
-from .models import Transaction, Commission, Payout
+from .models import Transaction, Commission, HostBalance, Payout
 from .services import PaystackService
+from .verification import enqueue_verification, payment_state, run_verification
+from .webhooks import record_webhook
+from core.pagination import paginate_listing
 
-def process_payment(request, booking_reference):
-    """Process payment for a booking"""
-    booking = get_object_or_404(Booking, booking_reference=booking_reference, user=request.user)
+logger = logging.getLogger(__name__)
+
+@login_required
+async def process_payment(request, booking_reference):
+    """Process payment for a booking (async, so waiting on Paystack doesn't hold a worker)"""
+    user = await request.auser()
+    booking = await aget_object_or_404(
+        Booking.objects.select_related('event'), booking_reference=booking_reference, user=user
+    )
     
     if booking.status != 'pending':
         messages.error(request, 'This booking has already been processed!')
@@ -36,21 +44,21 @@ def process_payment(request, booking_reference):
         ),
         'metadata': {
             'booking_reference': booking.booking_reference,
-            'user_id': request.user.id,
+            'user_id': user.id,
             'event_id': booking.event.id,
             'quantity': booking.quantity
         }
     }
     
     try:
-        response = paystack_service.initialize_transaction(payment_data)
+        response = await paystack_service.ainitialize_transaction(payment_data)
         
         if response['status']:
             # Create transaction record
-            transaction = Transaction.objects.create(
+            transaction = await Transaction.objects.acreate(
                 reference=booking.booking_reference,
                 transaction_type='booking',
-                user=request.user,
+                user=user,
                 amount=booking.total_price,
                 payment_method='paystack',
                 paystack_reference=response['data']['reference'],
@@ -69,65 +77,43 @@ def process_payment(request, booking_reference):
         return redirect('events:event_detail', slug=booking.event.slug)
 
 def payment_success(request, booking_reference):
-    """Handle successful payment callback"""
+    """Handle the Paystack callback: queue verification and show the payment status page"""
     booking = get_object_or_404(Booking, booking_reference=booking_reference, user=request.user)
+    transaction = Transaction.objects.filter(reference=booking.booking_reference, user=request.user).first()
     
-    # Verify payment with Paystack
-    paystack_service = PaystackService()
+    if transaction is None:
+        messages.error(request, 'Payment reference not found.')
+        return redirect('payments:payment_failed', booking_reference=booking_reference)
     
-    try:
-        # Get transaction reference from URL parameter
-        trxref = request.GET.get('trxref') or request.GET.get('reference')
-        
-        if trxref:
-            # Verify transaction
-            response = paystack_service.verify_transaction(trxref)
-            
-            if response['status'] and response['data']['status'] == 'success':
-                # Update booking status
-                booking.status = 'confirmed'
-                booking.payment_reference = trxref
-                booking.save()
-                
-                # Update transaction
-                transaction = Transaction.objects.get(reference=booking_reference)
-                transaction.status = 'success'
-                transaction.gateway_response = response['data']
-                transaction.processed_at = timezone.now()
-                transaction.save()
-                
-                # Create commission record
-                commission = Commission.objects.create(
-                    transaction=transaction,
-                    booking=booking,
-                    event=booking.event,
-                    host=booking.event.host,
-                    booking_amount=booking.total_price,
-                    commission_rate=Decimal('10.00'),  # 10% commission
-                )
-                
-                # Update event sold tickets
-                booking.event.sold_tickets += booking.quantity
-                booking.event.save(update_fields=['sold_tickets'])
-                
-                messages.success(request, 'Payment successful! Your booking is confirmed.')
-                return redirect('payments:transaction_detail', reference=booking_reference)
-            else:
-                # Payment verification failed
-                transaction = Transaction.objects.get(reference=booking_reference)
-                transaction.status = 'failed'
-                transaction.gateway_response = response.get('data', {})
-                transaction.save()
-                
-                messages.error(request, 'Payment verification failed. Please contact support.')
-                return redirect('payments:payment_failed', booking_reference=booking_reference)
-        else:
-            messages.error(request, 'Payment reference not found.')
-            return redirect('payments:payment_failed', booking_reference=booking_reference)
-            
-    except Exception as e:
-        messages.error(request, f'Payment verification error: {str(e)}')
+    # The verification worker confirms the payment; with PAYMENT_VERIFY_ASYNC off it is checked right here
+    verification = enqueue_verification(transaction)
+    if verification is not None and not getattr(settings, 'PAYMENT_VERIFY_ASYNC', False):
+        run_verification(verification.pk)
+    
+    return redirect('payments:payment_status', booking_reference=booking_reference)
+
+@login_required
+def payment_status(request, booking_reference):
+    """Wait for a payment to be verified; polled with ?format=json by the status page"""
+    transaction = get_object_or_404(Transaction, reference=booking_reference, user=request.user)
+    state = payment_state(transaction)
+    
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'status': state})
+    
+    if state == 'confirmed':
+        messages.success(request, 'Payment successful! Your booking is confirmed.')
+        return redirect('payments:transaction_detail', reference=booking_reference)
+    if state == 'failed':
+        messages.error(request, 'Payment verification failed. Please contact support.')
         return redirect('payments:payment_failed', booking_reference=booking_reference)
+    
+    context = {
+        'transaction': transaction,
+        'booking_reference': booking_reference,
+        'state': state,
+    }
+    return render(request, 'payments/payment_status.html', context)
 
 def payment_failed(request, booking_reference):
     """Handle failed payment"""
@@ -142,54 +128,23 @@ def payment_failed(request, booking_reference):
 @csrf_exempt
 @require_POST
 def paystack_webhook(request):
-    """Handle Paystack webhooks"""
+    """Handle Paystack webhooks: verify, store and acknowledge; `process_webhooks` applies them"""
+    signature = request.META.get('HTTP_X_PAYSTACK_SIGNATURE', '')
+    if not PaystackService().verify_webhook_signature(request.body, signature):
+        logger.warning('Rejected Paystack webhook with a bad signature')
+        return HttpResponse(status=401)
+    
     try:
-        # Get the raw body and verify signature
-        payload = request.body
-        signature = request.META.get('HTTP_X_PAYSTACK_SIGNATURE')
-        
-        # Verify webhook signature (you should implement this)
-        # For now, we'll process the webhook
-        
-        data = json.loads(payload)
-        event_type = data.get('event')
-        
-        if event_type == 'charge.success':
-            # Process successful payment
-            reference = data['data']['reference']
-            transaction = Transaction.objects.filter(paystack_reference=reference).first()
-            
-            if transaction:
-                transaction.status = 'success'
-                transaction.gateway_response = data['data']
-                transaction.processed_at = timezone.now()
-                transaction.save()
-                
-                # Update booking
-                if transaction.booking:
-                    transaction.booking.status = 'confirmed'
-                    transaction.booking.payment_reference = reference
-                    transaction.booking.save()
-        
-        elif event_type == 'charge.failed':
-            # Process failed payment
-            reference = data['data']['reference']
-            transaction = Transaction.objects.filter(paystack_reference=reference).first()
-            
-            if transaction:
-                transaction.status = 'failed'
-                transaction.gateway_response = data['data']
-                transaction.save()
-        
-        return HttpResponse(status=200)
-        
-    except Exception as e:
+        record_webhook(request.body)
+    except ValueError:
         return HttpResponse(status=400)
+    
+    return HttpResponse(status=200)
 
 @login_required
 def transaction_history(request):
     """View user's transaction history"""
-    transactions = Transaction.objects.filter(user=request.user).order_by('-created_at')
+    transactions = Transaction.objects.filter(user=request.user).select_related('booking__event')
     
     # Filter by status
     status_filter = request.GET.get('status', '')
@@ -201,8 +156,11 @@ def transaction_history(request):
     if type_filter:
         transactions = transactions.filter(transaction_type=type_filter)
     
+    page_obj = paginate_listing(request, transactions, 20, ('-created_at', '-id'), count=None)
+    
     context = {
-        'transactions': transactions,
+        'page_obj': page_obj,
+        'transactions': page_obj,
         'status_filter': status_filter,
         'type_filter': type_filter,
     }
@@ -225,27 +183,17 @@ def host_earnings(request):
         messages.error(request, 'You do not have permission to view earnings!')
         return redirect('core:home')
     
-    # Get commissions for user's events
-    commissions = Commission.objects.filter(host=request.user).order_by('-created_at')
-    
-    # Calculate totals
-    total_earnings = commissions.filter(status='calculated').aggregate(
-        total=models.Sum('host_earnings')
-    )['total'] or Decimal('0.00')
-    
-    total_commission = commissions.filter(status='calculated').aggregate(
-        total=models.Sum('commission_amount')
-    )['total'] or Decimal('0.00')
-    
-    pending_earnings = commissions.filter(status='pending').aggregate(
-        total=models.Sum('host_earnings')
-    )['total'] or Decimal('0.00')
+    # Totals come from the running balance row (see payments/payouts.py)
+    balance = HostBalance.objects.filter(host=request.user).first() or HostBalance(host=request.user)
+    commissions = Commission.objects.filter(host=request.user).select_related('event').order_by('-created_at')[:50]
     
     context = {
+        'balance': balance,
         'commissions': commissions,
-        'total_earnings': total_earnings,
-        'total_commission': total_commission,
-        'pending_earnings': pending_earnings,
+        'total_earnings': balance.total_earnings,
+        'total_commission': balance.commission,
+        'pending_earnings': balance.pending,
+        'available_balance': balance.available,
     }
     return render(request, 'payments/host_earnings.html', context)
 
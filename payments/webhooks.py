@@ -0,0 +1,158 @@
+"""
+Paystack webhook inbox.
+
+The webhook view only verifies the signature and stores the event (one
+INSERT, deduplicated on a unique event id) before answering 200, so its
+latency doesn't depend on payment volume. `process_pending`, run by the
+`process_webhooks` command, drains the inbox in batches and applies the
+idempotent transitions in payments/transitions.py.
+"""
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from events.inventory import SoldOut
+from .models import WebhookEvent
+from .payouts import settle_payout
+from .transitions import PaymentNotApplied, charge_problem, complete_payment, fail_payment, transaction_for_reference
+
+logger = logging.getLogger(__name__)
+
+
+class Ignored(Exception):
+    """The event needs no action (unknown type or unknown reference)."""
+
+
+def webhook_event_id(body):
+    """Event type + Paystack object id; a body hash if the payload has no id."""
+    event_type = body.get('event', '')
+    data = body.get('data') or {}
+    object_id = data.get('id') or data.get('reference')
+    if object_id is None:
+        object_id = hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+    return f'{event_type}:{object_id}'[:150]
+
+
+def record_webhook(raw_body):
+    """Store a verified webhook. Returns (event, created); redeliveries return created=False.
+
+    Raises ValueError if the body is not a JSON object.
+    """
+    body = json.loads(raw_body)
+    if not isinstance(body, dict):
+        raise ValueError('Webhook body must be a JSON object')
+    event_id = webhook_event_id(body)
+    try:
+        with transaction.atomic():
+            return WebhookEvent.objects.create(
+                event_id=event_id, event_type=body.get('event', ''), payload=body
+            ), True
+    except IntegrityError:
+        return WebhookEvent.objects.get(event_id=event_id), False
+
+
+def handle_charge_success(data):
+    txn = transaction_for_reference(data.get('reference', ''))
+    if txn is None:
+        raise Ignored(f"No transaction for reference {data.get('reference')!r}")
+    problem = charge_problem(txn, data)
+    if problem:
+        fail_payment(txn, gateway_data=data)
+        raise PaymentNotApplied(problem)
+    complete_payment(txn, gateway_data=data, payment_reference=data.get('reference'))
+
+
+def handle_charge_failed(data):
+    txn = transaction_for_reference(data.get('reference', ''))
+    if txn is None:
+        raise Ignored(f"No transaction for reference {data.get('reference')!r}")
+    fail_payment(txn, gateway_data=data)
+
+
+def handle_transfer(succeeded):
+    def handler(data):
+        # Payout references are used as the transfer reference (see payments/payouts.py)
+        if not settle_payout(data.get('reference', ''), succeeded, data):
+            raise Ignored(f"No unsettled payout for reference {data.get('reference')!r}")
+    return handler
+
+
+HANDLERS = {
+    'charge.success': handle_charge_success,
+    'charge.failed': handle_charge_failed,
+    'transfer.success': handle_transfer(True),
+    'transfer.failed': handle_transfer(False),
+    'transfer.reversed': handle_transfer(False),
+}
+
+
+def max_attempts():
+    return getattr(settings, 'PAYSTACK_WEBHOOK_MAX_ATTEMPTS', 5)
+
+
+def _finish(event, status, error=''):
+    WebhookEvent.objects.filter(pk=event.pk).update(
+        status=status, last_error=error, processed_at=timezone.now()
+    )
+
+
+def process_event(event):
+    """Apply one claimed event and record the outcome."""
+    handler = HANDLERS.get(event.event_type)
+    try:
+        if handler is None:
+            raise Ignored(f'Unhandled event type {event.event_type!r}')
+        handler(event.payload.get('data') or {})
+    except Ignored as e:
+        _finish(event, 'ignored', str(e))
+        return 'ignored'
+    except (SoldOut, PaymentNotApplied) as e:
+        # Paid but not for a booking we can confirm: retrying cannot help, it needs a refund or review
+        logger.error('Webhook %s: payment not applied: %s', event.event_id, e)
+        _finish(event, 'failed', str(e))
+        return 'failed'
+    except Exception as e:
+        logger.exception('Webhook %s failed (attempt %d)', event.event_id, event.attempts)
+        status = 'failed' if event.attempts >= max_attempts() else 'pending'
+        WebhookEvent.objects.filter(pk=event.pk).update(status=status, last_error=str(e))
+        return status
+    _finish(event, 'processed')
+    return 'processed'
+
+
+def claim(pk):
+    """Take a pending event for this worker. Returns the event or None if another worker has it."""
+    claimed = WebhookEvent.objects.filter(pk=pk, status='pending').update(
+        status='processing', attempts=F('attempts') + 1, locked_at=timezone.now()
+    )
+    if claimed:
+        return WebhookEvent.objects.get(pk=pk)
+    return None
+
+
+def process_pending(batch_size=100):
+    """Process up to `batch_size` pending events, oldest first. Returns a status -> count dict."""
+    results = {}
+    pks = list(
+        WebhookEvent.objects.filter(status='pending')
+        .order_by('received_at', 'pk')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    for pk in pks:
+        event = claim(pk)
+        if event is None:
+            continue
+        outcome = process_event(event)
+        results[outcome] = results.get(outcome, 0) + 1
+    return results
+
+
+def requeue_stuck(older_than_minutes=10):
+    """Return events left 'processing' by a crashed worker to the queue. Returns events requeued."""
+    cutoff = timezone.now() - timezone.timedelta(minutes=older_than_minutes)
+    return WebhookEvent.objects.filter(status='processing', locked_at__lt=cutoff).update(status='pending')